@@ -0,0 +1,66 @@
+"""
+IEC104 服务端运行中增删单个测点的耗时
+在本机临时端口启动一个带大量遥测点的站并保持一个客户端连接，逐次增加和删除一个 IOA，取各自最好成绩。
+
+用法: python scripts/bench_iec104_incremental.py [--points 2000] [--rounds 20]
+"""
+
+import argparse
+import os
+import socket
+import sys
+import time
+
+# 把项目根目录加入模块搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.device.protocol.iec104_handler import IEC104ServerHandler
+from src.enums.point_data import Yc
+from src.proto.iec104.iec104client import IEC104Client
+
+
+def _yc(ioa: int) -> Yc:
+    return Yc(address=hex(ioa), code=f"yc{ioa}", frame_type=0)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main(points: int, rounds: int) -> None:
+    port = _free_port()
+    handler = IEC104ServerHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": port})
+    handler.add_points([_yc(ioa) for ioa in range(1, points + 1)])
+    handler.server.start()
+    client = IEC104Client(ip="127.0.0.1", port=port)
+    try:
+        if not client.connect():
+            raise SystemExit("客户端连接失败")
+        time.sleep(0.5)
+        add_times, remove_times = [], []
+        ioa = points + 1
+        for _ in range(rounds):
+            started = time.perf_counter()
+            handler.add_points([_yc(ioa)])
+            add_times.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            handler.remove_points([_yc(ioa)])
+            remove_times.append(time.perf_counter() - started)
+        print(
+            f"{points} points: add {min(add_times) * 1000:.2f} ms, remove {min(remove_times) * 1000:.2f} ms, "
+            f"connected={client.is_connected}"
+        )
+    finally:
+        client.disconnect()
+        handler.server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    main(args.points, args.rounds)
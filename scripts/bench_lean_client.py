@@ -0,0 +1,70 @@
+"""
+异步客户端精简请求路径与 pymodbus 请求对象路径的每秒请求数对比
+在本机临时端口启动一个最简 Modbus TCP 从站，两种客户端交替各测若干轮，取各自最好成绩。
+
+用法: python scripts/bench_lean_client.py [--requests 1000] [--rounds 3]
+"""
+
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import time
+
+# 把项目根目录加入模块搜索路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymodbus.client import AsyncModbusTcpClient
+
+from src.proto.pyModbus.client.async_client import AsyncModbusClient
+
+
+async def _serve(reader, writer):
+    """只应答读保持寄存器 (全 0)"""
+    try:
+        while True:
+            tid, _, length, unit = struct.unpack(">HHHB", await reader.readexactly(7))
+            pdu = await reader.readexactly(length - 1)
+            count = struct.unpack_from(">H", pdu, 3)[0]
+            body = struct.pack(">BB", pdu[0], count * 2) + bytes(count * 2)
+            writer.write(struct.pack(">HHHB", tid, 0, len(body) + 1, unit) + body)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        writer.close()
+
+
+async def _rate(read, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        await read(i)
+    return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int, rounds: int) -> None:
+    server = await asyncio.start_server(_serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    lean = AsyncModbusClient(port=port, timeout=1.0)
+    baseline = AsyncModbusTcpClient("127.0.0.1", port=port, timeout=1.0)
+    try:
+        await lean.connect()
+        await baseline.connect()
+        lean_rates, baseline_rates = [], []
+        for _ in range(rounds):
+            lean_rates.append(await _rate(lambda i: lean.read_holding_registers(1, i, 4), requests))
+            baseline_rates.append(await _rate(lambda i: baseline.read_holding_registers(i, 4, slave=1), requests))
+        print(f"lean: {max(lean_rates):.0f} req/s, pymodbus: {max(baseline_rates):.0f} req/s")
+    finally:
+        await lean.disconnect()
+        baseline.close()
+        # 等从站连接读到 EOF 后再关闭监听
+        await asyncio.sleep(0.05)
+        server.close()
+        await server.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.rounds))
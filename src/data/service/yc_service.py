@@ -84,7 +84,7 @@ class YcService:
 
         elif protocol_type in [ProtocolType.Iec104Server, ProtocolType.Iec104Client]:
             address = decimal_to_hex(int(item["reg_addr"], 0))
-            return Yc(
+            point = Yc(
                 rtu_addr=1,
                 address=address,
                 name=item["name"],
@@ -96,6 +96,9 @@ class YcService:
                 mul_coe=item["mul_coe"],
                 frame_type=0,
             )
+            # 公共地址取自测点配置，未配置时归入设备的默认站
+            point.common_address = item.get("iec_common_address")
+            return point
 
         elif protocol_type in [ProtocolType.Dlt645Server, ProtocolType.Dlt645Client]:
             return Yc(
@@ -75,7 +75,7 @@ class YkService:
 
         elif protocol_type in [ProtocolType.Iec104Server, ProtocolType.Iec104Client]:
             address = decimal_to_hex(int(item["reg_addr"], 0))
-            return Yk(
+            point = Yk(
                 rtu_addr=1,
                 address=address,
                 bit=0,
@@ -85,6 +85,9 @@ class YkService:
                 frame_type=2,
                 command_type=item.get("command_type", 0),
             )
+            # 公共地址取自测点配置，未配置时归入设备的默认站
+            point.common_address = item.get("iec_common_address")
+            return point
 
         elif protocol_type in [ProtocolType.Dlt645Server, ProtocolType.Dlt645Client]:
             return Yk(
@@ -85,7 +85,7 @@ class YtService:
 
         elif protocol_type in [ProtocolType.Iec104Server, ProtocolType.Iec104Client]:
             address = decimal_to_hex(int(item["reg_addr"], 0))
-            return Yt(
+            point = Yt(
                 rtu_addr=1,
                 address=address,
                 name=item["name"],
@@ -97,6 +97,9 @@ class YtService:
                 mul_coe=item["mul_coe"],
                 frame_type=3,
             )
+            # 公共地址取自测点配置，未配置时归入设备的默认站
+            point.common_address = item.get("iec_common_address")
+            return point
 
         elif protocol_type in [ProtocolType.Dlt645Server, ProtocolType.Dlt645Client]:
             return Yt(
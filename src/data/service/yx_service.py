@@ -73,7 +73,7 @@ class YxService:
 
         elif protocol_type in [ProtocolType.Iec104Server, ProtocolType.Iec104Client]:
             address = decimal_to_hex(int(item["reg_addr"], 0))
-            return Yx(
+            point = Yx(
                 rtu_addr=1,
                 address=address,
                 bit=0,
@@ -82,5 +82,8 @@ class YxService:
                 value=0,
                 frame_type=1,
             )
+            # 公共地址取自测点配置，未配置时归入设备的默认站
+            point.common_address = item.get("iec_common_address")
+            return point
 
         return None
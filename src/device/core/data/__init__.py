@@ -1,5 +1,6 @@
 # Data module
 from src.device.core.data.data_exporter import DataExporter
 from src.device.core.data.data_reader import DataReader
+from src.device.core.data.data_writer import DataWriter
 
-__all__ = ["DataExporter", "DataReader"]
+__all__ = ["DataExporter", "DataReader", "DataWriter"]
@@ -7,31 +7,23 @@
 from __future__ import annotations
 
 import asyncio
-import struct
-from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Union
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
 
 from src.enums.point_data import Yc, Yx, BasePoint
-from src.enums.modbus_register import Decode
+from src.device.core.data.read_planner import (
+    AddressGroup,
+    ReadPlanner,
+)
+from src.device.core.data.poll_limiter import loop_semaphore, poll_limiter, poll_target
+from src.device.core.data.value_cache import ValueCache
 
 if TYPE_CHECKING:
     from src.device.core.device import Device
 
-
-@dataclass
-class AddressGroup:
-    """地址分组 - 用于批量读取优化
-    
-    将连续地址的测点分组，以便一次性读取多个数据点。
-    
-    Attributes:
-        start_address: 起始地址
-        register_count: 需要读取的数据点数量
-        points: 该组包含的测点列表
-    """
-    start_address: int
-    register_count: int
-    points: List[BasePoint] = field(default_factory=list)
+# Modbus 异常码：非法数据地址
+_ILLEGAL_ADDRESS = 0x02
 
 
 class DataReader:
@@ -43,6 +35,11 @@ class DataReader:
 
     def __init__(self, device: "Device") -> None:
         self._device = device
+        self.planner = ReadPlanner()  # 批量读取规划器（跨空洞合并、非法区间学习）
+        # 规划缓存：(范围, slave_id, func_code) -> (规划器版本, 测点标识, 地址分组)
+        self._plan_cache: Dict[Tuple[str, int, int], Tuple[int, Tuple[int, ...], List[AddressGroup]]] = {}
+        self._connection_slots: Dict = {}  # 本设备连接的在途请求信号量
+        self.value_cache = ValueCache()  # 测点最近有效值 (供单点读取在新鲜度窗口内复用)
 
     @property
     def _handler(self):
@@ -54,6 +51,18 @@ class DataReader:
         """获取日志器"""
         return self._device.log
 
+    def invalidate_plans(self, slave_id: Optional[int] = None) -> None:
+        """使缓存的批量读取规划失效（测点增删、地址/解析码修改、从站变更时调用）
+
+        Args:
+            slave_id: 从站地址，None 表示全部
+        """
+        if slave_id is None:
+            self._plan_cache.clear()
+        else:
+            for key in [k for k in self._plan_cache if k[1] == slave_id]:
+                del self._plan_cache[key]
+
     def get_slave_values(
         self, yc_list: List[Yc], yx_list: List[Yx]
     ) -> None:
@@ -68,10 +77,12 @@ class DataReader:
 
         for point in yc_list + yx_list:
             try:
+                since = self.value_cache.version()
                 value = self._handler.read_value(point)
                 if value is not None:
                     point.value = value
                     point.is_valid = True
+                    self.value_cache.store(point.code, value, since=since)
                 else:
                     point.is_valid = False
             except (ConnectionError, Exception):
@@ -79,7 +90,7 @@ class DataReader:
                 point.is_valid = False
 
     async def get_slave_values_async(
-        self, yc_list: List[Yc], yx_list: List[Yx], interval_ms: int = 0
+        self, yc_list: List[Yc], yx_list: List[Yx], interval_ms: int = 0, scope: str = ""
     ) -> Tuple[int, int]:
         """异步读取从机的测点值（支持批量读取优化）
         
@@ -87,11 +98,13 @@ class DataReader:
             yc_list: 遥测列表
             yx_list: 遥信列表
             interval_ms: 每次批量读取请求之间的间隔(毫秒)
+            scope: 规划缓存范围，按不同测点子集轮询 (如轮询类别) 时各自缓存规划
             
         Returns:
             Tuple[int, int]: (成功点数, 失败点数)
         
         对于 Modbus 客户端，会将连续地址的测点合并为一次批量读取请求。
+        对于提供 read_points_batch 的客户端 (DLT645)，整批测点在线程池中一次读完。
         对于其他协议或服务端，回退到逐点读取模式。
         """
         if not self._handler:
@@ -111,7 +124,10 @@ class DataReader:
 
         if is_modbus_client and hasattr(self._handler, 'read_registers_batch_async'):
             # 使用批量读取优化
-            return await self._batch_read_async(all_points, interval_ms=interval_ms)
+            return await self._batch_read_async(all_points, interval_ms=interval_ms, scope=scope)
+        elif hasattr(self._handler, 'read_points_batch'):
+            # 逐帧协议 (DLT645)：一批测点在一个请求名额内连续读取
+            return await self._points_batch_read_async(all_points)
         else:
             # 回退到逐点读取
             return await self._single_read_async(all_points)
@@ -122,6 +138,7 @@ class DataReader:
         fail_count = 0
         for point in points:
             try:
+                since = self.value_cache.version()
                 if hasattr(self._handler, 'read_value_async'):
                     value = await self._handler.read_value_async(point)
                 else:
@@ -130,6 +147,7 @@ class DataReader:
                 if value is not None:
                     point.value = value
                     point.is_valid = True
+                    self.value_cache.store(point.code, value, since=since)
                     success_count += 1
                 else:
                     point.is_valid = False
@@ -140,8 +158,31 @@ class DataReader:
                 fail_count += 1
         return success_count, fail_count
 
+    async def _points_batch_read_async(self, points: List[BasePoint]) -> Tuple[int, int]:
+        """整批读取模式：占用一个请求名额，由处理器在线程池中读取全部测点"""
+        since = self.value_cache.version()
+        try:
+            async with self.request_slot():
+                loop = asyncio.get_running_loop()
+                values = await loop.run_in_executor(None, self._handler.read_points_batch, points)
+        except (ConnectionError, Exception) as e:
+            self._log.error(f"Error reading points batch: {e}")
+            values = {}
+
+        success_count = 0
+        for point in points:
+            value = values.get(point.code)
+            if value is not None:
+                point.value = value
+                point.is_valid = True
+                self.value_cache.store(point.code, value, since=since)
+                success_count += 1
+            else:
+                point.is_valid = False
+        return success_count, len(points) - success_count
+
     async def _batch_read_async(
-        self, points: List[BasePoint], interval_ms: int = 0
+        self, points: List[BasePoint], interval_ms: int = 0, scope: str = ""
     ) -> Tuple[int, int]:
         """批量读取模式（优化方案）
         
@@ -150,12 +191,17 @@ class DataReader:
         Args:
             points: 测点列表
             interval_ms: 每次请求之间的间隔(毫秒)
+            scope: 规划缓存范围
             
         Returns:
             Tuple[int, int]: (成功点数, 失败点数)
         """
-        # 1. 按 (slave_id, func_code) 分组
-        groups = self._group_points_by_address(points)
+        # 1. 按 (slave_id, func_code) 分组并规划读取
+        groups = self._group_points_by_address(points, scope=scope)
+
+        # 无请求间隔时所有分组并发发出，由连接和目标 (主机/串口) 的并发上限排队
+        if interval_ms <= 0:
+            return await self._concurrent_read_async(groups)
 
         success_count = 0
         fail_count = 0
@@ -163,52 +209,119 @@ class DataReader:
         is_first_request = True
         for (slave_id, func_code), address_groups in groups.items():
             for group in address_groups:
-                try:
-                    # 在请求之间添加间隔（第一次请求不等待）
-                    if not is_first_request and interval_ms > 0:
-                        await asyncio.sleep(interval_ms / 1000.0)
-                    is_first_request = False
-
-                    # 2. 批量读取
-                    registers = await self._handler.read_registers_batch_async(
-                        func_code, slave_id, group.start_address, group.register_count
-                    )
+                # 在请求之间添加间隔（第一次请求不等待）
+                if not is_first_request and interval_ms > 0:
+                    await asyncio.sleep(interval_ms / 1000.0)
+                is_first_request = False
 
-                    if registers:
-                        # 3. 解码并映射到测点
-                        self._decode_batch_registers(
-                            registers, group.points, group.start_address
-                        )
-                        success_count += len(group.points)
-                    else:
-                        # 读取失败，标记所有测点无效
-                        for point in group.points:
-                            point.is_valid = False
-                        fail_count += len(group.points)
-
-                except Exception as e:
-                    self._log.error(
-                        f"Batch read error for slave={slave_id}, func={func_code}: {e}"
-                    )
-                    for point in group.points:
-                        point.is_valid = False
-                    fail_count += len(group.points)
+                ok, failed = await self._read_group(slave_id, func_code, group, interval_ms)
+                success_count += ok
+                fail_count += failed
 
         return success_count, fail_count
 
+    async def _concurrent_read_async(
+        self, groups: Dict[Tuple[int, int], List[AddressGroup]]
+    ) -> Tuple[int, int]:
+        """并发读取所有 (slave_id, func_code) 分组，合并成功/失败计数"""
+        results = await asyncio.gather(
+            *(
+                self._read_group(slave_id, func_code, group)
+                for (slave_id, func_code), address_groups in groups.items()
+                for group in address_groups
+            )
+        )
+        return sum(ok for ok, _ in results), sum(failed for _, failed in results)
+
+    async def _request_group(
+        self, slave_id: int, func_code: int, start_address: int, count: int
+    ) -> Tuple[List, int, float]:
+        """在并发上限内发出一次批量读取
+
+        Returns:
+            (数据, 异常码, 耗时毫秒)；耗时不含排队等待
+        """
+        async with self.request_slot():
+            started = time.perf_counter()
+            registers = await self._handler.read_registers_batch_async(
+                func_code, slave_id, start_address, count
+            )
+            # 返回后立即读取异常码，此时同一连接上没有其他请求改写它
+            exception_code = getattr(self._handler, "last_exception_code", 0)
+            return registers, exception_code, (time.perf_counter() - started) * 1000
+
+    @asynccontextmanager
+    async def request_slot(self):
+        """占用一个请求名额：目标主机/串口的并发上限 + 本连接的在途上限 (读写共用)"""
+        slots = loop_semaphore(self._connection_slots, "connection", self._connection_limit())
+        async with poll_limiter.slot(poll_target(self._device)), slots:
+            yield
+
+    def _connection_limit(self) -> int:
+        """同一连接上允许的在途请求数：流水线连接为其深度，其余为 1"""
+        return max(1, int(getattr(self._handler, "max_in_flight", 1) or 1))
+
+    async def _read_group(
+        self, slave_id: int, func_code: int, group: AddressGroup, interval_ms: int = 0
+    ) -> Tuple[int, int]:
+        """读取一个地址分组并解码
+
+        跨空洞的分组若返回非法地址异常 (0x02)，记录空洞为非法区间，
+        并立即按严格连续重新拆分读取。
+        """
+        # 读取期间被写入而失效的测点不存入缓存
+        since = self.value_cache.version()
+        try:
+            # 2. 批量读取
+            registers, exception_code, elapsed_ms = await self._request_group(
+                slave_id, func_code, group.start_address, group.register_count
+            )
+
+            if registers:
+                self.planner.observe(slave_id, group.register_count, elapsed_ms)
+                # 3. 按预先计算的偏移和解码函数映射到测点
+                self._decode_group(registers, group, since)
+                return len(group.points), 0
+
+            gaps = group.gaps()
+            if gaps and exception_code == _ILLEGAL_ADDRESS:
+                for gap_start, gap_end in gaps:
+                    self.planner.learn_illegal(slave_id, func_code, gap_start, gap_end)
+                self._log.info(
+                    f"Batch read hit illegal address, split without gaps: "
+                    f"slave={slave_id}, func={func_code}, gaps={gaps}"
+                )
+                success_count = fail_count = 0
+                for sub_group in self.planner.plan(slave_id, func_code, group.points, bridge=False):
+                    if interval_ms > 0:
+                        await asyncio.sleep(interval_ms / 1000.0)
+                    ok, failed = await self._read_group(slave_id, func_code, sub_group)
+                    success_count += ok
+                    fail_count += failed
+                return success_count, fail_count
+        except Exception as e:
+            self._log.error(
+                f"Batch read error for slave={slave_id}, func={func_code}: {e}"
+            )
+
+        # 读取失败，标记所有测点无效
+        for point in group.points:
+            point.is_valid = False
+        return 0, len(group.points)
+
     def _group_points_by_address(
         self,
         points: List[BasePoint],
-        max_gap: int = 0,
-        max_count: int = 120,
+        bridge: bool = True,
+        scope: str = "",
     ) -> Dict[Tuple[int, int], List[AddressGroup]]:
-        """将测点按 (slave_id, func_code) 分组，并找出连续的地址段
-        
+        """将测点按 (slave_id, func_code) 分组，并规划每组的读取地址段
+
         Args:
             points: 测点列表
-            max_gap: 允许的最大地址间隙（默认0，即必须严格连续）
-            max_count: 每次批量读取的最大数据点数量（默认120）
-            
+            bridge: 是否允许按代价跨越地址空洞合并读取（False 时必须严格连续）
+            scope: 规划缓存范围
+
         Returns:
             字典：{(slave_id, func_code): [AddressGroup, ...]}
         """
@@ -225,56 +338,20 @@ class DataReader:
         result: Dict[Tuple[int, int], List[AddressGroup]] = {}
 
         for key, point_list in grouped.items():
-            # 按地址排序
-            point_list.sort(key=lambda p: p.address)
-
-            address_groups: List[AddressGroup] = []
-            current_group: Optional[AddressGroup] = None
-
-            for point in point_list:
-                # 获取该测点占用的寄存器数量
-                decode_info = Decode.get_info(point.decode)
-                point_reg_count = decode_info.register_cnt
-                point_end_addr = point.address + point_reg_count
-
-                if current_group is None:
-                    # 新建分组
-                    current_group = AddressGroup(
-                        start_address=point.address,
-                        register_count=point_reg_count,
-                        points=[point],
-                    )
-                else:
-                    current_end = (
-                        current_group.start_address + current_group.register_count
-                    )
+            if not bridge:
+                result[key] = self.planner.plan(key[0], key[1], point_list, bridge=False)
+                continue
 
-                    # 计算合并后的新结束地址和数量
-                    new_end = max(current_end, point_end_addr)
-                    new_count = new_end - current_group.start_address
-
-                    # 检查是否连续或在允许的间隙内，且总数量不超过限制
-                    if (
-                        point.address <= current_end + max_gap
-                        and new_count <= max_count
-                    ):
-                        # 扩展当前分组
-                        if point_end_addr > current_end:
-                            current_group.register_count = new_count
-                        current_group.points.append(point)
-                    else:
-                        # 保存当前分组，开始新分组
-                        address_groups.append(current_group)
-                        current_group = AddressGroup(
-                            start_address=point.address,
-                            register_count=point_reg_count,
-                            points=[point],
-                        )
-
-            # 保存最后一个分组
-            if current_group:
-                address_groups.append(current_group)
+            # 规划器版本和测点集合均未变化时直接复用上次的规划
+            signature = tuple(map(id, point_list))
+            cache_key = (scope, key[0], key[1])
+            cached = self._plan_cache.get(cache_key)
+            if cached is not None and cached[0] == self.planner.version and cached[1] == signature:
+                result[key] = cached[2]
+                continue
 
+            address_groups = self.planner.plan(key[0], key[1], point_list, bridge=bridge)
+            self._plan_cache[cache_key] = (self.planner.version, signature, address_groups)
             result[key] = address_groups
 
             # 日志记录优化效果
@@ -288,141 +365,33 @@ class DataReader:
 
         return result
 
-    def _decode_batch_registers(
-        self,
-        registers: List[int],
-        points: List[BasePoint],
-        start_address: int,
-    ) -> None:
-        """将批量读取的数据解码并映射到测点
-        
+    def _decode_group(self, registers: List, group: AddressGroup, since: Optional[int] = None) -> None:
+        """按地址分组预先计算的偏移和解码函数，将批量读取的数据映射到测点
+
         Args:
-            registers: 读取到的原始数据列表
-            points: 需要解码的测点列表
-            start_address: 数据起始地址
+            since: 发出读取前的缓存版本，读取期间已失效的测点不存入缓存
         """
-        for point in points:
+        total = len(registers)
+        store = self.value_cache.store
+        now = self.value_cache.clock()
+        for point, offset, count, codec in group.slots:
+            if offset + count > total:
+                point.is_valid = False
+                if self._device._logger:
+                    self._device._logger.warning(
+                        f"Invalid offset for point {point.code}: offset={offset}, "
+                        f"reg_count={count}, total_regs={total}"
+                    )
+                continue
             try:
-                # 计算该测点在数据数组中的偏移
-                offset = point.address - start_address
-                decode_info = Decode.get_info(point.decode)
-                reg_count = decode_info.register_cnt
-
-                # 检查偏移是否有效
-                if offset < 0 or offset + reg_count > len(registers):
-                    point.is_valid = False
-                    if self._device._logger:
-                        self._device._logger.warning(
-                            f"Invalid offset for point {point.code}: offset={offset}, "
-                            f"reg_count={reg_count}, total_regs={len(registers)}"
-                        )
-                    continue
-
-                # 提取该测点对应的数据
-                point_registers = registers[offset : offset + reg_count]
-
-                # 解码
-                value = self._decode_registers(point_registers, decode_info)
-
-                if value is not None:
-                    point.value = value
-                    point.is_valid = True
-                else:
-                    point.is_valid = False
-
+                value = codec(registers[offset : offset + count])
             except Exception as e:
                 self._log.error(f"Error decoding point {point.code}: {e}")
                 point.is_valid = False
-
-    def _decode_registers(
-        self, registers: List[int], decode_info
-    ) -> Optional[Union[int, float]]:
-        """将原始数据解码为实际值
-        
-        Args:
-            registers: 原始数据列表
-            decode_info: 解码配置信息
-            
-        Returns:
-            解码后的值
-        """
-        if not registers:
-            return None
-
-        reg_count = decode_info.register_cnt
-
-        try:
-            if reg_count == 4:  # 64位
-                packed = struct.pack(
-                    ">HHHH" if decode_info.is_big_endian else "<HHHH",
-                    *registers[:4],
-                )
-            elif reg_count == 2:  # 32位
-                packed = struct.pack(
-                    ">HH" if decode_info.is_big_endian else "<HH",
-                    *registers[:2],
-                )
-            else:  # 16位
-                value = registers[0]
-                if not decode_info.is_big_endian:
-                    value = ((value & 0xFF) << 8) | ((value >> 8) & 0xFF)
-                if decode_info.is_signed and value > 0x7FFF:
-                    value -= 0x10000
-                return value
-
-            # 使用 Decode 的解包方法
-            return Decode.unpack_value(decode_info.pack_format, packed)
-
-        except Exception as e:
-            self._log.error(f"Decode error: {e}, registers={registers}")
-            return None
-
-    def sync_iec104_client_values(self, slave_id: int) -> None:
-        """同步 IEC104 客户端从服务端接收的值到内部测点
-        
-        当服务端主动上报数据时，c104.Point 对象的 .value 会自动更新，
-        此方法将这些值同步到应用内部的测点对象。
-        """
-        try:
-            from src.device.protocol.iec104_handler import IEC104ClientHandler
-
-            if not isinstance(self._handler, IEC104ClientHandler):
-                return
-
-            if not self._handler._is_running:
-                return
-
-            client = self._handler._client
-            if not client or not client.station:
-                return
-
-            # 获取该从机下的所有测点 (yc, yx, yt, yk)
-            yc_list, yx_list, yt_list, yk_list = self._device.point_manager.get_points_by_slave(
-                slave_id
-            )
-            all_points = yc_list + yx_list + yt_list + yk_list
-
-            for point in all_points:
-                try:
-                    # 直接从 c104.Point 对象读取值（服务端上报时自动更新）
-                    c104_point = client.station.get_point(io_address=point.address)
-                    if c104_point is None:
-                        continue
-
-                    real_val = c104_point.value
-                    if real_val is not None:
-                        # 遥测点需要反向换算
-                        if isinstance(point, Yc):
-                            try:
-                                raw_val = int(
-                                    (float(real_val) - point.add_coe) / point.mul_coe
-                                )
-                                point.value = raw_val
-                            except (ZeroDivisionError, TypeError):
-                                pass
-                        else:
-                            point.value = real_val
-                except Exception as e:
-                    self._log.debug(f"同步测点 {point.code} 失败: {e}")
-        except Exception as e:
-            self._log.error(f"IEC104 客户端数据同步失败: {e}")
+                continue
+            if value is not None:
+                point.value = value
+                point.is_valid = True
+                store(point.code, value, now, since)
+            else:
+                point.is_valid = False
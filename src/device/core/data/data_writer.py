@@ -0,0 +1,105 @@
+"""
+数据写入器模块
+负责批量写入测点值：Modbus 客户端按从站和地址合并为 FC15/FC16 请求，
+其他协议和服务端逐点写入，返回每个测点的写入结果。
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from src.enums.point_data import BasePoint
+from src.device.core.data.write_planner import plan_writes
+
+if TYPE_CHECKING:
+    from src.device.core.device import Device
+
+
+class DataWriter:
+    """数据写入器
+
+    批量写入时先更新内存中的测点值，再下发到协议层。
+    合并后的请求按从站、地址顺序依次发送，同一地址的后写值总是覆盖先写值。
+    """
+
+    def __init__(self, device: "Device") -> None:
+        self._device = device
+
+    @property
+    def _handler(self):
+        """获取协议处理器（始终跟踪 device 的最新实例）"""
+        return self._device.protocol_handler
+
+    @property
+    def _log(self):
+        """获取日志器"""
+        return self._device.log
+
+    async def write_values_async(self, values: Dict[str, float]) -> Dict[str, bool]:
+        """批量写入测点值
+
+        Args:
+            values: 测点编码 -> 实际值
+
+        Returns:
+            测点编码 -> 是否写入成功
+        """
+        results: Dict[str, bool] = {}
+        items: List[Tuple[BasePoint, float]] = []
+        for code, real_value in values.items():
+            point = self._device.point_manager.get_point_by_code(code)
+            if not point:
+                self._log.error(f"{self._device.name} 未找到测点: {code}")
+                results[code] = False
+                continue
+            if not point.set_real_value(real_value):
+                results[code] = False
+                continue
+            self._device.data_reader.value_cache.invalidate(code)
+            items.append((point, point.value))
+
+        if not items:
+            return results
+        if not self._handler:
+            results.update({point.code: True for point, _ in items})
+            return results
+
+        if hasattr(self._handler, "write_block_async"):
+            await self._write_blocks(items, results)
+        else:
+            await self._write_each(items, results)
+        return results
+
+    async def _write_blocks(self, items: List[Tuple[BasePoint, float]], results: Dict[str, bool]) -> None:
+        """合并为连续地址块写入，每块一次请求"""
+        blocks, rejected = plan_writes(items)
+        for point in rejected:
+            self._log.warning(f"{self._device.name} 测点 {point.code} 不可写 (功能码 {point.func_code})")
+            results[point.code] = False
+
+        blocks.sort(key=lambda b: (b.slave_id, b.table, b.start_address))
+        for block in blocks:
+            async with self._device.data_reader.request_slot():
+                ok = await self._handler.write_block_async(
+                    block.func_code, block.slave_id, block.start_address, block.values
+                )
+            if not ok:
+                self._log.warning(
+                    f"{self._device.name} 批量写入失败: slave={block.slave_id}, "
+                    f"func={block.func_code}, addr={block.start_address}, count={len(block.values)}"
+                )
+            for point in block.points:
+                results[point.code] = ok
+
+    async def _write_each(self, items: List[Tuple[BasePoint, float]], results: Dict[str, bool]) -> None:
+        """逐点写入（非 Modbus 客户端）"""
+        handler = self._handler
+        for point, value in items:
+            try:
+                if hasattr(handler, "write_value_async"):
+                    results[point.code] = bool(await handler.write_value_async(point, value))
+                else:
+                    results[point.code] = bool(handler.write_value(point, value))
+            except Exception as e:
+                self._log.error(f"{self._device.name} 写入测点 {point.code} 失败: {e}")
+                results[point.code] = False
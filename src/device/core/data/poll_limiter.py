@@ -0,0 +1,101 @@
+"""
+轮询并发限制
+多个设备 (通道) 同时轮询时，按目标主机和串口总线限制同时在途的请求数：
+同一网关背后的多个从站可以并发轮询而不压垮网关，同一 RS-485 总线默认一次只发一帧。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, Optional, Tuple
+
+# 默认并发上限
+DEFAULT_HOST_LIMIT = 16
+DEFAULT_SERIAL_LIMIT = 1
+
+
+def poll_target(device) -> str:
+    """设备轮询的目标标识：串口设备为 serial:<串口>，其余为 tcp:<主机>"""
+    serial_port = getattr(device, "serial_port", None)
+    if serial_port:
+        return f"serial:{serial_port}"
+    return f"tcp:{getattr(device, 'ip', '')}"
+
+
+def loop_semaphore(cache: Dict, key, limit: int) -> asyncio.Semaphore:
+    """获取当前事件循环下 key 对应的信号量，循环或上限变化时重新创建"""
+    loop = asyncio.get_running_loop()
+    entry = cache.get(key)
+    if entry is None or entry[0] is not loop or entry[1] != limit:
+        entry = cache[key] = (loop, limit, asyncio.Semaphore(limit))
+    return entry[2]
+
+
+class PollLimiter:
+    """按目标 (主机/串口总线) 的轮询并发限制器
+
+    信号量按事件循环分别创建，修改上限后在下一次获取时生效。
+    """
+
+    def __init__(self, host_limit: int = DEFAULT_HOST_LIMIT, serial_limit: int = DEFAULT_SERIAL_LIMIT) -> None:
+        self.host_limit = host_limit
+        self.serial_limit = serial_limit
+        self._limits: Dict[str, int] = {}
+        self._semaphores: Dict[str, Tuple[asyncio.AbstractEventLoop, int, asyncio.Semaphore]] = {}
+        self._active: Dict[str, int] = {}
+
+    def get_limit(self, target: str) -> int:
+        if target in self._limits:
+            return self._limits[target]
+        return self.serial_limit if target.startswith("serial:") else self.host_limit
+
+    def set_limit(self, target: str, limit: Optional[int]) -> None:
+        """设置目标的并发上限，None 表示恢复默认"""
+        if limit is None:
+            self._limits.pop(target, None)
+        else:
+            self._limits[target] = max(1, int(limit))
+
+    def set_defaults(self, host_limit: Optional[int] = None, serial_limit: Optional[int] = None) -> None:
+        if host_limit is not None:
+            self.host_limit = max(1, int(host_limit))
+        if serial_limit is not None:
+            self.serial_limit = max(1, int(serial_limit))
+
+    def semaphore(self, target: str) -> asyncio.Semaphore:
+        return loop_semaphore(self._semaphores, target, self.get_limit(target))
+
+    def slot(self, target: str) -> "_Slot":
+        """获取目标的一个并发名额 (async with)"""
+        return _Slot(self, target)
+
+    def summary(self) -> dict:
+        return {
+            "host_limit": self.host_limit,
+            "serial_limit": self.serial_limit,
+            "limits": dict(self._limits),
+            "active": {target: count for target, count in self._active.items() if count},
+        }
+
+
+class _Slot:
+    """并发名额上下文，记录各目标当前在途数"""
+
+    def __init__(self, limiter: PollLimiter, target: str) -> None:
+        self._limiter = limiter
+        self._target = target
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> None:
+        self._semaphore = self._limiter.semaphore(self._target)
+        await self._semaphore.acquire()
+        active = self._limiter._active
+        active[self._target] = active.get(self._target, 0) + 1
+
+    async def __aexit__(self, *exc) -> None:
+        self._limiter._active[self._target] -= 1
+        self._semaphore.release()
+
+
+# 进程内共享，跨设备生效
+poll_limiter = PollLimiter()
@@ -0,0 +1,168 @@
+"""
+客户端设备轮询调度器
+在设备所在的事件循环中按轮询类别 (快速状态/常规遥测/慢速电能) 分别定时批量读取，
+替代 DataUpdateThread 逐点跨线程调用 read_value 的方式，不阻塞任何线程。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from src.enums.point_data import BasePoint, Yc, Yx
+
+if TYPE_CHECKING:
+    from src.device.core.device import Device
+
+# 轮询类别及默认周期 (秒)
+POLL_FAST = "fast"
+POLL_NORMAL = "normal"
+POLL_SLOW = "slow"
+DEFAULT_POLL_PERIODS: Dict[str, float] = {POLL_FAST: 0.5, POLL_NORMAL: 2.0, POLL_SLOW: 60.0}
+
+# 名称/编码包含以下关键字的遥测默认归为慢速 (电能累计量)
+_SLOW_KEYWORDS = ("energy", "kwh", "电能", "电量")
+
+
+def default_poll_class(point: BasePoint) -> str:
+    """测点的默认轮询类别：遥信为快速，电能类遥测为慢速，其余为常规"""
+    if isinstance(point, Yx):
+        return POLL_FAST
+    text = f"{point.code} {point.name}".lower()
+    if any(keyword in text for keyword in _SLOW_KEYWORDS):
+        return POLL_SLOW
+    return POLL_NORMAL
+
+
+class PollScheduler:
+    """客户端设备的异步轮询调度器
+
+    每个轮询类别一个任务，按固定周期执行；一轮耗时超过周期时记为超时并立即开始下一轮。
+    各类别的读取均经过 DataReader 的批量规划，并按类别分别缓存规划。
+    """
+
+    def __init__(self, device: "Device") -> None:
+        self._device = device
+        self.periods: Dict[str, float] = dict(DEFAULT_POLL_PERIODS)
+        self._assigned: Dict[str, str] = {}  # 测点编码 -> 轮询类别 (显式指定)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, Dict[str, float]] = {name: self._empty_stats() for name in self.periods}
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, float]:
+        return {"cycles": 0, "success": 0, "fail": 0, "overruns": 0, "last_duration_ms": 0.0, "last_poll": 0.0}
+
+    # ---------- 配置 ----------
+
+    def poll_class_of(self, point: BasePoint) -> str:
+        """显式指定优先，其次由协议处理器按协议语义划分 (如 DLT645 按 DI 类别)，最后按默认规则"""
+        assigned = self._assigned.get(point.code)
+        if assigned:
+            return assigned
+        handler = self._device.protocol_handler
+        if handler is not None and hasattr(handler, "poll_class_of"):
+            return handler.poll_class_of(point)
+        return default_poll_class(point)
+
+    def assign(self, point_code: str, poll_class: Optional[str]) -> None:
+        """指定测点的轮询类别，None 表示恢复默认"""
+        if poll_class is None:
+            self._assigned.pop(point_code, None)
+            return
+        if poll_class not in self.periods:
+            raise ValueError(f"未知的轮询类别: {poll_class}")
+        self._assigned[point_code] = poll_class
+
+    def set_period(self, poll_class: str, period: float) -> None:
+        """设置轮询类别的周期 (秒)，下一轮生效"""
+        if poll_class not in self.periods:
+            raise ValueError(f"未知的轮询类别: {poll_class}")
+        if period <= 0:
+            raise ValueError("轮询周期必须大于 0")
+        self.periods[poll_class] = float(period)
+
+    def points_of(self, poll_class: str) -> Tuple[List[Yc], List[Yx]]:
+        """获取属于该轮询类别的遥测和遥信"""
+        yc_list = [
+            point for points in self._device.yc_dict.values() for point in points
+            if self.poll_class_of(point) == poll_class
+        ]
+        yx_list = [
+            point for points in self._device.yx_dict.values() for point in points
+            if self.poll_class_of(point) == poll_class
+        ]
+        return yc_list, yx_list
+
+    # ---------- 启停 ----------
+
+    @property
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self._tasks.values())
+
+    def start(self) -> bool:
+        """在当前事件循环中启动各轮询类别的任务，已在运行时返回 False"""
+        if self.is_running:
+            return False
+        loop = asyncio.get_running_loop()
+        self._tasks = {
+            poll_class: loop.create_task(self._run(poll_class), name=f"poll-{self._device.name}-{poll_class}")
+            for poll_class in self.periods
+        }
+        return True
+
+    def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks = {}
+
+    # ---------- 执行 ----------
+
+    async def poll_once(self, poll_class: str) -> Tuple[int, int]:
+        """执行一轮指定类别的批量读取"""
+        yc_list, yx_list = self.points_of(poll_class)
+        if not yc_list and not yx_list:
+            return 0, 0
+        started = time.perf_counter()
+        ok, failed = await self._device.data_reader.get_slave_values_async(
+            yc_list, yx_list, scope=poll_class
+        )
+        stats = self.stats[poll_class]
+        stats["cycles"] += 1
+        stats["success"] += ok
+        stats["fail"] += failed
+        stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        stats["last_poll"] = time.time()
+        return ok, failed
+
+    async def _run(self, poll_class: str) -> None:
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        while True:
+            if self._device.is_protocol_running():
+                try:
+                    await self.poll_once(poll_class)
+                except Exception as e:
+                    self._device.log.error(f"轮询类别 {poll_class} 读取失败: {e}")
+
+            next_at += self.periods[poll_class]
+            now = loop.time()
+            if next_at < now:
+                # 本轮超出周期：不补发错过的轮次，从当前时刻重新计时
+                self.stats[poll_class]["overruns"] += 1
+                next_at = now
+            await asyncio.sleep(next_at - now)
+
+    def summary(self) -> dict:
+        counts: Dict[str, int] = {poll_class: 0 for poll_class in self.periods}
+        for points in list(self._device.yc_dict.values()) + list(self._device.yx_dict.values()):
+            for point in points:
+                counts[self.poll_class_of(point)] += 1
+        return {
+            "running": self.is_running,
+            "classes": {
+                poll_class: {"period": period, "points": counts[poll_class], **self.stats[poll_class]}
+                for poll_class, period in self.periods.items()
+            },
+            "assigned": dict(self._assigned),
+        }
@@ -0,0 +1,310 @@
+"""
+批量读取规划器
+根据实测的单次请求往返耗时和单个寄存器的传输耗时，决定是否跨越地址空洞合并读取，
+同时遵守功能码的最大读取数量、从异常应答中学习到的非法地址区间和按从站的覆盖配置。
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.enums.point_data import BasePoint
+from src.enums.modbus_register import Decode
+
+# Modbus 协议规定的单次最大读取数量
+MAX_REGISTER_COUNT = 125
+MAX_BIT_COUNT = 2000
+
+# 功能码 -> 数据表 (写功能码按对应的读数据表处理)
+_FUNC_CODE_TABLE: Dict[int, int] = {1: 1, 5: 1, 15: 1, 2: 2, 3: 3, 6: 3, 10: 3, 16: 3, 4: 4}
+_BIT_TABLES = (1, 2)
+
+# 无实测数据时的默认代价 (毫秒)
+_DEFAULT_REQUEST_MS = 10.0
+_DEFAULT_REGISTER_MS = 0.02
+
+# 指数衰减系数：越大越偏向最近的测量
+_DECAY = 0.1
+
+# 代价模型的跨越阈值 (request_ms / register_ms) 变化超过该比例时重新规划
+_REPLAN_RATIO = 0.25
+
+
+class PointSlot(NamedTuple):
+    """测点在批量读取结果中的位置与解码函数 (规划时预先计算)"""
+    point: BasePoint
+    offset: int
+    count: int
+    codec: Callable[[List[Any]], Any]
+
+
+@dataclass
+class AddressGroup:
+    """地址分组 - 用于批量读取优化
+
+    将连续地址的测点分组，以便一次性读取多个数据点。
+
+    Attributes:
+        start_address: 起始地址
+        register_count: 需要读取的数据点数量
+        points: 该组包含的测点列表
+    """
+    start_address: int
+    register_count: int
+    points: List[BasePoint] = field(default_factory=list)
+    slots: List[PointSlot] = field(default_factory=list)
+
+    @property
+    def end_address(self) -> int:
+        return self.start_address + self.register_count
+
+    def build_slots(self) -> None:
+        """预先计算每个测点的偏移、数量和解码函数，解码时无需再查表"""
+        self.slots = [
+            PointSlot(point, point.address - self.start_address, point_register_count(point), codec_for(point))
+            for point in self.points
+        ]
+
+    def gaps(self) -> List[Tuple[int, int]]:
+        """获取组内未被测点覆盖的地址区间 [(start, end), ...]"""
+        result = []
+        cursor = self.start_address
+        for point in sorted(self.points, key=lambda p: p.address):
+            if point.address > cursor:
+                result.append((cursor, point.address))
+            cursor = max(cursor, point.address + point_register_count(point))
+        return result
+
+
+@dataclass
+class ReadPlanOverride:
+    """按从站的规划覆盖配置 (None 表示使用默认)"""
+    max_gap: Optional[int] = None  # 允许跨越的最大地址空洞，0 表示严格连续
+    max_count: Optional[int] = None  # 单次最大读取数量 (不超过协议上限)
+
+
+class ReadCostModel:
+    """单个从站的读取代价模型：往返耗时 ≈ request_ms + count * register_ms
+
+    使用带指数衰减的在线最小二乘拟合，随轮询不断修正。
+    """
+
+    def __init__(self) -> None:
+        self.samples = 0
+        self._sx = self._sy = self._sxx = self._sxy = self._w = 0.0
+        self.request_ms = _DEFAULT_REQUEST_MS
+        self.register_ms = _DEFAULT_REGISTER_MS
+
+    def observe(self, count: int, elapsed_ms: float) -> None:
+        keep = 1.0 - _DECAY
+        self._w = self._w * keep + 1.0
+        self._sx = self._sx * keep + count
+        self._sy = self._sy * keep + elapsed_ms
+        self._sxx = self._sxx * keep + count * count
+        self._sxy = self._sxy * keep + count * elapsed_ms
+        self.samples += 1
+
+        mean_x = self._sx / self._w
+        mean_y = self._sy / self._w
+        var_x = self._sxx / self._w - mean_x * mean_x
+        if var_x > 1e-6:
+            slope = (self._sxy / self._w - mean_x * mean_y) / var_x
+            self.register_ms = max(slope, 0.0)
+        self.request_ms = max(mean_y - self.register_ms * mean_x, 0.0)
+
+    def to_dict(self) -> dict:
+        return {
+            "samples": self.samples,
+            "request_ms": round(self.request_ms, 4),
+            "register_ms": round(self.register_ms, 6),
+        }
+
+
+def func_code_table(func_code: int) -> Optional[int]:
+    """功能码访问的数据表 (1=线圈, 2=离散输入, 3=保持寄存器, 4=输入寄存器)"""
+    return _FUNC_CODE_TABLE.get(int(func_code))
+
+
+def is_bit_func_code(func_code: int) -> bool:
+    """功能码是否访问位表 (线圈/离散输入)"""
+    return _FUNC_CODE_TABLE.get(int(func_code)) in _BIT_TABLES
+
+
+def point_register_count(point: BasePoint) -> int:
+    """测点占用的数据点数量 (线圈/离散输入固定为 1)"""
+    if is_bit_func_code(point.func_code):
+        return 1
+    return Decode.get_info(point.decode).register_cnt
+
+
+def _bit_codec(values: List[Any]) -> Any:
+    return values[0]
+
+
+@lru_cache(maxsize=None)
+def register_codec(decode: str) -> Callable[[List[int]], Any]:
+    """按解析码生成寄存器解码函数 (批量读取与单点读取共用)"""
+    info = Decode.get_info(decode)
+    if info.register_cnt == 1:
+        big_endian, signed = info.is_big_endian, info.is_signed
+
+        def decode_16(registers: List[int]) -> int:
+            value = registers[0]
+            if not big_endian:
+                value = ((value & 0xFF) << 8) | ((value >> 8) & 0xFF)
+            if signed and value > 0x7FFF:
+                value -= 0x10000
+            return value
+
+        return decode_16
+
+    words = struct.Struct((">" if info.is_big_endian else "<") + "H" * info.register_cnt)
+    pack_format = info.pack_format
+
+    def decode_words(registers: List[int]) -> Any:
+        return Decode.unpack_value(pack_format, words.pack(*registers))
+
+    return decode_words
+
+
+def codec_for(point: BasePoint) -> Callable[[List[Any]], Any]:
+    """获取测点的解码函数"""
+    if is_bit_func_code(point.func_code):
+        return _bit_codec
+    return register_codec(point.decode)
+
+
+def protocol_max_count(func_code: int) -> int:
+    """功能码对应的协议最大读取数量"""
+    return MAX_BIT_COUNT if is_bit_func_code(func_code) else MAX_REGISTER_COUNT
+
+
+class ReadPlanner:
+    """基于代价的批量读取规划器
+
+    相邻两个测点之间有 gap 个空地址时，跨越读取多传输 gap 个数据点，
+    拆分读取多一次请求往返，取代价较小者；位表每个数据点按 1/16 寄存器计算。
+    """
+
+    def __init__(self) -> None:
+        self._costs: Dict[int, ReadCostModel] = {}
+        self._illegal: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self._overrides: Dict[int, ReadPlanOverride] = {}
+        self._thresholds: Dict[int, float] = {}
+        self.version = 0  # 规划相关状态变化时递增，缓存的规划据此失效
+
+    # ---------- 配置与学习 ----------
+
+    def cost_model(self, slave_id: int) -> ReadCostModel:
+        model = self._costs.get(slave_id)
+        if model is None:
+            model = self._costs[slave_id] = ReadCostModel()
+        return model
+
+    def observe(self, slave_id: int, count: int, elapsed_ms: float) -> None:
+        """记录一次成功读取的往返耗时，跨越阈值明显变化时使缓存的规划失效"""
+        model = self.cost_model(slave_id)
+        model.observe(count, elapsed_ms)
+        threshold = model.request_ms / max(model.register_ms, 1e-9)
+        previous = self._thresholds.get(slave_id)
+        if previous is None or abs(threshold - previous) > previous * _REPLAN_RATIO:
+            self._thresholds[slave_id] = threshold
+            self.version += 1
+
+    def set_override(self, slave_id: int, max_gap: Optional[int] = None, max_count: Optional[int] = None) -> None:
+        """设置从站覆盖配置，两项均为 None 时清除"""
+        if max_gap is None and max_count is None:
+            self._overrides.pop(slave_id, None)
+        else:
+            self._overrides[slave_id] = ReadPlanOverride(max_gap, max_count)
+        self.version += 1
+
+    def learn_illegal(self, slave_id: int, func_code: int, start: int, end: int) -> None:
+        """记录从站不支持的地址区间 [start, end)，之后不再跨越该区间"""
+        table = _FUNC_CODE_TABLE.get(int(func_code), int(func_code))
+        ranges = self._illegal.setdefault((slave_id, table), [])
+        if (start, end) not in ranges:
+            ranges.append((start, end))
+            self.version += 1
+
+    def clear_illegal(self, slave_id: Optional[int] = None) -> None:
+        if slave_id is None:
+            self._illegal.clear()
+        else:
+            for key in [k for k in self._illegal if k[0] == slave_id]:
+                del self._illegal[key]
+        self.version += 1
+
+    def _crosses_illegal(self, slave_id: int, func_code: int, start: int, end: int) -> bool:
+        table = _FUNC_CODE_TABLE.get(int(func_code), int(func_code))
+        for lo, hi in self._illegal.get((slave_id, table), ()):
+            if lo < end and start < hi:
+                return True
+        return False
+
+    def max_count(self, slave_id: int, func_code: int) -> int:
+        limit = protocol_max_count(func_code)
+        override = self._overrides.get(slave_id)
+        if override and override.max_count:
+            limit = min(limit, override.max_count)
+        return limit
+
+    def should_bridge(self, slave_id: int, func_code: int, gap_start: int, gap_end: int) -> bool:
+        """是否跨越 [gap_start, gap_end) 的空洞合并读取"""
+        gap = gap_end - gap_start
+        if gap <= 0:
+            return True
+        override = self._overrides.get(slave_id)
+        if override and override.max_gap is not None and gap > override.max_gap:
+            return False
+        if self._crosses_illegal(slave_id, func_code, gap_start, gap_end):
+            return False
+        model = self.cost_model(slave_id)
+        unit_ms = model.register_ms
+        if is_bit_func_code(func_code):
+            unit_ms /= 16
+        return gap * unit_ms < model.request_ms
+
+    # ---------- 规划 ----------
+
+    def plan(self, slave_id: int, func_code: int, points: List[BasePoint], bridge: bool = True) -> List[AddressGroup]:
+        """将同一 (slave_id, func_code) 的测点规划为若干次读取"""
+        limit = self.max_count(slave_id, func_code)
+        groups: List[AddressGroup] = []
+        current: Optional[AddressGroup] = None
+
+        for point in sorted(points, key=lambda p: p.address):
+            count = point_register_count(point)
+            point_end = point.address + count
+            if current is not None:
+                current_end = current.end_address
+                new_count = max(current_end, point_end) - current.start_address
+                joinable = point.address <= current_end or (
+                    bridge and self.should_bridge(slave_id, func_code, current_end, point.address)
+                )
+                if joinable and new_count <= limit:
+                    current.register_count = new_count
+                    current.points.append(point)
+                    continue
+                groups.append(current)
+            current = AddressGroup(start_address=point.address, register_count=count, points=[point])
+
+        if current is not None:
+            groups.append(current)
+        for group in groups:
+            group.build_slots()
+        return groups
+
+    def summary(self) -> dict:
+        """获取规划器状态 (代价模型、已学习的非法区间、覆盖配置)"""
+        return {
+            "costs": {slave_id: model.to_dict() for slave_id, model in self._costs.items()},
+            "illegal_ranges": {
+                f"{slave_id}:{table}": [list(r) for r in ranges]
+                for (slave_id, table), ranges in self._illegal.items()
+            },
+            "overrides": {slave_id: asdict(o) for slave_id, o in self._overrides.items()},
+        }
@@ -0,0 +1,125 @@
+"""
+测点值缓存
+记录每个测点最近一次读取成功的原始值及时间戳 (由批量轮询和单点读取填充)，
+单点读取在新鲜度窗口内直接返回缓存值；同一测点并发的按需读取合并为一次请求 (singleflight)。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# 默认新鲜度窗口 (秒)
+DEFAULT_VALUE_TTL = 1.0
+
+
+class ValueCache:
+    """按测点编码的最近有效值缓存"""
+
+    def __init__(self, ttl: float = DEFAULT_VALUE_TTL, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: Dict[str, Tuple[Any, float]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # 失效版本：每次失效递增 _version，并记录各测点 (或全部) 最近一次失效时的版本
+        self._version = 0
+        self._versions: Dict[str, int] = {}
+        self._cleared = 0
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "shared": 0}
+
+    def set_ttl(self, ttl: float) -> None:
+        """设置新鲜度窗口 (秒)，0 表示单点读取总是访问设备"""
+        if ttl < 0:
+            raise ValueError("新鲜度窗口不能为负数")
+        self.ttl = float(ttl)
+
+    def version(self, point_code: Optional[str] = None) -> int:
+        """测点最近一次失效时的版本，None 表示当前版本 (发出读取前取得，存入时比较)"""
+        if point_code is None:
+            return self._version
+        return max(self._versions.get(point_code, 0), self._cleared)
+
+    def store(
+        self,
+        point_code: str,
+        value: Any,
+        timestamp: Optional[float] = None,
+        since: Optional[int] = None,
+    ) -> bool:
+        """记录测点读取成功的值 (批量解码时可传入同一时间戳)
+
+        Args:
+            since: 发出读取前的 version()；读取期间测点已失效时不存入，返回 False
+        """
+        if since is not None and self.version(point_code) > since:
+            return False
+        self._entries[point_code] = (value, self.clock() if timestamp is None else timestamp)
+        return True
+
+    def invalidate(self, point_code: Optional[str] = None) -> None:
+        """使测点缓存失效 (写入、地址变更后调用)，None 表示全部
+
+        在途读取的结果不再存入，之后的读取也不再合并到在途请求
+        """
+        self._version += 1
+        if point_code is None:
+            self._cleared = self._version
+            self._versions.clear()
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            self._versions[point_code] = self._version
+            self._entries.pop(point_code, None)
+            self._inflight.pop(point_code, None)
+
+    def get_fresh(self, point_code: str) -> Tuple[bool, Any]:
+        """新鲜度窗口内的缓存值，返回 (是否命中, 值)"""
+        entry = self._entries.get(point_code)
+        if entry is None or self.clock() - entry[1] > self.ttl:
+            return False, None
+        return True, entry[0]
+
+    def age(self, point_code: str) -> Optional[float]:
+        """缓存值距今的秒数，无缓存时返回 None"""
+        entry = self._entries.get(point_code)
+        return None if entry is None else self.clock() - entry[1]
+
+    async def read_through(self, point_code: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """读取测点值：优先使用新鲜缓存，否则访问设备，并发的相同读取共享一次请求
+
+        Args:
+            point_code: 测点编码
+            fetch: 访问设备的协程函数，返回 None 表示读取失败
+
+        Returns:
+            测点原始值，失败返回 None
+        """
+        hit, value = self.get_fresh(point_code)
+        if hit:
+            self.stats["hits"] += 1
+            return value
+
+        future = self._inflight.get(point_code)
+        if future is not None and not future.done() and future.get_loop() is asyncio.get_running_loop():
+            self.stats["shared"] += 1
+        else:
+            self.stats["misses"] += 1
+            future = asyncio.ensure_future(self._fetch(point_code, fetch))
+            self._inflight[point_code] = future
+        # 单个调用方取消不影响其他等待同一请求的调用方
+        return await asyncio.shield(future)
+
+    async def _fetch(self, point_code: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        since = self._version
+        try:
+            value = await fetch()
+            if value is not None:
+                self.store(point_code, value, since=since)
+            return value
+        finally:
+            if self._inflight.get(point_code) is asyncio.current_task():
+                del self._inflight[point_code]
+
+    def summary(self) -> dict:
+        return {"ttl": self.ttl, "entries": len(self._entries), "inflight": len(self._inflight), **self.stats}
@@ -0,0 +1,139 @@
+"""
+批量写入规划
+把多个 (测点, 值) 按解析码编码为寄存器/线圈值，
+再将同一从站上地址严格连续的部分合并为 FC16 (写多个寄存器) / FC15 (写多个线圈) 请求。
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.enums.point_data import BasePoint
+from src.enums.modbus_register import Decode
+from src.device.core.data.read_planner import func_code_table
+
+# Modbus 协议规定的单次最大写入数量
+MAX_WRITE_REGISTERS = 123
+MAX_WRITE_COILS = 1968
+
+_COIL_TABLE = 1
+_REGISTER_TABLE = 3
+
+
+@lru_cache(maxsize=None)
+def register_encoder(decode: str) -> Callable[[Any], List[int]]:
+    """按解析码生成寄存器编码函数 (与 write_value_by_address 结果一致)"""
+    info = Decode.get_info(decode)
+    if info.register_cnt == 1:
+        big_endian, signed = info.is_big_endian, info.is_signed
+
+        def encode_16(value: Any) -> List[int]:
+            register = int(value)
+            if signed and register < 0:
+                register += 1 << 16
+            register &= 0xFFFF
+            if not big_endian:
+                register = ((register & 0xFF) << 8) | ((register >> 8) & 0xFF)
+            return [register]
+
+        return encode_16
+
+    words = struct.Struct((">" if info.is_big_endian else "<") + "H" * info.register_cnt)
+    pack_format = info.pack_format
+
+    def encode_words(value: Any) -> List[int]:
+        return list(words.unpack(Decode.pack_value(pack_format, value)))
+
+    return encode_words
+
+
+def write_table(point: BasePoint) -> Optional[int]:
+    """测点写入的数据表：1=线圈，3=保持寄存器，只读表返回 None"""
+    table = func_code_table(point.func_code)
+    return table if table in (_COIL_TABLE, _REGISTER_TABLE) else None
+
+
+def encode_point_value(point: BasePoint, value: Any) -> List[Any]:
+    """将测点值编码为待写入的线圈/寄存器值列表"""
+    if write_table(point) == _COIL_TABLE:
+        return [bool(value)]
+    return register_encoder(point.decode)(value)
+
+
+@dataclass
+class WriteBlock:
+    """一次写入请求
+
+    Attributes:
+        slave_id: 从站地址
+        table: 数据表 (1=线圈, 3=保持寄存器)
+        start_address: 起始地址
+        values: 待写入的线圈/寄存器值
+        points: 该请求覆盖的测点
+    """
+    slave_id: int
+    table: int
+    start_address: int
+    values: List[Any] = field(default_factory=list)
+    points: List[BasePoint] = field(default_factory=list)
+
+    @property
+    def end_address(self) -> int:
+        return self.start_address + len(self.values)
+
+    @property
+    def func_code(self) -> int:
+        """单个数据点用 FC5/FC6，多个用 FC15/FC16"""
+        if self.table == _COIL_TABLE:
+            return 5 if len(self.values) == 1 else 15
+        return 6 if len(self.values) == 1 else 16
+
+
+def plan_writes(items: List[Tuple[BasePoint, Any]]) -> Tuple[List[WriteBlock], List[BasePoint]]:
+    """规划批量写入
+
+    同一测点出现多次时以最后一次为准；只合并地址严格连续的测点，不写入空洞；
+    地址部分重叠的测点另起一个请求，按地址顺序发送以保证后写覆盖。
+
+    Returns:
+        (写入请求列表, 无法写入的测点列表)
+    """
+    latest: Dict[int, Tuple[BasePoint, Any]] = {}
+    rejected: List[BasePoint] = []
+    for point, value in items:
+        if write_table(point) is None:
+            rejected.append(point)
+            continue
+        latest[id(point)] = (point, value)
+
+    grouped: Dict[Tuple[int, int], List[Tuple[BasePoint, List[Any]]]] = {}
+    for point, value in latest.values():
+        try:
+            encoded = encode_point_value(point, value)
+        except (struct.error, ValueError, TypeError):
+            rejected.append(point)
+            continue
+        grouped.setdefault((point.rtu_addr, write_table(point)), []).append((point, encoded))
+
+    blocks: List[WriteBlock] = []
+    for (slave_id, table), entries in grouped.items():
+        limit = MAX_WRITE_COILS if table == _COIL_TABLE else MAX_WRITE_REGISTERS
+        current: Optional[WriteBlock] = None
+        for point, encoded in sorted(entries, key=lambda e: e[0].address):
+            if (
+                current is not None
+                and point.address == current.end_address
+                and len(current.values) + len(encoded) <= limit
+            ):
+                current.values.extend(encoded)
+                current.points.append(point)
+                continue
+            if current is not None:
+                blocks.append(current)
+            current = WriteBlock(slave_id, table, point.address, list(encoded), [point])
+        if current is not None:
+            blocks.append(current)
+    return blocks, rejected
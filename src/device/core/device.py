@@ -4,6 +4,7 @@ Device 类 - 设备模拟器核心类 (Facade)
 使用组合模式，将职责分离到各个专用组件：
 - PointManager: 测点存储与索引
 - DataReader: 数据读取与解码
+- DataWriter: 批量写入与请求合并
 - PointOperator: 测点增删改查
 - SlaveManager: 从机增删改
 - DataExporter: 数据导入导出
@@ -12,6 +13,7 @@ Device 类 - 设备模拟器核心类 (Facade)
 - ProtocolHandler: 协议处理
 """
 
+import asyncio
 import time
 from typing import Any, Literal, Union, Optional, Dict, List, Tuple
 
@@ -21,6 +23,8 @@ from src.device.simulator.simulation_controller import SimulationController
 from src.device.core.point.point_manager import PointManager
 from src.device.core.data.data_exporter import DataExporter
 from src.device.core.data.data_reader import DataReader
+from src.device.core.data.data_writer import DataWriter
+from src.device.core.data.poll_scheduler import PollScheduler
 from src.device.core.point.point_operator import PointOperator
 from src.device.core.slave_manager import SlaveManager
 from src.device.core.message.message_formatter import MessageFormatter
@@ -57,6 +61,11 @@ class Device:
         self.stopbits: int = 1
         self.parity: str = "E"
         self.meter_address: str = "000000000000"
+        self.strict_address_map: bool = False  # Modbus 服务端严格地址表模式
+        self.connection_limits: Dict[str, Any] = {}  # Modbus TCP 服务端连接限制
+        self.pipeline_depth: int = 1  # Modbus TCP 客户端最大在途请求数 (>1 启用流水线)
+        self.iec104_reporting: Dict[str, Any] = {}  # IEC104 服务端上送策略 (突发/周期/死区)
+        self.iec104_interrogation: Dict[str, Any] = {}  # IEC104 客户端召唤计划 (总召唤/电度量召唤周期)
         self.device_type: DeviceType = DeviceType.Other
         self.protocol_type: ProtocolType = protocol_type
 
@@ -68,6 +77,8 @@ class Device:
 
         # 功能组件（持有 self 引用，始终跟踪最新状态）
         self.data_reader: DataReader = DataReader(self)
+        self.data_writer: DataWriter = DataWriter(self)
+        self.poll_scheduler: PollScheduler = PollScheduler(self)
         self.point_operator: PointOperator = PointOperator(self)
         self.slave_manager: SlaveManager = SlaveManager(self)
         self.message_formatter: MessageFormatter = MessageFormatter(self)
@@ -152,6 +163,7 @@ class Device:
     def _build_protocol_config(self) -> dict:
         """构建协议配置字典"""
         return {
+            "name": self.name,
             "ip": self.ip,
             "port": self.port,
             "serial_port": self.serial_port,
@@ -162,6 +174,11 @@ class Device:
             "slave_id_list": self.slave_id_list,
             "protocol_type": self.protocol_type,
             "meter_address": self.meter_address,
+            "strict_address_map": self.strict_address_map,
+            "connection_limits": self.connection_limits,
+            "pipeline_depth": self.pipeline_depth,
+            "iec104_reporting": self.iec104_reporting,
+            "iec104_interrogation": self.iec104_interrogation,
         }
 
     def initProtocol(self) -> None:
@@ -262,19 +279,71 @@ class Device:
             yc_list, yx_list, interval_ms
         )
 
+    def set_read_plan_override(
+        self, slave_id: int, max_gap: Optional[int] = None, max_count: Optional[int] = None
+    ) -> None:
+        """设置从站的批量读取规划覆盖（最大跨越空洞、单次最大读取数量），均为 None 时清除"""
+        self.data_reader.planner.set_override(slave_id, max_gap, max_count)
+
+    def get_read_plan_info(self) -> Dict[str, Any]:
+        """获取批量读取规划器状态（实测代价、已学习的非法区间、覆盖配置）"""
+        return self.data_reader.planner.summary()
+
+    def set_pipeline_depth(self, depth: int) -> Dict[str, Any]:
+        """设置 Modbus TCP 客户端最大在途请求数（>1 启用流水线，切换模式在重新连接后生效）"""
+        self.pipeline_depth = max(1, int(depth))
+        if hasattr(self.protocol_handler, "set_pipeline_depth"):
+            return self.protocol_handler.set_pipeline_depth(self.pipeline_depth)
+        return {"pipeline_depth": self.pipeline_depth}
+
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """获取 Modbus TCP 客户端流水线统计"""
+        if hasattr(self.protocol_handler, "get_pipeline_stats"):
+            return self.protocol_handler.get_pipeline_stats()
+        return {}
+
     # ===== 自动读取控制 =====
 
     def start_auto_read(self) -> bool:
-        """启动自动读取线程"""
+        """启动自动读取
+
+        客户端设备在事件循环中运行时使用异步轮询调度器，否则使用自动读取线程。
+        """
+        if isinstance(self.protocol_handler, ClientHandler):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                return self.poll_scheduler.start()
         return self.data_update_thread.start()
 
     def stop_auto_read(self) -> None:
-        """停止自动读取线程"""
+        """停止自动读取"""
+        self.poll_scheduler.stop()
         self.data_update_thread.stop()
 
     def is_auto_read_running(self) -> bool:
         """检查自动读取是否正在运行"""
-        return self.data_update_thread.is_alive()
+        return self.poll_scheduler.is_running or self.data_update_thread.is_alive()
+
+    def set_poll_class(self, point_code: str, poll_class: Optional[str]) -> None:
+        """指定测点的轮询类别 (fast/normal/slow)，None 表示恢复默认"""
+        if point_code not in self.codeToDataPointMap:
+            raise KeyError(point_code)
+        self.poll_scheduler.assign(point_code, poll_class)
+
+    def set_poll_period(self, poll_class: str, period: float) -> None:
+        """设置轮询类别的周期 (秒)"""
+        self.poll_scheduler.set_period(poll_class, period)
+
+    def get_poll_schedule(self) -> Dict[str, Any]:
+        """获取轮询调度状态（各类别周期、测点数、读取统计、测点值缓存）"""
+        return {**self.poll_scheduler.summary(), "value_cache": self.data_reader.value_cache.summary()}
+
+    def set_value_cache_ttl(self, ttl: float) -> None:
+        """设置单点读取复用缓存值的新鲜度窗口 (秒)，0 表示总是访问设备"""
+        self.data_reader.value_cache.set_ttl(ttl)
 
     async def single_read(self, event_emitter=None, interval_ms: int = 0) -> Dict[str, int]:
         """执行单次读取操作
@@ -286,20 +355,24 @@ class Device:
         Returns:
             Dict[str, int]: {'success': int, 'fail': int}
         """
-        success_total = 0
-        fail_total = 0
-
-        for slave_id in self.slave_id_list:
-            yc_list = self.yc_dict.get(slave_id, [])
-            yx_list = self.yx_dict.get(slave_id, [])
-
-            s_count, f_count = await self.getSlaveRegisterValuesAsync(
-                yc_list, yx_list, interval_ms=interval_ms
-            )
-            success_total += s_count
-            fail_total += f_count
+        if interval_ms > 0 or not isinstance(self.protocol_handler, ModbusClientHandler):
+            # 指定请求间隔或非 Modbus 客户端时逐个从机顺序读取
+            results = []
+            for slave_id in self.slave_id_list:
+                results.append(await self.getSlaveRegisterValuesAsync(
+                    self.yc_dict.get(slave_id, []), self.yx_dict.get(slave_id, []), interval_ms=interval_ms
+                ))
+        else:
+            # Modbus 客户端各从机并发读取，由连接和目标主机/串口的并发上限排队
+            results = await asyncio.gather(*(
+                self.getSlaveRegisterValuesAsync(self.yc_dict.get(slave_id, []), self.yx_dict.get(slave_id, []))
+                for slave_id in self.slave_id_list
+            ))
 
-        return {'success': success_total, 'fail': fail_total}
+        return {
+            'success': sum(s_count for s_count, _ in results),
+            'fail': sum(f_count for _, f_count in results),
+        }
 
     # ===== 测点操作（委托给 PointOperator） =====
 
@@ -315,10 +388,18 @@ class Device:
         """编辑测点值"""
         return self.point_operator.edit_value(point_code, real_value)
 
+    def edit_points_data(self, values: Dict[str, float]) -> int:
+        """批量编辑测点值 (IEC104 服务端按 IOA 索引一次写入)，返回成功的测点数"""
+        return self.point_operator.edit_values(values)
+
     async def edit_point_data_async(self, point_code: str, real_value: float) -> bool:
         """异步编辑测点值"""
         return await self.point_operator.edit_value_async(point_code, real_value)
 
+    async def write_points_async(self, values: Dict[str, float]) -> Dict[str, bool]:
+        """批量写入测点值 (Modbus 客户端合并连续地址为 FC15/FC16)，返回每个测点的结果"""
+        return await self.data_writer.write_values_async(values)
+
     def edit_point_metadata(self, point_code: str, metadata: dict) -> bool:
         """编辑测点元数据"""
         return self.point_operator.edit_metadata(point_code, metadata)
@@ -371,9 +452,67 @@ class Device:
         """动态编辑从机（修改从机地址）"""
         return self.slave_manager.edit_slave(old_slave_id, new_slave_id)
 
+    def set_strict_address_map(self, enabled: bool) -> bool:
+        """开启/关闭 Modbus 服务端严格地址表模式"""
+        self.strict_address_map = enabled
+        if hasattr(self.protocol_handler, "set_strict_address_map"):
+            return self.protocol_handler.set_strict_address_map(enabled)
+        return False
+
+    def set_connection_limits(self, **kwargs) -> Dict[str, Any]:
+        """设置 Modbus TCP 服务端连接限制 (max_connections/idle_timeout/max_requests_per_second/burst)"""
+        self.connection_limits.update({k: v for k, v in kwargs.items() if v is not None})
+        if hasattr(self.protocol_handler, "set_connection_limits"):
+            return self.protocol_handler.set_connection_limits(**kwargs)
+        return dict(self.connection_limits)
+
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """获取 Modbus TCP 服务端连接统计"""
+        if hasattr(self.protocol_handler, "get_connection_stats"):
+            return self.protocol_handler.get_connection_stats()
+        return {}
+
+    def get_serial_bus_info(self) -> Dict[str, Any]:
+        """获取 RTU 共享串口总线信息 (同串口的其他设备及从站地址分配)"""
+        if hasattr(self.protocol_handler, "get_serial_bus_info"):
+            return self.protocol_handler.get_serial_bus_info()
+        return {}
+
+    def get_slave_health(self) -> Dict[int, Dict[str, Any]]:
+        """获取客户端各从站的 RTT、自适应超时与熔断状态"""
+        if hasattr(self.protocol_handler, "get_slave_health"):
+            return self.protocol_handler.get_slave_health()
+        return {}
+
+    def get_serial_arbiter_stats(self) -> Dict[str, Any]:
+        """获取 RTU 客户端串口仲裁器统计 (排队、合并读取、事务数)"""
+        if hasattr(self.protocol_handler, "get_serial_arbiter_stats"):
+            return self.protocol_handler.get_serial_arbiter_stats()
+        return {}
+
+    def _on_point_layout_changed(self) -> None:
+        """测点表布局（从站/地址/功能码/解析码）变更后的统一处理"""
+        self._rebuild_address_map()
+        self.data_reader.invalidate_plans()
+        self.data_reader.value_cache.invalidate()
+
+    def _rebuild_address_map(self) -> None:
+        """测点表变更后重建 Modbus 服务端地址位图"""
+        if hasattr(self.protocol_handler, "rebuild_address_map"):
+            self.protocol_handler.rebuild_address_map(
+                self.point_manager.get_all_points()
+            )
+
     def _reinit_protocol_for_iec104(self) -> None:
-        """重新初始化 IEC104 协议处理器"""
-        if self.protocol_handler:
+        """按测点表同步 IEC104 协议处理器
+
+        处理器支持增量同步时只增删有差异的 IOA，保留已有点的值和已建立的连接；
+        否则重新创建处理器并添加全部测点。
+        """
+        if self.protocol_handler and hasattr(self.protocol_handler, "sync_points"):
+            result = self.protocol_handler.sync_points(self.point_manager.get_all_points())
+            self.log.info(f"IEC104 测点增量同步: {result}")
+        elif self.protocol_handler:
             self.protocol_handler = self._create_protocol_handler()
             self.protocol_handler.initialize(self._build_protocol_config())
             all_points = self.point_manager.get_all_points()
@@ -468,10 +607,6 @@ class Device:
         page_size: Optional[int] = 10,
         point_types: Optional[List[int]] = None,
     ) -> tuple[List[List[str]], int]:
-        # 对于 IEC104 客户端，在获取表格数据前同步 c104.Point 的值到内部点
-        if self.protocol_type == ProtocolType.Iec104Client and self.protocol_handler:
-            self._sync_iec104_client_values(slave_id)
-
         # Determine if we should mask errors (only for Client devices)
         mask_error = self.protocol_type in [
             ProtocolType.ModbusTcpClient,
@@ -483,10 +618,6 @@ class Device:
             slave_id, name, page_index, page_size, point_types, mask_error=mask_error
         )
 
-    def _sync_iec104_client_values(self, slave_id: int) -> None:
-        """同步 IEC104 客户端从服务端接收的值到内部测点"""
-        self.data_reader.sync_iec104_client_values(slave_id)
-
     # ===== 报文捕获（委托给 MessageFormatter） =====
 
     def get_messages(self, limit: Optional[int] = None) -> List[dict]:
@@ -501,6 +632,12 @@ class Device:
         """获取平均收发时间"""
         return self.message_formatter.get_avg_time()
 
+    def get_processing_times(self) -> dict:
+        """获取服务端请求处理耗时统计 (p50/p95/p99，按功能码/从站)"""
+        if hasattr(self.protocol_handler, "get_processing_times"):
+            return self.protocol_handler.get_processing_times()
+        return {}
+
     # ===== 日志 =====
 
     @property
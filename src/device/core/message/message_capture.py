@@ -11,13 +11,11 @@ class MessageRecord:
         self.data = data
         self.timestamp = time.time()
         self.sequence_id = sequence_id
-        self.hex_string = self._bytes_to_spaced_hex(data)
 
-    def _bytes_to_spaced_hex(self, data: bytes) -> str:
-        """将字节转换为带空格的16进制字符串"""
-        if not data:
-            return ""
-        return " ".join([f"{b:02x}" for b in data])
+    @property
+    def hex_string(self) -> str:
+        """带空格的16进制字符串 (查询时才格式化，不占用收发路径)"""
+        return bytes(self.data).hex(" ")
 
     @property
     def formatted_time(self) -> str:
@@ -30,7 +28,7 @@ class MessageRecord:
         return {
             "sequence_id": self.sequence_id,
             "direction": self.direction,
-            "data": self.data.hex(),
+            "data": bytes(self.data).hex(),
             "hex_string": self.hex_string,
             "timestamp": self.timestamp,
             "time": self.formatted_time,
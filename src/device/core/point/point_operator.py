@@ -8,8 +8,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Dict, List, Optional, Union
 
 from src.enums.point_data import SimulateMethod, Yc, Yx, Yt, Yk, BasePoint
-from src.enums.modbus_def import ProtocolType
 from src.data.service.point_service import PointService
+from src.device.protocol.base_handler import ClientHandler
 
 if TYPE_CHECKING:
     from src.device.core.device import Device
@@ -39,6 +39,11 @@ class PointOperator:
         """获取日志器"""
         return self._device.log
 
+    @property
+    def _value_cache(self):
+        """获取测点值缓存"""
+        return self._device.data_reader.value_cache
+
     # ===== 测点值读写 =====
 
     def edit_value(self, point_code: str, real_value: float) -> bool:
@@ -50,11 +55,27 @@ class PointOperator:
 
         if not point.set_real_value(real_value):
             return False
+        self._value_cache.invalidate(point_code)
 
         if self._handler:
             return self._handler.write_value(point, point.value)
         return True
 
+    def edit_values(self, values: Dict[str, float]) -> int:
+        """批量编辑测点值，处理器支持批量写入时一次写入，返回成功的测点数"""
+        items = []
+        for point_code, real_value in values.items():
+            point = self._pm.get_point_by_code(point_code)
+            if point and point.set_real_value(real_value):
+                self._value_cache.invalidate(point_code)
+                items.append((point, point.value))
+
+        if not self._handler:
+            return len(items)
+        if hasattr(self._handler, "write_values"):
+            return self._handler.write_values(items)
+        return sum(1 for point, value in items if self._handler.write_value(point, value))
+
     async def edit_value_async(self, point_code: str, real_value: float) -> bool:
         """异步编辑测点值"""
         point = self._pm.get_point_by_code(point_code)
@@ -64,6 +85,7 @@ class PointOperator:
 
         if not point.set_real_value(real_value):
             return False
+        self._value_cache.invalidate(point_code)
 
         if self._handler:
             if hasattr(self._handler, 'write_value_async'):
@@ -121,7 +143,13 @@ class PointOperator:
             return None
 
         try:
-            value = await self._handler.read_value_async(point)
+            if isinstance(self._handler, ClientHandler):
+                # 客户端：新鲜度窗口内复用轮询结果，并发的相同读取只访问一次设备
+                value = await self._value_cache.read_through(
+                    point.code, lambda: self._handler.read_value_async(point)
+                )
+            else:
+                value = await self._handler.read_value_async(point)
             if value is not None:
                 point.value = value
                 point.is_valid = True
@@ -144,6 +172,7 @@ class PointOperator:
 
         # 记录是否需要重新同步值到协议处理器
         need_resync = False
+        layout_changed = False  # 从站/地址/功能码/解析码变更，影响地址位图与读取规划
         current_real_value = getattr(point, 'real_value', None)
 
         # 1. 更新内存配置
@@ -151,18 +180,22 @@ class PointOperator:
             point.name = metadata["name"]
         if "rtu_addr" in metadata and str(metadata["rtu_addr"]) != "":
             point.rtu_addr = int(metadata["rtu_addr"])
+            layout_changed = True
         if "reg_addr" in metadata and metadata["reg_addr"]:
             addr_str = metadata["reg_addr"]
             point.address = int(addr_str, 16) if addr_str.startswith("0x") else int(addr_str)
             need_resync = True  # 地址变更需要重新同步
+            layout_changed = True
         if "func_code" in metadata and str(metadata["func_code"]) != "":
             point.func_code = int(metadata["func_code"])
             need_resync = True  # 功能码变更需要重新同步
+            layout_changed = True
         if "decode_code" in metadata and metadata["decode_code"]:
             old_decode = point.decode
             point.decode = metadata["decode_code"]
             if old_decode != metadata["decode_code"]:
                 need_resync = True  # 解析码变更需要重新同步
+                layout_changed = True
 
         if isinstance(point, (Yc, Yt)):
             if "mul_coe" in metadata and str(metadata["mul_coe"]) != "":
@@ -183,6 +216,10 @@ class PointOperator:
             self._pm.code_map[new_code] = self._pm.code_map.pop(point_code)
             point.code = new_code
 
+        # 地址相关配置变更后重建 Modbus 服务端地址位图并使读取规划失效
+        if layout_changed:
+            self._device._on_point_layout_changed()
+
         # 3. 如果配置发生变更，重新将当前值写入协议处理器
         if need_resync and current_real_value is not None and self._handler:
             try:
@@ -271,15 +308,12 @@ class PointOperator:
             )
             self._device.simulation_controller.set_point_status(point, True)
 
-            # 5. 添加到协议处理器
+            # 5. 添加到协议处理器 (IEC104 在运行中的站上增量添加)
             if self._handler:
-                # IEC104 协议需要重新初始化
-                if protocol_type in [
-                    ProtocolType.Iec104Server, ProtocolType.Iec104Client
-                ]:
-                    self._device._reinit_protocol_for_iec104()
-                else:
-                    self._handler.add_points([point])
+                self._handler.add_points([point])
+
+            # 6. 使批量读取规划失效
+            self._device.data_reader.invalidate_plans()
 
             self._log.info(f"动态添加测点成功: {point_data.get('code')}")
             return True
@@ -346,14 +380,12 @@ class PointOperator:
 
                 memory_points.append(point)
 
-            # 5. 添加到协议处理器
+            # 5. 添加到协议处理器 (IEC104 在运行中的站上增量添加)
             if self._handler:
-                if protocol_type in [
-                    ProtocolType.Iec104Server, ProtocolType.Iec104Client
-                ]:
-                    self._device._reinit_protocol_for_iec104()
-                else:
-                    self._handler.add_points(memory_points)
+                self._handler.add_points(memory_points)
+
+            # 6. 使批量读取规划失效
+            self._device.data_reader.invalidate_plans()
 
             self._log.info(f"动态批量添加 {len(memory_points)} 个测点成功")
             return True
@@ -404,11 +436,12 @@ class PointOperator:
                 if point_code in self._pm.code_map:
                     del self._pm.code_map[point_code]
 
-            # 3. IEC104 协议需要重新初始化（如果需要）
-            if self._device.protocol_type in [
-                ProtocolType.Iec104Server, ProtocolType.Iec104Client
-            ]:
-                self._device._reinit_protocol_for_iec104()
+                # 重建 Modbus 服务端地址位图并使读取规划失效
+                self._device._on_point_layout_changed()
+
+                # 3. IEC104 从运行中的站上移除该点
+                if self._handler and hasattr(self._handler, "remove_points"):
+                    self._handler.remove_points([point])
 
             self._log.info(f"动态删除测点成功: {point_code}")
             return True
@@ -106,6 +106,8 @@ class SlaveManager:
             if server and hasattr(server, "remove_slave"):
                 server.remove_slave(slave_id)
 
+            self._device._on_point_layout_changed()
+
             # 5. 如果是 IEC104，需要重新初始化
             if self._device.protocol_type in [
                 ProtocolType.Iec104Server, ProtocolType.Iec104Client
@@ -190,6 +192,7 @@ class SlaveManager:
             if server and hasattr(server, "add_slave") and hasattr(server, "remove_slave"):
                 server.add_slave(new_slave_id)
                 server.remove_slave(old_slave_id)
+            self._device._on_point_layout_changed()
 
             # 7. 协议重置 (IEC104)
             if self._device.protocol_type in [
@@ -242,6 +245,8 @@ class SlaveManager:
                 if slave_id in d:
                     d[slave_id] = []
 
+            self._device._on_point_layout_changed()
+
             # IEC104 协议需要重新初始化
             if self._device.protocol_type in [
                 ProtocolType.Iec104Server, ProtocolType.Iec104Client
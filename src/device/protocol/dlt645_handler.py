@@ -3,13 +3,16 @@ DLT645 协议处理器
 支持 DLT645 电力表计协议服务端和客户端
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from src.device.protocol.base_handler import ServerHandler, ClientHandler
 from src.enums.point_data import Yc
 from src.config.config import Config
 from src.enums.points.base_point import BasePoint
 
+# 客户端支持读取的 DI 数据类别：电能、最大需量、变量、事件记录、参变量
+_READ_CATEGORIES = (0x00, 0x01, 0x02, 0x03, 0x04)
+
 
 class DLT645ServerHandler(ServerHandler):
     """DLT645 服务端处理器
@@ -23,6 +26,11 @@ class DLT645ServerHandler(ServerHandler):
         self._log = log
         self._meter_address: str = "000000000000"
         self._is_serial: bool = False  # 是否为串口模式
+        # DI -> 写入函数，add_points 时按数据类别一次性解析
+        self._setters: Dict[int, Optional[Callable[[int, Any], bool]]] = {}
+        self._bus = None  # 挂载的共享端口总线
+        self._bus_key: str = ""
+        self._create_transport: Optional[Callable[[], Any]] = None
 
     def initialize(self, config: Dict[str, Any]) -> None:
         """初始化 DLT645 服务器
@@ -41,10 +49,15 @@ class DLT645ServerHandler(ServerHandler):
                 通用:
                     - meter_address: 电表地址（12位BCD码）
                     - timeout: 超时时间（默认 30）
+
+        同一 TCP 端口或串口上的多个 DLT645 服务端设备共用一条总线，按电表地址分发请求。
         """
-        from dlt645.service.serversvc.server_service import MeterServerService
+        from dlt645.transport.server.rtu_server import RtuServer
+        from dlt645.transport.server.tcp_server import TcpServer
+        from src.proto.dlt645.meter_server import CachedMeterServerService
 
         self._config = config
+        self._setters = {}
         timeout = config.get("timeout", 30)
         self._meter_address = config.get("meter_address", "000000000000")
         
@@ -59,13 +72,9 @@ class DLT645ServerHandler(ServerHandler):
             stopbits = config.get("stopbits", 1)
             parity = config.get("parity", "E")
             
-            self._server = MeterServerService.new_rtu_server(
-                port=serial_port,
-                data_bits=databits,
-                stop_bits=stopbits,
-                baud_rate=baudrate,
-                parity=parity,
-                timeout=timeout
+            self._bus_key = serial_port
+            self._create_transport = lambda: RtuServer(
+                serial_port, databits, stopbits, baudrate, parity, timeout
             )
         else:
             # TCP 模式
@@ -73,22 +82,36 @@ class DLT645ServerHandler(ServerHandler):
             ip = config.get("ip", "0.0.0.0")
             port = config.get("port", 8899)
             
-            self._server = MeterServerService.new_tcp_server(
-                ip=ip, port=port, timeout=timeout
-            )
+            self._bus_key = f"tcp://{ip}:{port}"
+            self._create_transport = lambda: TcpServer(ip, port, timeout, None)
         
+        self._server = CachedMeterServerService(None)
         # 确保地址是12位BCD码字符串
         addr_str = str(self._meter_address).zfill(12)
         self._server.set_address(addr_str)
-        
-        # 启用报文捕获
+        self._acquire_bus()
+
+    def _acquire_bus(self) -> None:
+        """获取端口对应的总线 (不存在时创建)，电表服务使用总线的传输层收发"""
+        from src.proto.dlt645.meter_bus import acquire_bus
+
+        self._bus = acquire_bus(self._bus_key, self._create_transport, self._log)
+        self._server.server = self._bus.transport
+        # 启用报文捕获 (同一总线上的设备共用)
         self._server.enable_message_capture(queue_size=200)
 
     async def start(self) -> bool:
         """启动 DLT645 服务器"""
         try:
-            if self._server and hasattr(self._server, "server"):
-                self._server.server.start()
+            if self._server:
+                from src.proto.dlt645.meter_bus import get_bus
+
+                # 停止时总线可能已随最后一块电表关闭，重新获取
+                if get_bus(self._bus_key) is not self._bus:
+                    self._acquire_bus()
+                if not self._bus.attach(self._server, self._config.get("name", "")):
+                    return False
+                self._bus.start()
                 self._is_running = True
                 if self._log:
                     self._log.info(
@@ -102,10 +125,12 @@ class DLT645ServerHandler(ServerHandler):
             return False
 
     async def stop(self) -> bool:
-        """停止 DLT645 服务器"""
+        """停止 DLT645 服务器 (总线上没有其他电表时关闭端口)"""
+        from src.proto.dlt645.meter_bus import release_bus
+
         try:
-            if self._server and hasattr(self._server, "server"):
-                self._server.server.stop()
+            if self._server and self._bus:
+                release_bus(self._bus, self._server)
                 self._is_running = False
                 return True
             return False
@@ -118,45 +143,51 @@ class DLT645ServerHandler(ServerHandler):
         """读取测点值"""
         if self._server:
             # DLT645 使用数据标识读取，服务端直接返回原始值
-            return self._server.get_data(point.address)
+            return self._server.get_value(point.address)
         return 0
 
+    def _setter(self, di: int) -> Optional[Callable[[int, Any], bool]]:
+        """取 DI 的写入函数，未经 add_points 登记的 DI 首次写入时解析并记下"""
+        try:
+            return self._setters[di]
+        except KeyError:
+            setter = self._setters[di] = self._server.resolve_setter(di)
+            return setter
+
+    def _set(self, di: int, value: Any) -> bool:
+        """按分发表写入数据项 (写入后该 DI 的缓存应答自动失效)"""
+        setter = self._setter(di)
+        if setter is None:
+            if self._log:
+                self._log.warning(f"DLT645 服务端暂不支持 DI 前缀 {(di >> 24) & 0xFF:02x} (addr: {di:08x})")
+            return False
+        try:
+            # 服务端模式：直接写入原始映射的值
+            return bool(setter(di, value))
+        except Exception as e:
+            if self._log:
+                self._log.error(f"DLT645 写入数据失败: {e}")
+            return False
+
     def write_value(self, point: BasePoint, value: Any) -> bool:
         """写入测点值"""
         if self._server:
-            # 根据数据标识前缀调用相应的 set_XX 方法
-            # address 是 int，转为 hex 字符串查看前缀
-            hex_addr = hex(point.address)[2:].zfill(8)
-            prefix = hex_addr[:2]
-            
-            try:
-                method_name = f"set_{prefix}"
-                if hasattr(self._server, method_name):
-                    method = getattr(self._server, method_name)
-                    # 服务端模式：直接写入原始映射的值
-                    method(point.address, value)
-                    return True
-                else:
-                    # 如果没有对应的前缀方法，尝试通用设置（如果库支持）
-                    if self._log:
-                        self._log.warning(f"DLT645 服务端暂不支持 DI 前缀 {prefix} (addr: {hex_addr})")
-                    return False
-            except Exception as e:
-                if self._log:
-                    self._log.error(f"DLT645 写入数据失败: {e}")
-                return False
+            return self._set(point.address, value)
         return False
 
     def add_points(self, points: List[BasePoint]) -> None:
-        """添加测点（DLT645 按数据标识访问，无需预先添加）"""
-        pass
+        """添加测点：按数据标识 (DI) 预先解析写入函数，之后写值只需查表"""
+        if not self._server:
+            return
+        for point in points:
+            self._setter(point.address)
 
     def get_value_by_address(
         self, func_code: int, slave_id: int, address: int
     ) -> Any:
         """根据地址获取值"""
         if self._server:
-            return self._server.get_data(address)
+            return self._server.get_value(address)
         return 0
 
     def set_value_by_address(
@@ -164,32 +195,37 @@ class DLT645ServerHandler(ServerHandler):
     ) -> None:
         """根据地址设置值"""
         if self._server:
-            # address 是 int，转为 hex 字符串查看前缀以分发方法
-            hex_addr = hex(address)[2:].zfill(8)
-            prefix = hex_addr[:2]
-            
-            try:
-                method_name = f"set_{prefix}"
-                if hasattr(self._server, method_name):
-                    method = getattr(self._server, method_name)
-                    method(address, value)
-                elif self._log:
-                    self._log.warning(f"DLT645 set_value_by_address 暂不支持 DI 前缀 {prefix} (addr: {hex_addr})")
-            except Exception as e:
-                if self._log:
-                    self._log.error(f"DLT645 set_value_by_address 失败: {e}")
+            self._set(address, value)
 
     def set_meter_address(self, address: str) -> None:
         """设置电表地址"""
         self._meter_address = address
         if self._server:
             self._server.set_address(address)
+            if self._bus and self._is_running:
+                self._bus.attach(self._server)
 
     def clear_meter_data(self) -> None:
         """清除电表数据"""
         if self._server and hasattr(self._server, "clear_meter_data"):
             self._server.clear_meter_data()
 
+    def get_bus_info(self) -> Dict[str, Any]:
+        """获取共享端口总线信息 (端口、挂载的电表地址与设备名)"""
+        if not self._bus:
+            return {}
+        return {
+            "port": self._bus.key,
+            "meters": self._bus.meter_map(),
+            "running": self._bus.is_running,
+        }
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """获取读数据应答缓存的命中/未命中次数"""
+        if self._server:
+            return dict(self._server.cache_stats)
+        return {}
+
     @property
     def server(self):
         """获取底层服务器对象"""
@@ -250,6 +286,10 @@ class DLT645ClientHandler(ClientHandler):
         self._log = log
         self._meter_address: str = "000000000000"
         self._is_serial: bool = False  # 是否为串口模式
+        self._channel = None  # 共用的串口/网关通道
+        self._channel_args: tuple = ()
+        # DI 数据类别 -> read_XX 读取方法
+        self._readers: Dict[int, Callable[[int], Any]] = {}
 
     def initialize(self, config: Dict[str, Any]) -> None:
         """初始化 DLT645 客户端
@@ -268,8 +308,14 @@ class DLT645ClientHandler(ClientHandler):
                 通用:
                     - meter_address: 电表地址（12位BCD码）
                     - timeout: 超时时间（默认 30）
+                    - frame_gap: 相邻两帧的最小间隔秒数（串口默认 0.02，TCP 默认 0）
+
+        同一串口或 TCP 网关上的多个 DLT645 客户端设备共用一个通道，第一个设备的传输参数生效。
         """
-        from dlt645.service.clientsvc.client_service import MeterClientService
+        from dlt645.transport.client.rtu_client import RtuClient
+        from dlt645.transport.client.tcp_client import TcpClient
+        from src.proto.dlt645.meter_channel import DEFAULT_SERIAL_GAP, acquire_channel
+        from src.proto.dlt645.meter_client import IsolatedMeterClientService
 
         self._config = config
         timeout = config.get("timeout", 3)  # 默认3秒超时，避免长时间阻塞
@@ -286,13 +332,15 @@ class DLT645ClientHandler(ClientHandler):
             stopbits = config.get("stopbits", 1)
             parity = config.get("parity", "E")
             
-            self._client = MeterClientService.new_rtu_client(
+            channel_key = serial_port
+            gap = config.get("frame_gap", DEFAULT_SERIAL_GAP)
+            create_transport = lambda: RtuClient(
                 port=serial_port,
-                baudrate=baudrate,
-                databits=databits,
-                stopbits=stopbits,
+                baud_rate=baudrate,
+                data_bits=databits,
+                stop_bits=stopbits,
                 parity=parity,
-                timeout=timeout
+                timeout=timeout,
             )
         else:
             # TCP 模式
@@ -300,16 +348,23 @@ class DLT645ClientHandler(ClientHandler):
             ip = config.get("ip", "127.0.0.1")
             port = config.get("port", Config.DLT645_DEFAULT_PORT)
             
-            self._client = MeterClientService.new_tcp_client(
-                ip=ip, port=port, timeout=timeout
-            )
+            channel_key = f"tcp://{ip}:{port}"
+            gap = config.get("frame_gap", 0.0)
+            create_transport = lambda: TcpClient(ip=ip, port=port, timeout=timeout)
+
+        # 同一串口/网关上的多块电表共用一个通道，请求逐帧串行并保留帧间隔
+        self._channel_args = (channel_key, create_transport, gap)
+        self._channel = acquire_channel(*self._channel_args)
+        self._transport_client = self._channel.transport
+        self._client = IsolatedMeterClientService(self._transport_client)
         
         if self._client:
             # 设置电表地址（12位BCD码字符串）
             addr_str = str(self._meter_address).zfill(12)
             self._client.set_address(addr_str)
-            # 保存底层传输客户端引用
-            self._transport_client = self._client.client
+            self._readers = {
+                category: getattr(self._client, f"read_{category:02x}") for category in _READ_CATEGORIES
+            }
             
             # 启用报文捕获
             if hasattr(self._client, "enable_message_capture"):
@@ -333,10 +388,16 @@ class DLT645ClientHandler(ClientHandler):
         return True
 
     def connect(self) -> bool:
-        """连接到 DLT645 电表"""
+        """连接到 DLT645 电表 (通道已由同一串口/网关上的其他电表打开时直接复用)"""
+        from src.proto.dlt645.meter_channel import acquire_channel, get_channel
+
         try:
-            if self._transport_client:
-                result = self._transport_client.connect()
+            if self._channel and not self._is_running:
+                # 断开时通道可能已随最后一块电表释放，重新获取
+                if get_channel(self._channel.key) is not self._channel:
+                    self._channel = acquire_channel(*self._channel_args)
+                    self._transport_client = self._client.client = self._channel.transport
+                result = self._channel.connect()
                 if result:
                     self._is_running = True
                     mode = "串口" if self._is_serial else "TCP"
@@ -344,74 +405,94 @@ class DLT645ClientHandler(ClientHandler):
                         self._log.info(
                             f"DLT645 客户端({mode})连接成功, 电表地址: {self._meter_address}"
                         )
+                else:
+                    self._channel.disconnect()
                 return result
-            return False
+            return self._is_running
         except Exception as e:
             if self._log:
                 self._log.error(f"连接 DLT645 电表失败: {e}")
             return False
 
     def disconnect(self) -> None:
-        """断开连接"""
-        if self._transport_client:
+        """断开连接 (通道上没有其他电表时才关闭串口/网关连接)"""
+        from src.proto.dlt645.meter_channel import release_channel
+
+        if self._channel and self._is_running:
             try:
-                self._transport_client.disconnect()
+                self._channel.disconnect()
             except Exception:
                 pass
+            release_channel(self._channel)
             self._is_running = False
 
+    def _read_real(self, di: int) -> Any:
+        """
+        经通道向电表读取一个 DI 的物理值
+        :return: 不支持的数据类别或读取失败返回 None
+        """
+        reader = self._readers.get((di >> 24) & 0xFF)
+        if reader is None:
+            if self._log:
+                self._log.warning(f"DLT645 客户端暂不支持 DI 前缀 {(di >> 24) & 0xFF:02x} (addr: {di:08x})")
+            return None
+        # 返回的是数据项副本，解析时对全局数据项的修改已恢复
+        return self._channel.transact(lambda: getattr(reader(di), "value", None))
+
+    @staticmethod
+    def _to_raw(point: BasePoint, real_val: Any) -> Any:
+        """遥测点根据系数把物理值反向换算回原始值，换算失败返回 None"""
+        if real_val is None or not isinstance(point, Yc):
+            return real_val
+        try:
+            return int((float(real_val) - point.add_coe) / point.mul_coe)
+        except (ZeroDivisionError, TypeError, ValueError):
+            return None
+
     def read_value(self, point: BasePoint) -> Any:
         """读取测点值
         
         从远程电表读取数据标识对应的值。
         根据 DI 前缀调用相应的 read_XX 方法。
+        未连接或读取失败返回 None (测点置为无效)，与 read_points_batch 一致。
         """
-        if not self._client:
-            return 0
+        if not self._client or not self._is_running:
+            return None
             
         try:
-            # DLT645 使用数据标识 (DI) 读取
-            di = point.address
-            hex_addr = hex(di)[2:].zfill(8)
-            prefix = hex_addr[:2]  # DI 前缀决定读取方法
-            
-            # 根据 DI 前缀选择读取方法
-            data_item = None
-            if prefix == "00":
-                data_item = self._client.read_00(di)  # 读取电能
-            elif prefix == "01":
-                data_item = self._client.read_01(di)  # 读取最大需量
-            elif prefix == "02":
-                data_item = self._client.read_02(di)  # 读取变量
-            elif prefix == "03":
-                data_item = self._client.read_03(di)  # 读取事件记录
-            elif prefix == "04":
-                data_item = self._client.read_04(di)  # 读取参变量
-            else:
-                if self._log:
-                    self._log.warning(f"DLT645 客户端暂不支持 DI 前缀 {prefix} (addr: {hex_addr})")
-                return 0
-            
-            if data_item is None:
-                return 0
-            
-            # 从 DataItem 获取值
-            real_val = data_item.value if hasattr(data_item, 'value') else 0
-            if real_val is None:
-                return 0
-            
-            # 如果是遥测点，需要根据系数反向换算回原始值
-            if isinstance(point, Yc):
-                try:
-                    return int((float(real_val) - point.add_coe) / point.mul_coe)
-                except (ZeroDivisionError, TypeError, ValueError):
-                    return 0
-            return real_val
-            
+            return self._to_raw(point, self._read_real(point.address))
         except Exception as e:
             if self._log:
                 self._log.error(f"DLT645 读取数据失败: {e}")
-            return 0
+            return None
+
+    def read_points_batch(self, points: List[BasePoint]) -> Dict[str, Any]:
+        """批量读取本表测点 (阻塞，供线程池调用)
+
+        DLT645 一帧只能读一个 DI：同一 DI 的多个测点只读一次，按 DI 排序后在通道内连续发出，
+        本表的一批请求之间不会插入同一总线上其他电表的请求。
+
+        Returns:
+            测点编码 -> 原始值，未连接或读取失败的测点为 None
+        """
+        if not self._client or not self._is_running:
+            return {point.code: None for point in points}
+        real_values: Dict[int, Any] = {}
+        with self._channel.lock:
+            for di in sorted({point.address for point in points}):
+                try:
+                    real_values[di] = self._read_real(di)
+                except Exception as e:
+                    real_values[di] = None
+                    if self._log:
+                        self._log.error(f"DLT645 读取数据失败 (DI {di:08x}): {e}")
+        return {point.code: self._to_raw(point, real_values[point.address]) for point in points}
+
+    def poll_class_of(self, point: BasePoint) -> str:
+        """按 DI 数据类别划分轮询类别：变量 (电压、电流、功率等瞬时量) 快速，电能、需量、事件、参变量慢速"""
+        from src.device.core.data.poll_scheduler import POLL_FAST, POLL_SLOW
+
+        return POLL_FAST if (point.address >> 24) & 0xFF == 0x02 else POLL_SLOW
 
     def write_value(self, point: BasePoint, value: Any) -> bool:
         """写入测点值（发送命令）
@@ -435,7 +516,7 @@ class DLT645ClientHandler(ClientHandler):
                     real_to_send = value * point.mul_coe + point.add_coe
                 
                 # 写参变量需要密码，这里使用默认空密码
-                result = self._client.write_04(di, str(real_to_send), "00000000")
+                result = self._channel.transact(self._client.write_04, di, str(real_to_send), "00000000")
                 return result is not None
             else:
                 if self._log:
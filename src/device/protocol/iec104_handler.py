@@ -3,7 +3,10 @@ IEC104 协议处理器
 支持 IEC104 服务端和客户端
 """
 
-from typing import Any, Dict, List, Optional
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 import c104
 
 from src.device.protocol.base_handler import ServerHandler, ClientHandler
@@ -11,6 +14,42 @@ from src.enums.points.base_point import BasePoint
 from src.enums.point_data import Yc, Yx, Yt, Yk
 from src.config.config import Config
 
+# 帧类型 (0=遥测, 1=遥信, 2=遥控, 3=遥调) 对应的 c104 点类型
+_POINT_TYPES = {
+    0: c104.Type.M_ME_NC_1,
+    1: c104.Type.M_SP_NA_1,
+    2: c104.Type.C_SC_NA_1,
+    3: c104.Type.C_SE_NC_1,
+}
+
+# 监控点分组 (帧类型 -> 配置键)
+_REPORT_GROUPS = {0: "yc", 1: "yx"}
+# 默认上送策略：变化突发上送，周期背景扫描每分钟一次
+_DEFAULT_REPORTING = {
+    "spontaneous": True,
+    "cyclic_ms": {"yc": 60000, "yx": 60000},
+    "deadband": {"yc": 0.0, "yx": 0.0},
+    "min_interval": 0.0,
+    "max_asdus_in_flight": 64,
+}
+# 客户端默认召唤计划 (秒，0 关闭)：每 15 分钟总召唤，电度量召唤关闭；
+# jitter 为每次间隔的随机浮动比例，首次召唤落在整个周期内的随机位置，避免大量客户端同时召唤
+_DEFAULT_INTERROGATION = {
+    "gi_interval": 900.0,
+    "ci_interval": 0.0,
+    "jitter": 0.1,
+}
+
+
+def _raw_value(point: BasePoint, real_val: Any) -> Any:
+    """把收到的物理值换算回测点原始值：遥测按系数反向换算并取整，失败返回 None，其余类型原样返回"""
+    if not isinstance(point, Yc):
+        return real_val
+    try:
+        return round((float(real_val) - point.add_coe) / point.mul_coe)
+    except (ZeroDivisionError, TypeError, ValueError, OverflowError):
+        return None
+
 
 class IEC104ServerHandler(ServerHandler):
     """IEC104 服务端处理器"""
@@ -27,7 +66,14 @@ class IEC104ServerHandler(ServerHandler):
             config: 配置字典，包含:
                 - ip: 监听 IP（默认 0.0.0.0）
                 - port: 监听端口（默认 2404）
-                - common_address: 站地址（默认 1）
+                - common_address: 默认站地址（默认 1），配置了公共地址 (iec_common_address) 的测点
+                  映射到同一监听端口上的对应站，其余测点归入默认站
+                - iec104_reporting: 上送策略，可包含
+                    spontaneous (变化突发上送开关)、
+                    cyclic_ms ({"yc": 毫秒, "yx": 毫秒}，0 关闭周期上报)、
+                    deadband ({"yc": 工程值死区})、
+                    min_interval (同一点最小突发上送间隔，秒)、
+                    max_asdus_in_flight (尚未发出的突发上送 ASDU 上限)
         """
         from src.proto.iec104.iec104server import IEC104Server
 
@@ -35,8 +81,36 @@ class IEC104ServerHandler(ServerHandler):
         ip = config.get("ip", Config.DEFAULT_IP)
         port = config.get("port", Config.IEC104_DEFAULT_PORT)
         common_address = config.get("common_address", 1)
+        self._reporting = {**_DEFAULT_REPORTING, **(config.get("iec104_reporting") or {})}
+
+        self._server:IEC104Server = IEC104Server(
+            ip=ip,
+            port=port,
+            common_address=common_address,
+            spontaneous=self._reporting["spontaneous"],
+            max_asdus_in_flight=int(self._reporting["max_asdus_in_flight"]),
+        )
 
-        self._server:IEC104Server = IEC104Server(ip=ip, port=port, common_address=common_address)
+    def _report_options(self, point: BasePoint) -> Dict[str, Any]:
+        """计算监控点的周期上报间隔与死区 (测点自带 deadband 属性时优先)"""
+        group = _REPORT_GROUPS[point.frame_type]
+        deadband = getattr(point, "deadband", None)
+        if deadband is None:
+            deadband = (self._reporting.get("deadband") or {}).get(group, 0.0)
+        # 服务端存的是原始值，工程值死区按系数换算
+        mul_coe = getattr(point, "mul_coe", 1.0) or 1.0
+        return {
+            "report_ms": int((self._reporting.get("cyclic_ms") or {}).get(group, 0)),
+            "deadband": abs(deadband / mul_coe),
+            "min_interval": float(self._reporting.get("min_interval", 0.0)),
+        }
+
+    def _common_address(self, point: BasePoint) -> int:
+        """测点所属站的公共地址：取测点配置的公共地址，未配置或超出 1~65534 时归入默认站"""
+        common_address = getattr(point, "common_address", None)
+        if common_address and 0 < common_address < 65535:
+            return common_address
+        return self._server.common_address
 
     async def start(self) -> bool:
         """启动 IEC104 服务器"""
@@ -68,7 +142,9 @@ class IEC104ServerHandler(ServerHandler):
         """读取测点值"""
         if self._server:
             return self._server.get_point_value(
-                io_address=point.address, frame_type=point.frame_type
+                io_address=point.address,
+                frame_type=point.frame_type,
+                common_address=self._common_address(point),
             )
         return 0
 
@@ -79,54 +155,102 @@ class IEC104ServerHandler(ServerHandler):
                 io_address=point.address,
                 value=value,
                 frame_type=point.frame_type,
+                common_address=self._common_address(point),
             )
             return True
         return False
 
+    def write_values(self, items: List[Tuple[BasePoint, Any]]) -> int:
+        """批量写入测点值，返回实际更新的点数"""
+        if self._server:
+            return self._server.set_point_values(
+                ((self._common_address(point), point.address), value) for point, value in items
+            )
+        return 0
+
     def add_points(self, points: List[BasePoint]) -> None:
-        """添加测点到 IEC104 服务器"""
+        """添加测点到 IEC104 服务器 (按公共地址分站，已登记的点跳过，可在运行中增量添加)"""
         if not self._server:
             return
 
         for point in points:
             frame_type = point.frame_type
-            if frame_type == 0:  # 遥测
-                self._server.add_monitoring_point(
-                    io_address=point.address,
-                    point_type=c104.Type.M_ME_NC_1,
-                    report_ms=1000,  # 自动上报间隔 1 秒
-                )
-            elif frame_type == 1:  # 遥信
+            point_type = _POINT_TYPES.get(frame_type)
+            common_address = self._common_address(point)
+            if point_type is None or self._server.point_frame_type(point.address, common_address) is not None:
+                continue
+            if frame_type in (0, 1):  # 遥测/遥信
                 self._server.add_monitoring_point(
                     io_address=point.address,
-                    point_type=c104.Type.M_SP_NA_1,
-                    report_ms=1000,  # 自动上报间隔 1 秒
-                )
-            elif frame_type == 2:  # 遥控
-                self._server.add_command_point(
-                    io_address=point.address,
-                    point_type=c104.Type.C_SC_NA_1,
+                    point_type=point_type,
+                    frame_type=frame_type,
+                    common_address=common_address,
+                    **self._report_options(point),
                 )
-            elif frame_type == 3:  # 遥调
+            else:  # 遥控/遥调
                 self._server.add_command_point(
                     io_address=point.address,
-                    point_type=c104.Type.C_SE_NC_1,
+                    point_type=point_type,
+                    frame_type=frame_type,
+                    common_address=common_address,
                 )
 
+    def remove_points(self, points: List[BasePoint]) -> int:
+        """从运行中的站移除测点，返回移除的点数"""
+        if not self._server:
+            return 0
+        return sum(1 for point in points if self._server.remove_point(point.address, self._common_address(point)))
+
+    def get_report_stats(self) -> Dict[str, int]:
+        """获取突发上送统计 (上送次数/死区抑制次数/间隔推迟次数)"""
+        if self._server:
+            return dict(self._server.report_stats)
+        return {}
+
+    def sync_points(self, points: List[BasePoint]) -> Dict[str, int]:
+        """按测点表增量同步各站的点：只增删有差异的 (公共地址, IOA)，保留未变化的点及其当前值
+
+        Returns:
+            {"added": 新增点数, "removed": 移除点数, "kept": 保留点数}
+        """
+        if not self._server:
+            return {"added": 0, "removed": 0, "kept": 0}
+
+        desired = {
+            (self._common_address(point), point.address): point for point in points if point.frame_type in _POINT_TYPES
+        }
+        stale = [
+            key
+            for key, (_, frame_type) in self._server.point_index.items()
+            if key not in desired or desired[key].frame_type != frame_type
+        ]
+        for common_address, io_address in stale:
+            self._server.remove_point(io_address, common_address)
+
+        new_points = [
+            point for (common_address, io_address), point in desired.items()
+            if self._server.point_frame_type(io_address, common_address) is None
+        ]
+        self.add_points(new_points)
+        self._server.set_point_values(
+            ((self._common_address(point), point.address), point.value) for point in new_points
+        )
+        return {"added": len(new_points), "removed": len(stale), "kept": len(desired) - len(new_points)}
+
     def get_value_by_address(
         self, func_code: int, slave_id: int, address: int
     ) -> Any:
-        """根据地址获取值"""
+        """根据地址获取值 (slave_id 即站的公共地址)"""
         if self._server:
-            return self._server.get_point_value(io_address=address, frame_type=0)
+            return self._server.get_point_value(io_address=address, frame_type=0, common_address=slave_id)
         return 0
 
     def set_value_by_address(
         self, func_code: int, slave_id: int, address: int, value: Any
     ) -> None:
-        """根据地址设置值"""
+        """根据地址设置值 (slave_id 即站的公共地址)"""
         if self._server:
-            self._server.set_point_value(io_address=address, value=value, frame_type=0)
+            self._server.set_point_value(io_address=address, value=value, frame_type=0, common_address=slave_id)
 
     @property
     def server(self):
@@ -158,6 +282,16 @@ class IEC104ClientHandler(ClientHandler):
         super().__init__()
         self._client = None
         self._log = log
+        # IOA -> 内部测点，服务端上送的值按此索引直接写入测点
+        self._point_index: Dict[int, BasePoint] = {}
+        # IOA -> 最近一次收到值的时间戳 (time.time())
+        self._fresh_at: Dict[int, float] = {}
+        self._interrogation = dict(_DEFAULT_INTERROGATION)
+        # 召唤类型 ("gi"/"ci") -> 下一次召唤的定时器
+        self._timers: Dict[str, threading.Timer] = {}
+        self._timer_lock = threading.Lock()
+        # 召唤统计：总召唤/电度量召唤发送次数，未连接跳过次数
+        self.interrogation_stats = {"gi": 0, "ci": 0, "skipped": 0}
 
     def initialize(self, config: Dict[str, Any]) -> None:
         """初始化 IEC104 客户端
@@ -167,15 +301,31 @@ class IEC104ClientHandler(ClientHandler):
                 - ip: 服务器 IP
                 - port: 服务器端口（默认 2404）
                 - common_address: 站地址（默认 1）
+                - iec104_interrogation: 召唤计划，可包含
+                    gi_interval (总召唤周期，秒，0 关闭)、
+                    ci_interval (电度量召唤周期，秒，0 关闭)、
+                    jitter (每次间隔的随机浮动比例，0~1)
         """
         from src.proto.iec104.iec104client import IEC104Client
 
         self._config = config
+        self._interrogation = {**_DEFAULT_INTERROGATION, **(config.get("iec104_interrogation") or {})}
         ip = config.get("ip", "127.0.0.1")
         port = config.get("port", Config.IEC104_DEFAULT_PORT)
         common_address = config.get("common_address", 1)
 
         self._client = IEC104Client(ip=ip, port=port, common_address=common_address)
+        self._client.set_data_received_callback(self._on_value_received)
+
+    def _on_value_received(self, io_address: int, real_val: Any) -> None:
+        """服务端上送值到达时立即写入对应内部测点 (遥测按系数反向换算为原始值)"""
+        point = self._point_index.get(io_address)
+        if point is None or real_val is None:
+            return
+        self._fresh_at[io_address] = time.time()
+        value = _raw_value(point, real_val)
+        if value is not None:
+            point.value = value
 
     async def start(self) -> bool:
         """启动客户端（连接服务器）"""
@@ -192,6 +342,8 @@ class IEC104ClientHandler(ClientHandler):
             if self._client:
                 is_connected = self._client.connect()
                 self._is_running = is_connected
+                if is_connected:
+                    self._start_interrogation()
                 return is_connected
             return False
         except Exception as e:
@@ -201,10 +353,82 @@ class IEC104ClientHandler(ClientHandler):
 
     def disconnect(self) -> None:
         """断开连接"""
+        self._stop_interrogation()
         if self._client:
             self._client.disconnect()
             self._is_running = False
 
+    def _next_delay(self, interval: float, first: bool = False) -> float:
+        """计算下一次召唤的延迟：首次在整个周期内随机分布，之后按周期加减 jitter 比例的随机浮动"""
+        if first:
+            return random.uniform(0, interval)
+        jitter = min(max(float(self._interrogation.get("jitter", 0.0)), 0.0), 1.0)
+        return interval * random.uniform(1 - jitter, 1 + jitter)
+
+    def _start_interrogation(self) -> None:
+        """按配置启动周期总召唤/电度量召唤 (连接时 c104 已做过一次总召唤)"""
+        for kind in ("gi", "ci"):
+            interval = float(self._interrogation.get(f"{kind}_interval") or 0)
+            if interval > 0:
+                self._schedule(kind, self._next_delay(interval, first=True))
+
+    def _stop_interrogation(self) -> None:
+        """取消所有待执行的召唤"""
+        with self._timer_lock:
+            timers, self._timers = self._timers, {}
+        for timer in timers.values():
+            timer.cancel()
+
+    def _schedule(self, kind: str, delay: float, current: Optional[threading.Timer] = None) -> None:
+        """安排一次召唤；current 为正在执行的定时器，其已被取消 (断开连接) 时不再续排"""
+        timer = threading.Timer(delay, self._on_interrogation_timer, args=(kind,))
+        timer.daemon = True
+        with self._timer_lock:
+            previous = self._timers.get(kind)
+            if current is not None and previous is not current:
+                return
+            if previous is not None:
+                previous.cancel()
+            self._timers[kind] = timer
+        timer.start()
+
+    def _on_interrogation_timer(self, kind: str) -> None:
+        """定时召唤：连接断开 (c104 自动重连中) 时本次跳过，计划照常继续"""
+        current = threading.current_thread()
+        with self._timer_lock:
+            if self._timers.get(kind) is not current:
+                return
+        if self._client and self._client.is_connected:
+            sent = self._client.interrogate() if kind == "gi" else self._client.counter_interrogate()
+            self.interrogation_stats[kind if sent else "skipped"] += 1
+        else:
+            self.interrogation_stats["skipped"] += 1
+        self._schedule(kind, self._next_delay(float(self._interrogation[f"{kind}_interval"])), current)
+
+    def interrogate(self, counter: bool = False) -> bool:
+        """立即发送一次总召唤 (counter=True 时为电度量召唤)"""
+        if not self._client or not self._client.is_connected:
+            return False
+        return self._client.counter_interrogate() if counter else self._client.interrogate()
+
+    def get_interrogation_stats(self) -> Dict[str, int]:
+        """获取召唤统计 (总召唤/电度量召唤发送次数，未连接跳过次数)"""
+        return dict(self.interrogation_stats)
+
+    def get_point_age(self, point: BasePoint) -> Optional[float]:
+        """测点距最近一次收到值的秒数，从未收到返回 None"""
+        fresh_at = self._fresh_at.get(point.address)
+        return None if fresh_at is None else time.time() - fresh_at
+
+    def get_stale_points(self, max_age: float) -> List[BasePoint]:
+        """超过 max_age 秒未收到值 (含从未收到) 的测点"""
+        deadline = time.time() - max_age
+        fresh_at = self._fresh_at
+        return [
+            point for io_address, point in self._point_index.items()
+            if fresh_at.get(io_address, 0.0) < deadline
+        ]
+
     @property
     def is_running(self) -> bool:
         """检测客户端的真实连接状态
@@ -248,12 +472,7 @@ class IEC104ClientHandler(ClientHandler):
         
         # 如果是遥测点，需要根据系数反向换算回寄存器/原始值
         # 这样 store 进 point.value 后，系统显示的 real_value 才会正确
-        if isinstance(point, Yc):
-            try:
-                return int((real_val - point.add_coe) / point.mul_coe)
-            except (ZeroDivisionError, TypeError):
-                return None
-        return real_val
+        return _raw_value(point, real_val)
 
     def write_value(self, point: BasePoint, value: Any) -> bool:
         """写入测点值（发送命令）"""
@@ -273,32 +492,52 @@ class IEC104ClientHandler(ClientHandler):
         return False
 
     def add_points(self, points: List[BasePoint]) -> None:
-        """添加测点到 IEC104 客户端"""
+        """添加测点到 IEC104 客户端 (已存在的 IOA 只更新映射的内部测点)"""
         if not self._client:
             return
 
         for point in points:
-            frame_type = point.frame_type
-            if frame_type == 0:  # 遥测
-                self._client.add_point(
-                    io_address=point.address,
-                    point_type=c104.Type.M_ME_NC_1,
-                )
-            elif frame_type == 1:  # 遥信
-                self._client.add_point(
-                    io_address=point.address,
-                    point_type=c104.Type.M_SP_NA_1,
-                )
-            elif frame_type == 2:  # 遥控
-                self._client.add_point(
-                    io_address=point.address,
-                    point_type=c104.Type.C_SC_NA_1,
-                )
-            elif frame_type == 3:  # 遥调
-                self._client.add_point(
-                    io_address=point.address,
-                    point_type=c104.Type.C_SE_NC_1,
-                )
+            point_type = _POINT_TYPES.get(point.frame_type)
+            if point_type is None:
+                continue
+            self._point_index[point.address] = point
+            if self._client.station.get_point(io_address=point.address):
+                continue
+            self._client.add_point(io_address=point.address, point_type=point_type)
+
+    def remove_points(self, points: List[BasePoint]) -> int:
+        """移除测点 (连接保持不变)，返回移除的点数"""
+        if not self._client:
+            return 0
+        removed = 0
+        for point in points:
+            if self._point_index.get(point.address) is point:
+                del self._point_index[point.address]
+                self._fresh_at.pop(point.address, None)
+            if self._client.remove_point(point.address):
+                removed += 1
+        return removed
+
+    def sync_points(self, points: List[BasePoint]) -> Dict[str, int]:
+        """按测点表增量同步客户端的点：只增删有差异的 IOA，连接保持不变"""
+        if not self._client:
+            return {"added": 0, "removed": 0, "kept": 0}
+
+        desired = {point.address: _POINT_TYPES[point.frame_type] for point in points if point.frame_type in _POINT_TYPES}
+        stale = [
+            existing.io_address
+            for existing in self._client.points
+            if desired.get(existing.io_address) != existing.type
+        ]
+        for io_address in stale:
+            self._client.remove_point(io_address)
+            self._fresh_at.pop(io_address, None)
+        self._point_index = {}
+
+        current = {existing.io_address for existing in self._client.points}
+        new_points = [point for point in points if point.frame_type in _POINT_TYPES and point.address not in current]
+        self.add_points(points)
+        return {"added": len(new_points), "removed": len(stale), "kept": len(current)}
 
     @property
     def client(self):
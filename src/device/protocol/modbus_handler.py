@@ -5,9 +5,12 @@ Modbus 协议处理器
 
 import asyncio
 import concurrent.futures
-from typing import Any, Dict, List, Optional, Union
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 
 from src.device.protocol.base_handler import ServerHandler, ClientHandler
+from src.device.protocol.slave_health import SlaveHealthTracker
 from src.enums.points.base_point import BasePoint
 from src.enums.point_data import Yc, Yx, Yt, Yk
 from src.enums.modbus_def import ProtocolType
@@ -35,8 +38,10 @@ class ModbusServerHandler(ServerHandler):
                 - port: 服务端口
                 - slave_id_list: 从机 ID 列表
                 - protocol_type: 协议类型 (ModbusTcp/ModbusRtu)
+                - connection_limits: TCP 连接限制 (max_connections/idle_timeout/max_requests_per_second/burst)
         """
         from src.proto.pyModbus.server import ModbusServer
+        from src.proto.pyModbus.server.connection import ConnectionLimits
 
         self._config = config
         port = config.get("port", Config.DEFAULT_PORT)
@@ -49,6 +54,8 @@ class ModbusServerHandler(ServerHandler):
         bytesize = config.get("databits", 8)
         stopbits = config.get("stopbits", 1)
         parity = config.get("parity", "N")
+        strict_address_map = config.get("strict_address_map", False)
+        connection_limits = ConnectionLimits(**(config.get("connection_limits") or {}))
 
         if self._log:
             self._log.info(f"Modbus 服务端初始化: port={port}, slave_id_list={self._slave_id_list}")
@@ -62,13 +69,21 @@ class ModbusServerHandler(ServerHandler):
             baudrate=baudrate,
             bytesize=bytesize,
             stopbits=stopbits,
-            parity=parity
+            parity=parity,
+            strict_address_map=strict_address_map,
+            connection_limits=connection_limits,
+            name=config.get("name", ""),
         )
 
     async def start(self) -> bool:
         """启动 Modbus 服务器"""
         try:
             if self._server:
+                conflicts = self._server.busConflicts()
+                if conflicts:
+                    if self._log:
+                        self._log.error(f"启动 Modbus 服务器失败: 从站地址 {conflicts} 已被同一串口上的其他设备占用")
+                    return False
                 asyncio.create_task(self._server.start())
                 self._is_running = True
                 return True
@@ -116,8 +131,36 @@ class ModbusServerHandler(ServerHandler):
         return self.write_value(point, value)
 
     def add_points(self, points: List[BasePoint]) -> None:
-        """添加测点（Modbus 服务器使用地址块方式，无需逐个添加）"""
-        pass
+        """添加测点（Modbus 服务器使用地址块方式，仅需登记到严格地址表位图）"""
+        if self._server:
+            self._server.markAddressMap(points)
+
+    def rebuild_address_map(self, points: List[BasePoint]) -> None:
+        """测点表变更（删除/改地址/改从机）后重建严格地址表位图"""
+        if self._server:
+            self._server.rebuildAddressMap(points)
+
+    def set_strict_address_map(self, enabled: bool) -> bool:
+        """开启/关闭严格地址表模式"""
+        self._config["strict_address_map"] = enabled
+        if self._server:
+            self._server.setStrictAddressMap(enabled)
+            return True
+        return False
+
+    def set_connection_limits(self, **kwargs) -> Dict[str, Any]:
+        """设置 TCP 连接限制"""
+        if not self._server:
+            return {}
+        limits = self._server.setConnectionLimits(**kwargs).to_dict()
+        self._config["connection_limits"] = limits
+        return limits
+
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """获取 TCP 连接统计"""
+        if self._server:
+            return self._server.getConnectionStats()
+        return {}
 
     def get_value_by_address(
         self, func_code: int, slave_id: int, address: int
@@ -156,15 +199,32 @@ class ModbusServerHandler(ServerHandler):
             return self._server.message_capture.get_avg_time()
         return {}
 
+    def get_serial_bus_info(self) -> dict:
+        """获取 RTU 共享串口总线信息"""
+        if self._server:
+            return self._server.getSerialBusInfo()
+        return {}
+
+    def get_processing_times(self) -> dict:
+        """获取服务端请求处理耗时统计"""
+        if self._server:
+            return self._server.getProcessingTimes()
+        return {}
+
 
 class ModbusClientHandler(ClientHandler):
     """Modbus 客户端处理器"""
 
+    # 同步客户端在线程池 / 串口仲裁器中执行，已开始的事务无法取消，沿用固定超时
+    _SYNC_TIMEOUT = 2.0
+
     def __init__(self, log=None):
         super().__init__()
         self._client = None
         self._log = log
         self._loop = None  # 事件循环引用
+        self._health = SlaveHealthTracker()  # 按从站的自适应超时与熔断器
+        self._arbiter = None  # RTU 串口仲裁器，独占串口执行同步客户端的读写
 
     def initialize(self, config: Dict[str, Any]) -> None:
         """初始化 Modbus 客户端
@@ -201,7 +261,8 @@ class ModbusClientHandler(ClientHandler):
                 port=port,
                 timeout=1.0,
                 retries=1,
-                log=self._log
+                log=self._log,
+                pipeline_depth=config.get("pipeline_depth", 1),
             )
         else:
             self._client = ModbusClient(
@@ -233,8 +294,12 @@ class ModbusClientHandler(ClientHandler):
                 if hasattr(self._client, 'connect') and asyncio.iscoroutinefunction(self._client.connect):
                     is_connected = await self._client.connect()
                 else:
+                    self._acquire_arbiter()
+                    if self._arbiter:
+                        # RTU 串口：由仲裁器打开共用的串口连接 (其他设备已打开时直接复用)
+                        is_connected = await asyncio.wrap_future(self._arbiter.open_client())
                     # 同步客户端 (在线程池中执行连接以免阻塞)
-                    if self._loop:
+                    elif self._loop:
                         is_connected = await self._loop.run_in_executor(None, self._client.connect)
                     else:
                         is_connected = self._client.connect()
@@ -252,10 +317,68 @@ class ModbusClientHandler(ClientHandler):
         if self._client:
             if hasattr(self._client, 'disconnect') and asyncio.iscoroutinefunction(self._client.disconnect):
                 await self._client.disconnect()
+            elif self._arbiter:
+                # 共用的串口连接由最后一个使用者释放时关闭
+                self._release_arbiter()
             else:
                 self._client.disconnect()
             self._is_running = False
 
+    def _acquire_arbiter(self) -> None:
+        """RTU 串口客户端的读写交给该串口的仲裁器执行，同一串口上的设备共用仲裁器持有的客户端连接"""
+        from src.proto.pyModbus.client.serial_arbiter import acquire_arbiter
+
+        config = getattr(self, "_config", None) or {}
+        if self._arbiter or config.get("protocol_type") != ProtocolType.ModbusRtu:
+            return
+        self._arbiter = acquire_arbiter(
+            config.get("serial_port", "COM1"),
+            self,
+            baudrate=config.get("baudrate", 9600),
+            max_gap=config.get("serial_merge_gap", 0),
+            logger=self._log,
+            create_client=lambda: self._client,
+        )
+        self._client = self._arbiter.client
+
+    def _release_arbiter(self) -> None:
+        from src.proto.pyModbus.client.serial_arbiter import release_arbiter
+
+        if self._arbiter:
+            release_arbiter(self._arbiter, self)
+            self._arbiter = None
+
+    def _run_sync(self, func: Callable[..., Any], *args: Any, write: bool = False) -> Awaitable[Any]:
+        """执行同步客户端调用：RTU 串口交给仲裁器排队 (写优先)，其余放到线程池"""
+        if self._arbiter:
+            job = functools.partial(func, *args)
+            future = self._arbiter.submit_write(job) if write else self._arbiter.submit(job)
+            return asyncio.wrap_future(future)
+        return asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _read_block_sync(self, func_code: int, slave_id: int, start_address: int, count: int) -> Awaitable[List[Any]]:
+        """同步客户端的块读取，经仲裁器时可与排队中的相邻读取合并"""
+        if self._arbiter:
+            return asyncio.wrap_future(
+                self._arbiter.submit_read(self._read_registers_by_func_code_sync, func_code, slave_id, start_address, count)
+            )
+        return self._run_sync(self._read_registers_by_func_code_sync, func_code, slave_id, start_address, count)
+
+    async def _read_point_sync(self, point: BasePoint) -> Any:
+        """同步客户端读取单个测点"""
+        from src.device.core.data.read_planner import codec_for, point_register_count
+
+        if not self._arbiter:
+            return await self._run_sync(
+                self._client.read_value_by_address, point.func_code, point.rtu_addr, point.address, point.decode
+            )
+        values = await self._read_block_sync(point.func_code, point.rtu_addr, point.address, point_register_count(point))
+        return codec_for(point)(values) if values else None
+
+    def get_serial_arbiter_stats(self) -> dict:
+        """获取 RTU 串口仲裁器统计"""
+        return self._arbiter.summary() if self._arbiter else {}
+
     @property
     def is_running(self) -> bool:
         """检测客户端的真实连接状态
@@ -321,6 +444,20 @@ class ModbusClientHandler(ClientHandler):
                     return None
             else:
                 return None
+        elif self._arbiter:
+            # RTU 串口：在仲裁器中排队，与其他调用方的读写按序执行
+            future = self._arbiter.submit(
+                functools.partial(
+                    self._client.read_value_by_address, point.func_code, point.rtu_addr, point.address, point.decode
+                )
+            )
+            try:
+                return future.result(timeout=self._SYNC_TIMEOUT)
+            except Exception as e:
+                future.cancel()
+                if self._log:
+                    self._log.debug(f"读取超时: {e}")
+                return None
         else:
             # 同步客户端直接调用
             return self._client.read_value_by_address(
@@ -335,30 +472,18 @@ class ModbusClientHandler(ClientHandler):
         # 检查是否是异步客户端
         is_async = hasattr(self._client, 'read_value_by_address') and asyncio.iscoroutinefunction(self._client.read_value_by_address)
 
-        try:
-            if is_async:
-                # 使用 asyncio.wait_for 添加超时保护
-                return await asyncio.wait_for(
-                    self._client.read_value_by_address(
-                        point.func_code, point.rtu_addr, point.address, point.decode
-                    ),
-                    timeout=1.0  # 1秒超时
-                )
-            else:
-                # 同步客户端，放到线程池执行
-                loop = asyncio.get_running_loop()
-                return await asyncio.wait_for(
-                    loop.run_in_executor(
-                        None, # 使用默认执行器
-                        self._client.read_value_by_address,
-                        point.func_code, point.rtu_addr, point.address, point.decode
-                    ),
-                    timeout=1.0  # 1秒超时
+        if is_async:
+            def call():
+                return self._client.read_value_by_address(
+                    point.func_code, point.rtu_addr, point.address, point.decode
                 )
-        except asyncio.TimeoutError:
-            if self._log:
-                self._log.debug(f"异步读取超时: {point.code if hasattr(point, 'code') else point}")
-            return None
+        else:
+            # 同步客户端，经串口仲裁器或线程池执行
+            def call():
+                return self._read_point_sync(point)
+
+        try:
+            return await self._call_slave(point.rtu_addr, call, lambda result: result is not None, None, is_async)
         except Exception as e:
             if self._log:
                 self._log.debug(f"异步读取错误: {e}")
@@ -391,34 +516,115 @@ class ModbusClientHandler(ClientHandler):
         # 检查是否是异步客户端
         is_async_client = hasattr(self._client, 'read_holding_registers') and \
                           asyncio.iscoroutinefunction(self._client.read_holding_registers)
-        
+
+        if is_async_client:
+            def call():
+                return self._read_registers_by_func_code_async(func_code, slave_id, start_address, count)
+        else:
+            # 同步客户端，经串口仲裁器或线程池执行
+            def call():
+                return self._read_block_sync(func_code, slave_id, start_address, count)
+
         try:
-            if is_async_client:
-                # 异步客户端
-                return await asyncio.wait_for(
-                    self._read_registers_by_func_code_async(func_code, slave_id, start_address, count),
-                    timeout=2.0
-                )
-            else:
-                # 同步客户端，放到线程池执行
-                loop = asyncio.get_running_loop()
-                return await asyncio.wait_for(
-                    loop.run_in_executor(
-                        None,
-                        self._read_registers_by_func_code_sync,
-                        func_code, slave_id, start_address, count
-                    ),
-                    timeout=2.0
-                )
-        except asyncio.TimeoutError:
-            if self._log:
-                self._log.warning(f"批量读取超时: slave={slave_id}, addr={start_address}, count={count}")
-            return []
+            registers = await self._call_slave(slave_id, call, bool, [], is_async_client)
+            if not registers and not self.last_exception_code and self._log:
+                self._log.debug(f"批量读取无应答: slave={slave_id}, addr={start_address}, count={count}")
+            return registers
         except Exception as e:
             if self._log:
                 self._log.error(f"批量读取错误: {e}")
             return []
 
+    async def _call_slave(
+        self,
+        slave_id: Any,
+        make_call: Callable[[], Awaitable[Any]],
+        is_ok: Callable[[Any], bool],
+        failed_result: Any,
+        is_async_client: bool,
+    ) -> Any:
+        """按从站健康状态发送请求
+
+        熔断打开时直接返回失败结果；超时/无应答时在熔断器闭合的前提下有限重试。
+        从站返回 Modbus 异常应答说明它在线，按成功记录。
+
+        Args:
+            slave_id: 从站地址
+            make_call: 每次尝试时创建请求的函数
+            is_ok: 判断结果是否成功
+            failed_result: 失败时返回的结果
+            is_async_client: 是否为异步客户端 (决定超时方式)
+        """
+        slave_id = int(slave_id)
+        health = self._health
+        if not health.allow(slave_id):
+            return failed_result
+
+        for attempt in range(health.retries + 1):
+            if attempt and not health.can_retry(slave_id):
+                break
+            if hasattr(self._client, "last_exception_code"):
+                self._client.last_exception_code = 0
+            started = time.perf_counter()
+            try:
+                if self.pipelined:
+                    # 流水线模式：排队等待的时间不计入超时，由连接按事务单独计时
+                    result = await make_call()
+                else:
+                    timeout = health.timeout_for(slave_id) if is_async_client else self._SYNC_TIMEOUT
+                    result = await asyncio.wait_for(make_call(), timeout=timeout)
+            except asyncio.TimeoutError:
+                result = failed_result
+            except asyncio.CancelledError:
+                # 调用方取消 (设备停止、外层超时)：释放探测名额，否则熔断器永远等不到探测结果
+                health.abandon(slave_id)
+                raise
+            except Exception:
+                health.record_failure(slave_id)
+                raise
+            if is_ok(result) or self.last_exception_code:
+                health.record_success(slave_id, time.perf_counter() - started)
+                return result
+            health.record_failure(slave_id)
+        return failed_result
+
+    def get_slave_health(self) -> dict:
+        """获取各从站的 RTT、自适应超时与熔断状态"""
+        return self._health.summary()
+
+    def reset_slave_health(self, slave_id: Optional[int] = None) -> None:
+        """清除从站的 RTT 估计与熔断状态，None 表示全部"""
+        self._health.reset(slave_id)
+
+    @property
+    def last_exception_code(self) -> int:
+        """最近一次读写返回的 Modbus 异常码 (0 表示无异常)"""
+        return getattr(self._client, "last_exception_code", 0)
+
+    @property
+    def pipelined(self) -> bool:
+        """客户端是否以流水线模式连接（可同时发出多个批量读取请求）"""
+        return bool(getattr(self._client, "pipelined", False))
+
+    @property
+    def max_in_flight(self) -> int:
+        """同一连接上允许同时在途的请求数"""
+        if self.pipelined:
+            return self._client.pipeline_depth
+        return 1
+
+    def set_pipeline_depth(self, depth: int) -> dict:
+        """设置最大在途请求数"""
+        if hasattr(self._client, "set_pipeline_depth"):
+            self._client.set_pipeline_depth(depth)
+        return self.get_pipeline_stats()
+
+    def get_pipeline_stats(self) -> dict:
+        """获取流水线连接统计"""
+        if hasattr(self._client, "get_pipeline_stats"):
+            return self._client.get_pipeline_stats()
+        return {}
+
     async def _read_registers_by_func_code_async(
         self,
         func_code: int,
@@ -461,6 +667,61 @@ class ModbusClientHandler(ClientHandler):
                 self._log.warning(f"不支持的功能码批量读取: {func_code}")
             return []
 
+    async def write_block_async(
+        self, func_code: int, slave_id: int, start_address: int, values: List[Any]
+    ) -> bool:
+        """按功能码写入一段连续的线圈/寄存器 (FC5/FC6/FC15/FC16)
+
+        Args:
+            func_code: 写功能码
+            slave_id: 从站地址
+            start_address: 起始地址
+            values: 线圈 (bool) 或寄存器值列表
+
+        Returns:
+            写入是否成功
+        """
+        if not self._client or not self.is_running:
+            return False
+
+        is_async_client = asyncio.iscoroutinefunction(getattr(self._client, "write_registers", None))
+        if is_async_client:
+            writers = {
+                5: lambda: self._client.write_coil(slave_id, start_address, values[0]),
+                6: lambda: self._client.write_register(slave_id, start_address, values[0]),
+                15: lambda: self._client.write_coils(slave_id, start_address, values),
+                16: lambda: self._client.write_registers(slave_id, start_address, values),
+            }
+        else:
+            writers = {
+                5: lambda: self._client.write_single_coil(slave_id, start_address, values[0]),
+                6: lambda: self._client.write_single_register(slave_id, start_address, values[0]),
+                15: lambda: self._client.write_multiple_coils(slave_id, start_address, values),
+                16: lambda: self._client.write_multiple_registers(slave_id, start_address, values),
+            }
+        writer = writers.get(func_code)
+        if writer is None:
+            if self._log:
+                self._log.warning(f"不支持的写功能码: {func_code}")
+            return False
+
+        if is_async_client:
+            call = writer
+        else:
+            def call():
+                return self._run_sync(writer, write=True)
+
+        try:
+            ok = await self._call_slave(slave_id, call, bool, False, is_async_client)
+            if not ok and self._log:
+                self._log.warning(
+                    f"批量写入失败: slave={slave_id}, func={func_code}, addr={start_address}, count={len(values)}"
+                )
+            return ok
+        except Exception as e:
+            if self._log:
+                self._log.error(f"批量写入错误: {e}")
+            return False
 
     def write_value(self, point: BasePoint, value: Any) -> bool:
         """写入测点值（同步调用）"""
@@ -485,52 +746,26 @@ class ModbusClientHandler(ClientHandler):
                         self._log.error(f"Async write_value timeout/error: {e}")
                     return False
             return False
+        elif self._arbiter:
+            future = self._arbiter.submit_write(
+                functools.partial(
+                    self._client.write_value_by_address,
+                    point.func_code, point.rtu_addr, point.address, value, point.decode,
+                )
+            )
+            try:
+                return future.result(timeout=self._SYNC_TIMEOUT)
+            except Exception as e:
+                future.cancel()
+                if self._log:
+                    self._log.error(f"Serial write_value timeout/error: {e}")
+                return False
         else:
             self._client.write_value_by_address(
                 point.func_code, point.rtu_addr, point.address, value, point.decode
             )
             return True
 
-    async def read_value_async(self, point: BasePoint) -> Any:
-        """异步读取测点值（用于 async 环境）"""
-        if not self._client or not hasattr(point, "func_code"):
-            if self._log: self._log.warning(f"read_value_async: client or point invalid. point={point}")
-            return None
-        
-        # 检查是否是异步客户端
-        is_async = hasattr(self._client, 'read_value_by_address') and asyncio.iscoroutinefunction(self._client.read_value_by_address)
-        
-        if self._log: self._log.info(f"read_value_async: point={point.code}, addr={point.address}, func={point.func_code}, is_async={is_async}")
-
-        try:
-            if is_async:
-                # 使用 asyncio.wait_for 添加超时保护
-                return await asyncio.wait_for(
-                    self._client.read_value_by_address(
-                        point.func_code, point.rtu_addr, point.address, point.decode
-                    ),
-                    timeout=1.0  # 1秒超时
-                )
-            else:
-                # 同步客户端，放到线程池执行
-                loop = asyncio.get_running_loop()
-                return await asyncio.wait_for(
-                    loop.run_in_executor(
-                        None, # 使用默认执行器
-                        self._client.read_value_by_address,
-                        point.func_code, point.rtu_addr, point.address, point.decode
-                    ),
-                    timeout=1.0  # 1秒超时
-                )
-        except asyncio.TimeoutError:
-            if self._log:
-                self._log.warning(f"Async read_value timeout: {point.code if hasattr(point, 'code') else point}")
-            return None
-        except Exception as e:
-            if self._log:
-                self._log.error(f"Async read_value error: {e}")
-            return None
-
     async def write_value_async(self, point: BasePoint, value: Any) -> bool:
         """异步写入测点值（用于 async 环境）"""
         if not self._client or not hasattr(point, "func_code"):
@@ -539,30 +774,22 @@ class ModbusClientHandler(ClientHandler):
         # 检查是否是异步客户端
         is_async = hasattr(self._client, 'write_value_by_address') and asyncio.iscoroutinefunction(self._client.write_value_by_address)
 
-        try:
-            if is_async:
-                # 使用 asyncio.wait_for 添加超时保护
-                return await asyncio.wait_for(
-                    self._client.write_value_by_address(
-                        point.func_code, point.rtu_addr, point.address, value, point.decode
-                    ),
-                    timeout=2.0  # 2秒超时
+        if is_async:
+            def call():
+                return self._client.write_value_by_address(
+                    point.func_code, point.rtu_addr, point.address, value, point.decode
                 )
-            else:
-                # 同步客户端，放到线程池执行
-                loop = asyncio.get_running_loop()
-                return await asyncio.wait_for(
-                    loop.run_in_executor(
-                        None, # 使用默认执行器
-                        self._client.write_value_by_address,
-                        point.func_code, point.rtu_addr, point.address, value, point.decode
-                    ),
-                    timeout=2.0  # 2秒超时
+        else:
+            # 同步客户端，经串口仲裁器 (写优先) 或线程池执行
+            def call():
+                return self._run_sync(
+                    self._client.write_value_by_address,
+                    point.func_code, point.rtu_addr, point.address, value, point.decode,
+                    write=True,
                 )
-        except asyncio.TimeoutError:
-            if self._log:
-                self._log.error(f"Async write_value timeout: {point.code if hasattr(point, 'code') else point}")
-            return False
+
+        try:
+            return await self._call_slave(point.rtu_addr, call, bool, False, is_async)
         except Exception as e:
             if self._log:
                 self._log.error(f"Async write_value error: {e}")
@@ -0,0 +1,172 @@
+"""
+从站健康跟踪
+按从站记录请求往返时间 (平滑 RTT 及其偏差)，据此计算自适应超时；
+连续无应答的从站由熔断器暂停请求，并按指数退避的间隔发送探测请求，恢复应答后立即闭合。
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+# 熔断器状态
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+# 超时 (秒)：尚无 RTT 样本时使用上限
+DEFAULT_MIN_TIMEOUT = 0.1
+DEFAULT_MAX_TIMEOUT = 1.0
+# 超时 = max(RTT_MULTIPLIER * SRTT, SRTT + 4 * RTTVAR)
+RTT_MULTIPLIER = 3.0
+
+DEFAULT_RETRIES = 1
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_BASE_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0
+
+# RFC 6298 平滑系数
+_ALPHA = 0.125
+_BETA = 0.25
+
+
+@dataclass
+class SlaveHealth:
+    """单个从站的 RTT 估计与熔断状态"""
+    srtt: Optional[float] = None  # 平滑往返时间 (秒)
+    rttvar: float = 0.0
+    state: str = BREAKER_CLOSED
+    consecutive_failures: int = 0
+    backoff: float = 0.0  # 当前探测间隔 (秒)
+    open_until: float = 0.0  # 熔断打开时，下一次允许探测的时刻
+    probing: bool = False
+    success: int = 0
+    failures: int = 0
+    skipped: int = 0  # 熔断期间直接拒绝的请求数
+    trips: int = 0  # 熔断打开次数
+
+    def observe_rtt(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - _BETA) * self.rttvar + _BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - _ALPHA) * self.srtt + _ALPHA * rtt
+
+
+class SlaveHealthTracker:
+    """按从站的自适应超时与熔断器
+
+    请求前调用 allow() 判断是否放行，完成后调用 record_success()/record_failure()。
+    从站返回 Modbus 异常应答同样说明它在线，应按成功记录。
+    """
+
+    def __init__(
+        self,
+        min_timeout: float = DEFAULT_MIN_TIMEOUT,
+        max_timeout: float = DEFAULT_MAX_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        base_backoff: float = DEFAULT_BASE_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.retries = max(0, int(retries))
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._slaves: Dict[int, SlaveHealth] = {}
+
+    def health(self, slave_id: int) -> SlaveHealth:
+        health = self._slaves.get(slave_id)
+        if health is None:
+            health = self._slaves[slave_id] = SlaveHealth()
+        return health
+
+    def timeout_for(self, slave_id: int) -> float:
+        """从站当前的自适应超时 (秒)"""
+        health = self._slaves.get(slave_id)
+        if health is None or health.srtt is None:
+            return self.max_timeout
+        timeout = max(RTT_MULTIPLIER * health.srtt, health.srtt + 4 * health.rttvar)
+        return min(max(timeout, self.min_timeout), self.max_timeout)
+
+    def allow(self, slave_id: int) -> bool:
+        """是否允许向从站发送请求；熔断打开且到达探测时刻时放行一个探测请求"""
+        health = self.health(slave_id)
+        if health.state == BREAKER_CLOSED:
+            return True
+        if health.state == BREAKER_OPEN and self._clock() >= health.open_until:
+            health.state = BREAKER_HALF_OPEN
+        if health.state == BREAKER_HALF_OPEN and not health.probing:
+            health.probing = True
+            return True
+        health.skipped += 1
+        return False
+
+    def can_retry(self, slave_id: int) -> bool:
+        """失败后是否还能立即重试 (熔断器闭合时才重试)"""
+        return self.health(slave_id).state == BREAKER_CLOSED
+
+    def record_success(self, slave_id: int, rtt: Optional[float] = None) -> None:
+        health = self.health(slave_id)
+        if rtt is not None:
+            health.observe_rtt(rtt)
+        health.success += 1
+        health.consecutive_failures = 0
+        health.state = BREAKER_CLOSED
+        health.probing = False
+        health.backoff = 0.0
+
+    def record_failure(self, slave_id: int) -> None:
+        """记录一次无应答；探测失败时退避间隔翻倍，连续失败达到阈值时打开熔断"""
+        health = self.health(slave_id)
+        health.failures += 1
+        health.consecutive_failures += 1
+        if health.state == BREAKER_HALF_OPEN:
+            self._open(health, min(max(health.backoff * 2, self.base_backoff), self.max_backoff))
+        elif health.state == BREAKER_CLOSED and health.consecutive_failures >= self.failure_threshold:
+            health.trips += 1
+            self._open(health, self.base_backoff)
+
+    def abandon(self, slave_id: int) -> None:
+        """请求被取消、没有结果：探测请求按失败处理 (重新打开熔断)，闭合状态下不计数"""
+        health = self.health(slave_id)
+        if health.probing:
+            self.record_failure(slave_id)
+
+    def _open(self, health: SlaveHealth, backoff: float) -> None:
+        health.state = BREAKER_OPEN
+        health.probing = False
+        health.backoff = backoff
+        health.open_until = self._clock() + backoff
+
+    def reset(self, slave_id: Optional[int] = None) -> None:
+        """清除从站的 RTT 估计与熔断状态，None 表示全部"""
+        if slave_id is None:
+            self._slaves.clear()
+        else:
+            self._slaves.pop(slave_id, None)
+
+    def summary(self) -> dict:
+        now = self._clock()
+        return {
+            slave_id: {
+                "state": health.state,
+                "srtt_ms": round(health.srtt * 1000, 3) if health.srtt is not None else None,
+                "rttvar_ms": round(health.rttvar * 1000, 3),
+                "timeout_ms": round(self.timeout_for(slave_id) * 1000, 3),
+                "consecutive_failures": health.consecutive_failures,
+                "backoff": health.backoff,
+                "retry_in": round(max(health.open_until - now, 0.0), 3) if health.state == BREAKER_OPEN else 0.0,
+                "success": health.success,
+                "failures": health.failures,
+                "skipped": health.skipped,
+                "trips": health.trips,
+            }
+            for slave_id, health in self._slaves.items()
+        }
@@ -102,17 +102,15 @@ class SimulationController:
         """单线程模拟循环"""
         log.info(f"模拟线程启动, 模拟测点个数: {len(self.points)}")
         while not self._stop_event.is_set():
+            # 本轮所有测点的新值一次写入协议处理器
+            values = {}
             for point_simulator in self.points.values():
                 if point_simulator.is_running and not self._stop_event.is_set():
                     point_simulator.simulate()
-                    if isinstance(point_simulator.point, Yc):
-                        self.device.editPointData(
-                            point_simulator.point.code, point_simulator.point.real_value
-                        )
-                    else:
-                        self.device.editPointData(
-                            point_simulator.point.code, point_simulator.point.value
-                        )
+                    point = point_simulator.point
+                    values[point.code] = point.real_value if isinstance(point, Yc) else point.value
+            if values:
+                self.device.edit_points_data(values)
             time.sleep(1)  # 适当降低CPU占用
 
     def is_simulation_running(self) -> bool:
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os.path
 import sys
@@ -7,6 +8,7 @@ from typing import Union, List, Optional, Type
 from src.data.service.channel_service import ChannelService
 from src.data.service.yc_service import YcService
 from src.device.data_update.data_update_thread import DataUpdateThread
+from src.device.protocol.base_handler import ClientHandler
 from src.device.factory.general_device_builder import GeneralDeviceBuilder
 from src.device.types.general_device import GeneralDevice
 from src.device.types.pcs import Pcs
@@ -78,9 +80,11 @@ class DeviceController:
 
         # 停止设备
         try:
-            # 停止更新线程
+            # 停止更新线程和轮询调度
             if hasattr(device, "data_update_thread") and device.data_update_thread:
                 device.data_update_thread.stop()
+            if hasattr(device, "poll_scheduler"):
+                device.poll_scheduler.stop()
             
             # 停止模拟
             if hasattr(device, "simulation_controller"):
@@ -107,6 +111,39 @@ class DeviceController:
             
         return True
 
+    async def poll_devices(self, device_names: Optional[List[str]] = None, interval_ms: int = 0) -> dict:
+        """并发轮询多个客户端设备，合并成功/失败计数
+
+        同一主机/串口总线上的请求数由 poll_limiter 统一限制。
+
+        Args:
+            device_names: 设备名称列表，为空时轮询所有已连接的客户端设备
+            interval_ms: 批量读取时每次请求之间的间隔(毫秒)
+        """
+        if device_names:
+            devices = [self.device_map[name] for name in device_names]
+        else:
+            devices = [
+                device for device in self.device_list
+                if isinstance(device.protocol_handler, ClientHandler) and device.is_protocol_running()
+            ]
+
+        results = await asyncio.gather(
+            *(device.single_read(interval_ms=interval_ms) for device in devices), return_exceptions=True
+        )
+
+        per_device = {}
+        for device, result in zip(devices, results):
+            if isinstance(result, Exception):
+                log.error(f"轮询设备 {device.name} 失败: {result}")
+                result = {'success': 0, 'fail': 0}
+            per_device[device.name] = result
+        return {
+            'success': sum(r['success'] for r in per_device.values()),
+            'fail': sum(r['fail'] for r in per_device.values()),
+            'devices': per_device,
+        }
+
     def sync_pcs_power_to_meter(self):
         """同步所有PCS功率之和到储能电表"""
         try:
@@ -276,6 +313,8 @@ class DeviceController:
             # 停止数据更新线程
             if hasattr(device, "data_update_thread"):
                 device.data_update_thread.stop()
+            if hasattr(device, "poll_scheduler"):
+                device.poll_scheduler.stop()
             # 停止模拟控制器
             if hasattr(device, "simulation_controller"):
                 device.simulation_controller.stop_simulation()
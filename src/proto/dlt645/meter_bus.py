@@ -0,0 +1,145 @@
+"""
+DLT645 电表总线复用
+多个 DLT645 服务端设备共用一个 TCP 端口或串口时，由 MeterBus 独占该端口的收发，
+按帧中的电表地址把请求分发到所属设备的电表服务，所有电表共用同一个接收循环，
+从而用一个端口模拟一整段挂多块电表的 RS-485 总线。
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from dlt645.model.types.dlt645_type import CtrlCode
+
+# 广播校时地址：所有电表执行，不应答
+_TIME_SYNC_ADDR = bytes([0x99] * 6)
+# 通配字节：地址中为 AAH 的字节匹配任意值，全 AAH 即广播地址
+_WILDCARD = 0xAA
+
+
+class MeterBus:
+    """一个 TCP 端口或串口对应一条 MeterBus，电表服务按通讯地址挂载"""
+
+    def __init__(self, key: str, transport, logger=None) -> None:
+        self.key = key
+        self.transport = transport
+        # 库的传输层把收到的每一帧交给 service.handle_request，由总线代为分发
+        self.transport.service = self
+        self._logger = logger
+        # 通讯地址 (6 字节) -> 电表服务
+        self._meters: Dict[bytes, object] = {}
+        self._names: Dict[int, str] = {}
+
+    # ---------- 地址路由 ----------
+
+    @property
+    def meters(self) -> List:
+        return list(self._meters.values())
+
+    def owner_of(self, addr: bytes):
+        """获取通讯地址所属的电表服务"""
+        return self._meters.get(bytes(addr))
+
+    def attach(self, meter, name: str = "") -> bool:
+        """按电表当前地址挂到总线上 (地址变化后重新调用即可更新路由)，地址已被其他电表占用时返回 False"""
+        addr = bytes(meter.address)
+        owner = self._meters.get(addr)
+        if owner is not None and owner is not meter:
+            if self._logger:
+                self._logger.warning(f"DLT645 总线 {self.key} 电表地址 {addr.hex()} 已被其他设备占用")
+            return False
+        self._drop(meter)
+        self._meters[addr] = meter
+        if name:
+            self._names[id(meter)] = name
+        return True
+
+    def detach(self, meter) -> None:
+        """卸载电表"""
+        self._drop(meter)
+        self._names.pop(id(meter), None)
+
+    def _drop(self, meter) -> None:
+        for addr in [addr for addr, owner in self._meters.items() if owner is meter]:
+            del self._meters[addr]
+
+    def meter_map(self) -> Dict[str, str]:
+        """获取电表地址 (12 位) 到设备名的映射"""
+        return {
+            addr.hex(): self._names.get(id(meter), "")
+            for addr, meter in sorted(self._meters.items(), key=lambda entry: entry[0])
+        }
+
+    def match(self, addr: bytes) -> List:
+        """按通配规则匹配电表，按地址从小到大排列"""
+        meter = self._meters.get(addr)
+        if meter is not None:
+            return [meter]
+        return [
+            owner
+            for key, owner in sorted(self._meters.items(), key=lambda entry: entry[0])
+            if all(a == _WILDCARD or a == b for a, b in zip(addr, key))
+        ]
+
+    def handle_request(self, frame):
+        """
+        按地址分发请求：精确地址直接交给所属电表；广播校时由所有电表执行且不应答；
+        广播/通配地址由匹配到的地址最小的电表以自身地址应答 (避免总线冲突)；无匹配时不应答，与真实总线一致
+        """
+        addr = bytes(frame.addr)
+        meter = self._meters.get(addr)
+        if meter is None:
+            if addr == _TIME_SYNC_ADDR and frame.ctrl_code == CtrlCode.BroadcastTimeSync:
+                for meter in self.meters:
+                    meter.handle_request(frame)
+                return None
+            matches = self.match(addr)
+            if not matches:
+                return None
+            meter = matches[0]
+            # 按电表自身地址处理并应答，主站由应答地址得知是哪块表
+            frame.addr = bytearray(meter.address)
+        resp = meter.handle_request(frame)
+        if frame.ctrl_code == CtrlCode.WriteAddress:
+            self.attach(meter)
+        return resp
+
+    # ---------- 启停 ----------
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self.transport.is_running())
+
+    def start(self) -> None:
+        """启动共享端口 (已在运行时直接返回)"""
+        if not self.is_running:
+            self.transport.start()
+            if self._logger:
+                self._logger.info(f"DLT645 总线 {self.key} 已启动，电表 {len(self._meters)} 块")
+
+    def stop(self) -> None:
+        if self.is_running:
+            self.transport.stop()
+
+
+# 端口标识 (tcp://ip:port 或串口名) -> 总线
+_buses: Dict[str, MeterBus] = {}
+
+
+def acquire_bus(key: str, create_transport: Callable[[], object], logger=None) -> MeterBus:
+    """获取 (或创建) 端口对应的总线，已有总线时沿用其传输参数"""
+    bus = _buses.get(key)
+    if bus is None:
+        bus = _buses[key] = MeterBus(key, create_transport(), logger)
+    return bus
+
+
+def release_bus(bus: MeterBus, meter) -> None:
+    """卸载电表，总线上没有电表时关闭端口"""
+    bus.detach(meter)
+    if not bus.meters:
+        bus.stop()
+        if _buses.get(bus.key) is bus:
+            del _buses[bus.key]
+
+
+def get_bus(key: str) -> Optional[MeterBus]:
+    return _buses.get(key)
@@ -0,0 +1,83 @@
+"""
+DLT645 主站通道复用
+同一串口 (或同一 TCP 网关) 上的多个 DLT645 客户端设备共用一个传输连接：
+请求逐帧串行发出，相邻两帧之间保留帧间隔，一块表的一批读取连续完成后再轮到下一块表。
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# 串口默认帧间隔 (秒)：DL/T 645 从站应答延时下限 20ms，主站两帧之间至少空闲同样时长
+DEFAULT_SERIAL_GAP = 0.02
+
+
+class MeterChannel:
+    """一个串口/网关连接对应一个 MeterChannel，按引用计数管理连接"""
+
+    def __init__(self, key: str, transport, gap: float = 0.0) -> None:
+        self.key = key
+        self.transport = transport
+        self.gap = gap
+        # 可重入：批量读取在持锁期间逐帧调用 transact
+        self.lock = threading.RLock()
+        self._free_at = 0.0
+        self._users = 0
+        self.stats = {"frames": 0, "gap_waits": 0}
+
+    def transact(self, request: Callable[..., Any], *args) -> Any:
+        """独占通道发出一帧请求，与上一帧的间隔不足 gap 时先等待"""
+        with self.lock:
+            wait = self._free_at - time.monotonic()
+            if wait > 0:
+                self.stats["gap_waits"] += 1
+                time.sleep(wait)
+            try:
+                return request(*args)
+            finally:
+                self.stats["frames"] += 1
+                self._free_at = time.monotonic() + self.gap
+
+    def connect(self) -> bool:
+        """登记一个使用者，连接尚未建立时建立连接"""
+        with self.lock:
+            self._users += 1
+            if getattr(self.transport, "conn", None) is not None:
+                return True
+            return bool(self.transport.connect())
+
+    def disconnect(self) -> None:
+        """注销一个使用者，没有使用者时断开连接"""
+        with self.lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0:
+                self.transport.disconnect()
+
+    @property
+    def users(self) -> int:
+        return self._users
+
+
+# 连接标识 (串口名或 tcp://ip:port) -> 通道
+_channels: Dict[str, MeterChannel] = {}
+_channels_lock = threading.Lock()
+
+
+def acquire_channel(key: str, create_transport: Callable[[], Any], gap: float = 0.0) -> MeterChannel:
+    """获取 (或创建) 连接对应的通道，已有通道时沿用其传输参数"""
+    with _channels_lock:
+        channel = _channels.get(key)
+        if channel is None:
+            channel = _channels[key] = MeterChannel(key, create_transport(), gap)
+        return channel
+
+
+def release_channel(channel: MeterChannel) -> None:
+    """通道没有使用者时从登记表移除"""
+    with _channels_lock:
+        if channel.users == 0 and _channels.get(channel.key) is channel:
+            del _channels[channel.key]
+
+
+def get_channel(key: str) -> Optional[MeterChannel]:
+    return _channels.get(key)
@@ -0,0 +1,29 @@
+"""
+DLT645 电表客户端
+dlt645 库的 MeterClientService 把应答解析进进程内全局的数据项表 (DIMap) 并返回该数据项；
+同一进程内运行的模拟电表 (meter_server) 也在这张表上换入换出各自的值。
+这里在 DATA_LOCK 内解析应答、取出结果副本后立即恢复全局数据项，客户端抄表不会改写任何模拟电表的数据。
+"""
+
+import copy
+
+from dlt645.model.data.define import DIMap
+from dlt645.model.types.dlt645_type import DI_LEN
+from dlt645.service.clientsvc.client_service import MeterClientService
+
+from src.proto.dlt645.meter_server import DATA_LOCK, capture_item, restore_item
+
+
+class IsolatedMeterClientService(MeterClientService):
+    """解析应答时不留下对全局数据项的修改，返回的数据项是独立副本"""
+
+    def handle_response(self, frame):
+        item = DIMap.get(int.from_bytes(frame.data[:DI_LEN], "little")) if len(frame.data) >= DI_LEN else None
+        with DATA_LOCK:
+            shared = capture_item(item) if item is not None else None
+            try:
+                # 事件记录的 event 是原地修改的，恢复前先深拷贝结果
+                return copy.deepcopy(super().handle_response(frame))
+            finally:
+                if shared is not None:
+                    restore_item(item, shared)
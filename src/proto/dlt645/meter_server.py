@@ -0,0 +1,146 @@
+"""
+DLT645 电表服务端
+在 dlt645 库的 MeterServerService 上缓存读数据应答帧，抄表请求命中缓存时只需一次字典查找；
+每块电表的数据项值独立保存，同一进程 (同一总线) 上的多块电表互不影响。
+
+dlt645 库的数据项表 (DIMap) 是进程内全局的，服务端和客户端都会读写它。
+本模块约定：任何读写全局数据项的库调用都必须持有 DATA_LOCK，并在结束前把全局值恢复原样；
+服务端见 _own_data，客户端见 meter_client.IsolatedMeterClientService。
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from dlt645.model.data.define import DIMap
+from dlt645.model.types.dlt645_type import DI_LEN, CtrlCode
+from dlt645.model.validators import validate_device
+from dlt645.service.serversvc.server_service import MeterServerService
+
+# 应答帧中控制码的位置：前导 4 字节 + 68H + 6 字节地址 + 68H
+_CTRL_OFFSET = 12
+# 会修改数据项的请求，处理后使对应 DI 的缓存失效
+_WRITE_CODES = (CtrlCode.WriteData, CtrlCode.ClearDemand)
+
+# dlt645 库的数据项表 (DIMap) 是进程内全局的：访问库时在锁内把本表的值换入全局数据项，结束后换回
+DATA_LOCK = threading.RLock()
+
+
+def capture_item(item) -> List[Tuple[Any, Any]]:
+    """记录数据项 (或事件记录/时段表的数据项列表) 的当前值"""
+    items = item if isinstance(item, list) else [item]
+    return [(data_item.value, getattr(data_item.value, "event", None)) for data_item in items]
+
+
+def restore_item(item, state: List[Tuple[Any, Any]]) -> None:
+    """把 capture_item 记录的值写回数据项 (事件记录的 event 是原地修改的，需单独恢复)"""
+    items = item if isinstance(item, list) else [item]
+    for data_item, (value, event) in zip(items, state):
+        data_item.value = value
+        if event is not None:
+            data_item.value.event = event
+
+
+class CachedMeterServerService(MeterServerService):
+    """按 DI 缓存读数据应答 (BCD 编码后的完整帧)，经本服务写入或收到写数据请求时失效"""
+
+    def __init__(self, server, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        # DI -> {请求地址: 应答帧}，请求地址可能是本表地址或广播地址
+        self._responses: Dict[int, Dict[bytes, bytes]] = {}
+        self.cache_stats = {"hit": 0, "miss": 0}
+        # DI -> 本表写过的数据项值，未写过的 DI 使用库的初始值
+        self._values: Dict[int, List[Tuple[Any, Any]]] = {}
+
+    @contextmanager
+    def _own_data(self, di: int) -> Iterator[Any]:
+        """在锁内把本表的 DI 值换入库的全局数据项，退出时保存可能的修改并换回"""
+        with DATA_LOCK:
+            item = DIMap.get(di)
+            if item is None:
+                yield None
+                return
+            shared = capture_item(item)
+            own = self._values.get(di)
+            if own is not None:
+                restore_item(item, own)
+            try:
+                yield item
+            finally:
+                current = capture_item(item)
+                if current != (shared if own is None else own):
+                    self._values[di] = current
+                restore_item(item, shared)
+
+    def resolve_setter(self, di: int) -> Optional[Callable[[int, Any], bool]]:
+        """
+        按 DI 最高字节 (数据类别) 找到库的 set_XX 写入方法，包装为写入后使缓存失效的函数
+        :return: 不支持的数据类别返回 None
+        """
+        method = getattr(self, f"set_{(di >> 24) & 0xFF:02x}", None)
+        if method is None:
+            return None
+
+        def setter(di: int, value: Any) -> bool:
+            try:
+                with self._own_data(di):
+                    return method(di, value)
+            finally:
+                self.invalidate(di)
+
+        return setter
+
+    def get_value(self, di: int) -> Any:
+        """读取本表数据项当前值，DI 不存在返回 None"""
+        with self._own_data(di) as item:
+            if item is None or isinstance(item, list):
+                return None
+            return item.value
+
+    def clear_meter_data(self) -> None:
+        """清除本表写过的数据，恢复为库的初始值"""
+        self._values.clear()
+        self.invalidate()
+
+    def invalidate(self, di: Optional[int] = None) -> None:
+        """使指定 DI 的缓存应答失效，不指定时清空全部"""
+        if di is None:
+            self._responses.clear()
+        else:
+            self._responses.pop(di, None)
+
+    def set_address(self, address: str):
+        super().set_address(address)
+        self.invalidate()
+
+    def handle_request(self, frame):
+        """读数据请求先查缓存，未命中时由库生成应答并缓存成功的应答帧"""
+        ctrl_code = frame.ctrl_code
+        if ctrl_code != CtrlCode.ReadData or len(frame.data) < DI_LEN:
+            if ctrl_code not in _WRITE_CODES or len(frame.data) < DI_LEN:
+                return super().handle_request(frame)
+            di = int.from_bytes(frame.data[:DI_LEN], "little")
+            try:
+                with self._own_data(di):
+                    return super().handle_request(frame)
+            finally:
+                self.invalidate(di)
+
+        if not validate_device(self.address, ctrl_code, frame.addr):
+            return super().handle_request(frame)
+        di = int.from_bytes(frame.data[:DI_LEN], "little")
+        addr = bytes(frame.addr)
+        cached = self._responses.get(di)
+        if cached is not None:
+            resp = cached.get(addr)
+            if resp is not None:
+                self.cache_stats["hit"] += 1
+                return resp
+
+        self.cache_stats["miss"] += 1
+        with self._own_data(di):
+            resp = super().handle_request(frame)
+        if resp and len(resp) > _CTRL_OFFSET and resp[_CTRL_OFFSET] == ctrl_code | 0x80:
+            resp = bytes(resp)
+            self._responses.setdefault(di, {})[addr] = resp
+        return resp
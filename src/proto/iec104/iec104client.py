@@ -4,6 +4,14 @@ import time
 from src.proto.iec104.log import log
 from src.device.core.message.message_capture import MessageCapture
 
+# 服务端上送方向的点类型 (遥测/遥信)
+_MONITORING_TYPES = (
+    c104.Type.M_ME_NC_1,
+    c104.Type.M_ME_TF_1,
+    c104.Type.M_SP_NA_1,
+    c104.Type.M_SP_TB_1,
+)
+
 
 class IEC104Client:
     def __init__(
@@ -27,7 +35,8 @@ class IEC104Client:
             common_address=self.common_address
         )
         self.points: List[c104.Point] = []
-        self._on_data_received: Optional[Callable] = None
+        # 监控方向 (服务端上送) 的值回调: func(io_address, value)
+        self._on_data_received: Optional[Callable[[int, Any], None]] = None
         self._on_command_response: Optional[Callable] = None
 
         # 报文捕获器
@@ -75,12 +84,52 @@ class IEC104Client:
                     return False
                 time.sleep(0.1)
 
+            self._ensure_unmuted()
             log.info(f"成功连接到服务器 {self.ip}:{self.port}")
             return True
         except Exception as e:
             log.error(f"连接服务器失败: {e}")
             return False
 
+    def _ensure_unmuted(self, grace: float = 0.3) -> None:
+        """
+        服务端刚启动时 STARTDT 可能丢失，连接停留在静默状态收不到任何上送；
+        宽限期后仍静默则重新启动数据传输并补发总召唤
+        """
+        deadline = time.time() + grace
+        while self.connection.state == c104.ConnectionState.OPEN_MUTED:
+            if time.time() > deadline:
+                self.connection.unmute()
+                self.interrogate()
+                return
+            time.sleep(0.05)
+
+    def interrogate(self) -> bool:
+        """
+        向站发送总召唤 (C_IC_NA_1)，不等待应答，召唤到的值经接收回调送出
+        :return: 连接打开时返回 True
+        """
+        try:
+            return self.connection.interrogation(
+                common_address=self.common_address, wait_for_response=False
+            )
+        except Exception as e:
+            log.error(f"发送总召唤失败: {e}")
+            return False
+
+    def counter_interrogate(self) -> bool:
+        """
+        向站发送电度量召唤 (C_CI_NA_1)，不等待应答
+        :return: 连接打开时返回 True
+        """
+        try:
+            return self.connection.counter_interrogation(
+                common_address=self.common_address, wait_for_response=False
+            )
+        except Exception as e:
+            log.error(f"发送电度量召唤失败: {e}")
+            return False
+
     def disconnect(self):
         """断开与服务器的连接"""
         if self.connection and self.connection.is_connected:
@@ -107,8 +156,42 @@ class IEC104Client:
         point = self.station.add_point(io_address=io_address, type=point_type)
         if point:
             self.points.append(point)
+            if point_type in _MONITORING_TYPES:
+                point.on_receive(callable=self._on_point_receive)
         return point
 
+    def _on_point_receive(
+        self,
+        point: c104.Point,
+        previous_info: c104.Information,
+        message: c104.IncomingMessage,
+    ) -> c104.ResponseState:
+        """监控点收到上送 (突发/周期/总召唤应答) 时把新值推给数据回调"""
+        callback = self._on_data_received
+        if callback is not None:
+            try:
+                callback(point.io_address, point.value)
+            except Exception as e:
+                log.error(f"处理IOA {point.io_address} 上送值失败: {e}")
+        return c104.ResponseState.SUCCESS
+
+    def remove_point(self, io_address: int) -> bool:
+        """
+        移除一个点 (连接保持不变)
+        :param io_address: 信息对象地址(IOA)
+        :return: 是否移除成功
+        """
+        point = self.station.get_point(io_address=io_address)
+        if point is None:
+            return False
+        try:
+            self.station.remove_point(io_address=io_address)
+        except Exception as e:
+            log.info(f"移除IOA {io_address} 失败: {e}")
+            return False
+        self.points = [p for p in self.points if p is not point]
+        return True
+
     def read_point(self, io_address: int, frame_type: int = 0) -> Optional[float]:
         """
         读取指定IOA的监控点值
@@ -191,14 +274,12 @@ class IEC104Client:
             log.error(f"发送命令失败: {e}")
             return False
 
-    # def set_data_received_callback(self, callback: Callable):
-    #     """
-    #     设置数据接收回调函数
-    #     :param callback: 回调函数，格式应为 func(point: c104.Point)
-    #     """
-    #     self._on_data_received = callback
-    #     if self.connection:
-    #         self.station.on_data_received(callable=self._on_data_received)
+    def set_data_received_callback(self, callback: Optional[Callable[[int, Any], None]]):
+        """
+        设置数据接收回调函数，在 c104 接收线程中对每个收到的监控点值调用
+        :param callback: 回调函数，格式应为 func(io_address: int, value)，None 表示取消
+        """
+        self._on_data_received = callback
 
     # def set_command_response_callback(self, callback: Callable):
     #     """
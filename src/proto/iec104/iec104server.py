@@ -1,31 +1,135 @@
-from typing import List, Dict, Any
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple, Union
 import c104
 import random
+import threading
 import time
 from src.proto.iec104.log import log
 from src.device.core.message.message_capture import MessageCapture
 
+# 帧类型：0=遥测，1=遥信，2=遥控，3=遥调
+_MONITORING_FRAME_TYPES = (0, 1)
+_BOOL_FRAME_TYPES = (1, 2)
+
+# 按点类型推断帧类型时视为开关量的类型
+_SINGLE_POINT_TYPES = (c104.Type.M_SP_NA_1, c104.Type.M_SP_TB_1)
+_SWITCH_COMMAND_TYPES = (c104.Type.C_SC_NA_1, c104.Type.C_SC_TA_1)
+
+# 单个 ASDU 可用于信息对象的字节数：APDU 上限 253 - 控制域 4 - ASDU 头 6
+_ASDU_PAYLOAD = 243
+_IOA_SIZE = 3
+_MAX_OBJECTS = 127  # VSQ 可变结构限定词的对象数上限
+# 各点类型信息元素 (不含 IOA) 的字节数
+_ELEMENT_SIZES = {
+    c104.Type.M_SP_NA_1: 1,
+    c104.Type.M_SP_TB_1: 8,
+    c104.Type.M_ME_NA_1: 3,
+    c104.Type.M_ME_NB_1: 3,
+    c104.Type.M_ME_NC_1: 5,
+    c104.Type.M_ME_TF_1: 12,
+}
+
+
+def _asdu_capacity(point_type) -> Tuple[int, int]:
+    """单个 ASDU 最多容纳的对象数：(SQ=1 连续地址, SQ=0 离散地址)"""
+    size = _ELEMENT_SIZES.get(point_type, 5)
+    return (
+        min(_MAX_OBJECTS, (_ASDU_PAYLOAD - _IOA_SIZE) // size),
+        min(_MAX_OBJECTS, _ASDU_PAYLOAD // (_IOA_SIZE + size)),
+    )
+
+
+def pack_asdus(entries: List[Tuple[int, Any]], point_type) -> List[List[Any]]:
+    """
+    把同一类型的待上送点按 IOA 打包成 ASDU，每组恰好对应一个 ASDU
+    连续 IOA 段足够长时单独成组 (SQ=1，只带首个 IOA)，其余零散点合并成 SQ=0 组
+    :param entries: (IOA, 点) 列表
+    :return: 每个 ASDU 的点列表
+    """
+    sq_capacity, capacity = _asdu_capacity(point_type)
+    asdus: List[List[Any]] = []
+    loose: List[Any] = []
+    run: List[Any] = []
+    previous = None
+    for io_address, point in sorted(entries, key=lambda entry: entry[0]):
+        if previous is not None and io_address != previous + 1:
+            _split_run(run, sq_capacity, capacity, asdus, loose)
+            run = []
+        run.append(point)
+        previous = io_address
+    _split_run(run, sq_capacity, capacity, asdus, loose)
+    asdus.extend(loose[i:i + capacity] for i in range(0, len(loose), capacity))
+    return asdus
+
+
+def _split_run(run: List[Any], sq_capacity: int, capacity: int, asdus: List[List[Any]], loose: List[Any]) -> None:
+    """连续段按 SQ 容量切块，不足一个 SQ=0 ASDU 容量的尾段并入零散点"""
+    for i in range(0, len(run), sq_capacity):
+        chunk = run[i:i + sq_capacity]
+        if len(chunk) >= capacity:
+            asdus.append(chunk)
+        else:
+            loose.extend(chunk)
+
+
+# 站内点的键：(公共地址, IOA)
+PointKey = Tuple[int, int]
+
+
+@dataclass
+class _ReportState:
+    """监控点突发上送状态"""
+
+    deadband: float = 0.0  # 死区 (与点值同单位)，变化量不超过死区不上送；遥信任何变位都上送
+    min_interval: float = 0.0  # 同一点两次突发上送的最小间隔 (秒)
+    last_value: Any = None  # 上次上送的值
+    last_sent: float = 0.0  # 上次上送时间 (monotonic)
+
 
 class IEC104Server:
-    def __init__(self, ip="0.0.0.0", port=2404, common_address=1):
+    def __init__(self, ip="0.0.0.0", port=2404, common_address=1, spontaneous=True, max_asdus_in_flight=64):
         """
         初始化IEC 104服务器
         :param ip: 服务器监听IP地址，默认0.0.0.0表示监听所有接口
         :param port: 服务器监听端口，默认2404是IEC 104标准端口
-        :param common_address: 站地址，默认1
+        :param common_address: 默认站地址，默认1；其他站在添加测点时按公共地址自动创建，共用同一监听端口与连接
+        :param spontaneous: 监控点值变化时是否突发上送 (COT=3)
+        :param max_asdus_in_flight: 已交给 c104 但尚未发出的突发上送 ASDU 上限，超出部分留待下次；
+            c104 发送队列约 100 个 ASDU，满后覆盖最早未发出的报文
         """
         self.ip = ip
         self.port = port
+        self.spontaneous = spontaneous
+        self.max_asdus_in_flight = max_asdus_in_flight
         # 创建c104服务器实例
         self.server = c104.Server(ip=ip, port=port)
-        # 添加一个站
+        # 添加默认站
+        self.common_address = common_address
         self.station = self.server.add_station(common_address=common_address)
+        # 公共地址 -> 站
+        self.stations: Dict[int, c104.Station] = {common_address: self.station}
         # 存储所有监控点的列表
         self.points: List[c104.Point] = []
         # 存储所有命令点的列表
         self.commands = []
+        # (公共地址, IOA) -> (c104 点, 帧类型)，同一站内监控点与命令点共用 IOA 空间
+        self.point_index: Dict[PointKey, Tuple[c104.Point, int]] = {}
         # 关联测点map
         self.related_point_map = {}
+        # (公共地址, IOA) -> 突发上送状态 (仅监控点)
+        self._reports: Dict[PointKey, _ReportState] = {}
+        # 因最小上送间隔被推迟、等待补发的点
+        self._pending_reports: Set[PointKey] = set()
+        # 已判定需要上送、等待打包发出的点，同一点多次变化只发最新值
+        self._outbox: Dict[PointKey, c104.Point] = {}
+        self.report_stats = {"spontaneous": 0, "deadband": 0, "deferred": 0, "asdus": 0}
+        # 已交给 c104 的突发上送 ASDU 数 / 已从套接字发出的 COT=3 I 帧数 (所有连接合计)
+        self._queued_asdus = 0
+        self._sent_asdus = 0
+        self._last_activity = 0.0  # 最近一次入队或发出的时间
+        # 仍有待发/推迟的点时由定时器补发，不依赖下一次设值
+        self._report_lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
         # 设置默认回调函数
         self._setup_callbacks()
 
@@ -46,6 +150,10 @@ class IEC104Server:
 
     def _on_send_raw(self, server: c104.Server, data: bytes) -> None:
         """发送原始报文回调"""
+        # I 帧 (控制域首字节最低位为 0) 且传送原因为突发 (3)
+        if len(data) > 8 and not data[2] & 1 and data[8] & 0x3F == 3:
+            self._sent_asdus += 1
+            self._last_activity = time.monotonic()
         try:
             self.message_capture.add_tx(data)
         except Exception as e:
@@ -66,18 +174,45 @@ class IEC104Server:
         # self._before_auto_transmit = self._default_before_auto_transmit
         self._before_read = self._default_before_read
 
+    def _key(self, io_address: Union[int, PointKey], common_address: Optional[int] = None) -> PointKey:
+        """IOA 转为 (公共地址, IOA)，未指定公共地址时使用默认站；已是键则原样返回"""
+        if isinstance(io_address, tuple):
+            return io_address
+        return (self.common_address if common_address is None else common_address, io_address)
+
+    def get_station(self, common_address: Optional[int] = None) -> c104.Station:
+        """获取指定公共地址的站，不存在时在同一服务器上创建"""
+        if common_address is None:
+            return self.station
+        station = self.stations.get(common_address)
+        if station is None:
+            station = self.server.add_station(common_address=common_address)
+            self.stations[common_address] = station
+        return station
+
     def add_monitoring_point(
-        self, io_address, point_type=c104.Type.M_ME_NC_1, report_ms=1000
+        self,
+        io_address,
+        point_type=c104.Type.M_ME_NC_1,
+        report_ms=0,
+        frame_type: Optional[int] = None,
+        deadband: float = 0.0,
+        min_interval: float = 0.0,
+        common_address: Optional[int] = None,
     ):
         """
         添加一个监控点到站
         :param io_address: 信息对象地址(IOA)
         :param point_type: 点类型，默认是归一化值测量量(M_ME_NC_1)
-        :param report_ms: 自动上报间隔(毫秒)
+        :param report_ms: 周期上报间隔(毫秒)，0 表示不周期上报，只做变化突发上送
+        :param frame_type: 帧类型(0=遥测, 1=遥信)，默认按点类型推断
+        :param deadband: 突发上送死区，遥测变化量超过该值才上送
+        :param min_interval: 同一点两次突发上送的最小间隔(秒)
+        :param common_address: 所属站的公共地址，默认站为空
         :return: 创建的监控点对象
         """
         # 创建监控点
-        point = self.station.add_point(
+        point = self.get_station(common_address).add_point(
             io_address=io_address, type=point_type, report_ms=report_ms
         )
         if point:
@@ -87,96 +222,300 @@ class IEC104Server:
             # point.on_before_read(callable=self._before_read)
             # 添加到监控点列表
             self.points.append(point)
+            if frame_type is None:
+                frame_type = 1 if point_type in _SINGLE_POINT_TYPES else 0
+            key = self._key(io_address, common_address)
+            self.point_index[key] = (point, frame_type)
+            self._reports[key] = _ReportState(
+                deadband=deadband, min_interval=min_interval, last_value=point.value
+            )
         return point
 
     def add_command_point(
-        self, io_address, point_type=c104.Type.C_RC_TA_1, related_point_ioa=None
+        self,
+        io_address,
+        point_type=c104.Type.C_RC_TA_1,
+        related_point_ioa=None,
+        frame_type: Optional[int] = None,
+        common_address: Optional[int] = None,
     ):
         """
         添加一个命令点到站
         :param io_address: 信息对象地址(IOA)
         :param point_type: 点类型，默认是调节步命令(C_RC_TA_1)
         :param related_point_ioa: 关联的监控点IOA
+        :param frame_type: 帧类型(2=遥控, 3=遥调)，默认按点类型推断
+        :param common_address: 所属站的公共地址，默认站为空
         :return: 创建的命令点对象
         """
         # 创建命令点
-        command = self.station.add_point(io_address=io_address, type=point_type)
+        command = self.get_station(common_address).add_point(io_address=io_address, type=point_type)
         # 设置接收命令的回调
         # command.on_receive(callable=self._on_step_command)
         # 添加到命令点列表
-        self.commands.append(command)
+        if command:
+            self.commands.append(command)
+            if frame_type is None:
+                frame_type = 2 if point_type in _SWITCH_COMMAND_TYPES else 3
+            self.point_index[self._key(io_address, common_address)] = (command, frame_type)
         return command
 
-    def get_point_value(self, io_address: int, frame_type: int = 0) -> float:
+    def remove_point(self, io_address: int, common_address: Optional[int] = None) -> bool:
+        """
+        从站中移除一个监控点或命令点 (服务运行中也可调用，不影响已建立的连接)
+        非默认站的最后一个点移除后，该站也一并移除
+        :param io_address: 信息对象地址(IOA)
+        :param common_address: 所属站的公共地址，默认站为空
+        :return: 是否移除成功
+        """
+        key = self._key(io_address, common_address)
+        entry = self.point_index.pop(key, None)
+        if entry is None:
+            return False
+        point, frame_type = entry
+        with self._report_lock:
+            self._reports.pop(key, None)
+            self._pending_reports.discard(key)
+            self._outbox.pop(key, None)
+        common_address, io_address = key
+        station = self.stations[common_address]
+        try:
+            station.remove_point(io_address=io_address)
+            if common_address != self.common_address and not station.has_points:
+                self.server.remove_station(common_address=common_address)
+                del self.stations[common_address]
+        except Exception as e:
+            log.info(f"移除站 {common_address} IOA {io_address} 失败: {e}")
+        container = self.points if frame_type in _MONITORING_FRAME_TYPES else self.commands
+        for i, existing in enumerate(container):
+            if existing is point:
+                del container[i]
+                break
+        self.related_point_map.pop(point, None)
+        for command, related in list(self.related_point_map.items()):
+            if related is point:
+                del self.related_point_map[command]
+        return True
+
+    def point_frame_type(self, io_address: int, common_address: Optional[int] = None) -> Optional[int]:
+        """获取已登记IOA的帧类型，未登记返回 None"""
+        entry = self.point_index.get(self._key(io_address, common_address))
+        return entry[1] if entry else None
+
+    def _lookup(self, key: PointKey, frame_type: int) -> Optional[c104.Point]:
+        """按 (公共地址, IOA) 查找点，帧类型与点的类别 (监控/命令) 不一致时返回 None"""
+        entry = self.point_index.get(key)
+        if entry is None:
+            return None
+        point, point_frame_type = entry
+        if (point_frame_type in _MONITORING_FRAME_TYPES) != (frame_type in _MONITORING_FRAME_TYPES):
+            return None
+        return point
+
+    def get_point_value(self, io_address: int, frame_type: int = 0, common_address: Optional[int] = None) -> float:
         """
         获取指定IOA的监控点值
         :param io_address: 信息对象地址(IOA)
+        :param common_address: 所属站的公共地址，默认站为空
         :return: 监控点值
         """
         try:
-            # 如果是遥测或者遥信
-            if frame_type == 0 or frame_type == 1:
-                for point in self.points:
-                    if point.io_address == io_address:
-                        point = self.station.get_point(io_address=io_address)
-                        if point:
-                            if frame_type == 0:
-                                return float(point.value)
-                            elif frame_type == 1:
-                                return bool(point.value)
-            elif frame_type == 2 or frame_type == 3:  # 遥测或者遥调
-                for command in self.commands:
-                    if command.io_address == io_address:
-                        command = self.station.get_point(io_address=io_address)
-                        if command:
-                            if frame_type == 2:
-                                return bool(command.value)
-                            elif frame_type == 3:
-                                return float(command.value)
-            return 0
+            point = self._lookup(self._key(io_address, common_address), frame_type)
+            if point is None:
+                return 0
+            return bool(point.value) if frame_type in _BOOL_FRAME_TYPES else float(point.value)
         except Exception as e:
             log.info(f"获取监控点值失败: {e}")
             raise e
 
     def set_point_value(
-        self, io_address: int, value: float, frame_type: int = 0
+        self, io_address: int, value: float, frame_type: int = 0, common_address: Optional[int] = None
     ) -> None:
         """
         设置指定IOA的监控点值
         :param io_address: 信息对象地址(IOA)
         :param value: 要设置的值
         :param frame_type: 帧类型，默认遥测
+        :param common_address: 所属站的公共地址，默认站为空
         """
         try:
-            # 如果是遥测或者遥信
-            if frame_type == 0 or frame_type == 1:
-                for point in self.points:
-                    if point.io_address == io_address:
-                        point = self.station.get_point(io_address=io_address)
-                        if point:
-                            if frame_type == 0:
-                                point.value = float(value)
-                            elif frame_type == 1:
-                                point.value = bool(value)
-            elif frame_type == 2 or frame_type == 3:  # 遥控或者遥调
-                for command in self.commands:
-                    if command.io_address == io_address:
-                        command = self.station.get_point(io_address=io_address)
-                        if command:
-                            if frame_type == 2:
-                                command.value = bool(value)
-                            elif frame_type == 3:
-                                command.value = float(value)
+            key = self._key(io_address, common_address)
+            point = self._lookup(key, frame_type)
+            if point is not None:
+                point.value = bool(value) if frame_type in _BOOL_FRAME_TYPES else float(value)
+                with self._report_lock:
+                    self._report_change(key, point)
+                    self.flush_reports()
         except Exception as e:
             log.info(f"设置监控点值失败: {e}")
             raise e
 
+    def set_point_values(
+        self, values: Union[Dict[Any, Any], Iterable[Tuple[Any, Any]]]
+    ) -> int:
+        """
+        批量设置多个点的值，按各点登记的帧类型转换
+        :param values: 键 -> 值 的字典，或 (键, 值) 序列；键为 (公共地址, IOA)，或只给 IOA 表示默认站
+        :return: 实际更新的点数 (未登记的点被忽略)
+        """
+        index = self.point_index
+        default = self.common_address
+        updated = 0
+        with self._report_lock:
+            for key, value in values.items() if isinstance(values, dict) else values:
+                if not isinstance(key, tuple):
+                    key = (default, key)
+                entry = index.get(key)
+                if entry is None:
+                    continue
+                point, frame_type = entry
+                try:
+                    point.value = bool(value) if frame_type in _BOOL_FRAME_TYPES else float(value)
+                    updated += 1
+                except Exception as e:
+                    log.info(f"设置站 {key[0]} IOA {key[1]} 值失败: {e}")
+                    continue
+                self._report_change(key, point)
+            self.flush_reports()
+        return updated
+
+    def set_report_policy(
+        self,
+        io_address: int,
+        deadband: Optional[float] = None,
+        min_interval: Optional[float] = None,
+        common_address: Optional[int] = None,
+    ) -> bool:
+        """
+        调整单个监控点的突发上送死区/最小间隔
+        :return: IOA 不是监控点时返回 False
+        """
+        state = self._reports.get(self._key(io_address, common_address))
+        if state is None:
+            return False
+        if deadband is not None:
+            state.deadband = deadband
+        if min_interval is not None:
+            state.min_interval = min_interval
+        return True
+
+    def _report_change(self, key: PointKey, point: c104.Point) -> None:
+        """值更新后按死区与最小间隔决定是否突发上送 (COT=3)，需要上送的点放入待发队列"""
+        state = self._reports.get(key)
+        if state is None or not self.spontaneous:
+            return
+        value = point.value
+        if isinstance(value, bool) or state.last_value is None:
+            changed = value != state.last_value
+        else:
+            changed = abs(value - state.last_value) > state.deadband
+        if not changed:
+            self._pending_reports.discard(key)
+            self.report_stats["deadband"] += 1
+            return
+        now = time.monotonic()
+        if now - state.last_sent < state.min_interval:
+            if key not in self._pending_reports:
+                self._pending_reports.add(key)
+                self.report_stats["deferred"] += 1
+            return
+        self._pending_reports.discard(key)
+        state.last_value = value
+        state.last_sent = now
+        self._outbox[key] = point
+
+    def flush_reports(self) -> int:
+        """
+        补发因最小上送间隔被推迟的变化，并把待发队列按点类型打包成多对象 ASDU 发出
+        c104 发送队列中未发出的 ASDU 达到 max_asdus_in_flight 时停止，其余由定时器稍后补发
+        :return: 仍在等待的点数
+        """
+        with self._report_lock:
+            for key in list(self._pending_reports):
+                entry = self.point_index.get(key)
+                if entry is None:
+                    self._pending_reports.discard(key)
+                    continue
+                self._report_change(key, entry[0])
+
+            outbox = self._outbox
+            if outbox and not self.server.has_active_connections:
+                outbox.clear()  # 无连接时只刷新基准值，客户端建链后通过总召唤获取全量
+            if outbox:
+                self._transmit_outbox()
+            waiting = len(self._pending_reports) + len(outbox)
+            if waiting and self._flush_timer is None:
+                self._flush_timer = threading.Timer(0.05, self._on_flush_timer)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+            return waiting
+
+    def _on_flush_timer(self) -> None:
+        """定时补发：在途 ASDU 回落或最小上送间隔到期后继续发出待发点"""
+        with self._report_lock:
+            self._flush_timer = None
+        try:
+            self.flush_reports()
+        except Exception as e:
+            log.info(f"补发突发上送失败: {e}")
+
+    def _transmit_outbox(self) -> None:
+        """按站和点类型分组打包发送待发队列"""
+        outbox = self._outbox
+        if len(outbox) == 1:
+            key, point = outbox.popitem()
+            self._transmit(key, [point])
+            return
+
+        groups: Dict[Tuple[int, Any], List[Tuple[int, c104.Point]]] = {}
+        for (common_address, io_address), point in outbox.items():
+            groups.setdefault((common_address, point.type), []).append((io_address, point))
+        budget = self._send_window()
+        for (common_address, point_type), entries in groups.items():
+            for points in pack_asdus(entries, point_type):
+                if budget <= 0:
+                    return
+                budget -= 1
+                for point in points:
+                    del outbox[(common_address, point.io_address)]
+                self._transmit((common_address, points[0].io_address), points)
+
+    def _send_window(self) -> int:
+        """还可以交给 c104 的 ASDU 数：上限减去已入队但尚未从套接字发出的数量"""
+        connections = max(1, self.server.active_connection_count)
+        in_flight = self._queued_asdus - self._sent_asdus // connections
+        if in_flight <= 0 or time.monotonic() - self._last_activity > 1.0:
+            # 全部发出，或长时间没有进展 (连接断开后 c104 丢弃了队列)，重新计数
+            self._queued_asdus = self._sent_asdus = 0
+            in_flight = 0
+        return self.max_asdus_in_flight - in_flight
+
+    def _transmit(self, key: PointKey, points: List[c104.Point]) -> None:
+        """发送一个 ASDU：单点直接上送，多点组成 Batch (同站同类型)"""
+        try:
+            if len(points) == 1:
+                points[0].transmit(cause=c104.Cot.SPONTANEOUS)
+            else:
+                self.server.transmit_batch(c104.Batch(cause=c104.Cot.SPONTANEOUS, points=points))
+            self._queued_asdus += 1
+            self._last_activity = time.monotonic()
+            self.report_stats["spontaneous"] += len(points)
+            self.report_stats["asdus"] += 1
+        except Exception as e:
+            log.info(f"突发上送站 {key[0]} IOA {key[1]} 起 {len(points)} 个点失败: {e}")
+
     def start(self):
         """启动IEC 104服务器"""
         self.server.start()
 
     def stop(self):
         """停止IEC 104服务器"""
+        with self._report_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._outbox.clear()
+            self._pending_reports.clear()
         if self.server:
             self.server.stop()
             log.info("IEC 104服务器已停止")
@@ -287,25 +626,13 @@ class IEC104Server:
             point.on_before_read(callable=self._before_read)
 
     # 绑定关联测点
-    def bind_related_point(self, io_address: int, related_io_address: int):
+    def bind_related_point(self, io_address: int, related_io_address: int, common_address: Optional[int] = None):
         """
-        绑定遥调点到遥测点上面
+        绑定遥调点到同一站内的遥测点上面
         :param yc_point: 遥调点对象
         """
-        a_point = None
-        b_point = None
-        for command in self.commands:
-            if command.io_address == io_address:
-                command = self.station.get_point(io_address=io_address)
-                if command:
-                    a_point = command
-                    log.info("找到测点A")
-        for point in self.points:
-            if point.io_address == related_io_address:
-                point = self.station.get_point(io_address=related_io_address)
-                if point:
-                    b_point = point
-                    log.info("找到测点B")
+        a_point = self._lookup(self._key(io_address, common_address), 3)
+        b_point = self._lookup(self._key(related_io_address, common_address), 0)
         if a_point and b_point:
             self.related_point_map[a_point] = b_point
             a_point.on_before_read(callable=self._before_read)
@@ -4,26 +4,20 @@
 """
 
 import asyncio
-import struct
-from typing import List, Optional, Union, Any
-from pymodbus.client import AsyncModbusTcpClient
+from typing import List, Optional, Union
 from pymodbus.exceptions import ModbusException
-from src.enums.modbus_def import ProtocolType
+from src.device.core.data.read_planner import register_codec
+from src.device.core.data.write_planner import register_encoder
 from src.device.core.message.message_capture import MessageCapture
 from src.enums.modbus_register import Decode
-
-# 导入所有需要的 PDU 类
-from pymodbus.bit_read_message import ReadCoilsRequest, ReadDiscreteInputsRequest
-from pymodbus.bit_write_message import WriteSingleCoilRequest, WriteMultipleCoilsRequest
-from pymodbus.register_read_message import ReadHoldingRegistersRequest, ReadInputRegistersRequest
-from pymodbus.register_write_message import WriteSingleRegisterRequest, WriteMultipleRegistersRequest
-from pymodbus.pdu import ModbusRequest, ModbusResponse
+from src.proto.pyModbus.client.pipeline import PipelinedModbusTcpConnection
 
 
 class AsyncModbusClient:
     """
     异步 Modbus 客户端
-    使用 pymodbus 的 AsyncModbusTcpClient 避免阻塞事件循环
+    基于 PipelinedModbusTcpConnection：请求帧一次打包、应答直接从字节解析，
+    报文捕获记录实际收发的帧；pipeline_depth > 1 时在一条连接上同时保持多个在途请求
     """
 
     def __init__(
@@ -33,24 +27,48 @@ class AsyncModbusClient:
         timeout: float = 1.0,
         retries: int = 1,
         log=None,
+        pipeline_depth: int = 1,
     ):
         self.host = host
         self.port = port
         self.timeout = timeout
-        self.retries = retries
+        self.retries = retries  # 重试由上层 (从站健康跟踪) 负责，连接本身不重发
         self.log = log
-        self.client: Optional[AsyncModbusTcpClient] = None
+        self.pipeline_depth = max(1, int(pipeline_depth))  # 最大在途请求数，1 表示逐个请求
+        self.last_exception_code: int = 0  # 最近一次读写的 Modbus 异常码 (0 表示无异常)
+        self.client: Optional[PipelinedModbusTcpConnection] = None
         self.connected = False
         self.message_capture = MessageCapture()
 
+    @property
+    def pipelined(self) -> bool:
+        """当前连接是否为流水线模式 (允许多个在途请求)"""
+        return isinstance(self.client, PipelinedModbusTcpConnection) and self.pipeline_depth > 1
+
+    def set_pipeline_depth(self, depth: int) -> None:
+        """设置最大在途请求数，对已建立的连接立即生效"""
+        self.pipeline_depth = max(1, int(depth))
+        if isinstance(self.client, PipelinedModbusTcpConnection):
+            self.client.set_depth(self.pipeline_depth)
+
+    def get_pipeline_stats(self) -> dict:
+        """获取流水线连接统计"""
+        stats = {"pipeline_depth": self.pipeline_depth, "pipelined": self.pipelined}
+        if isinstance(self.client, PipelinedModbusTcpConnection):
+            stats.update(self.client.summary())
+        return stats
+
     async def connect(self) -> bool:
         """异步连接到 Modbus 服务器"""
         try:
-            self.client = AsyncModbusTcpClient(
+            # 连接自行记录带真实事务号的报文
+            self.client = PipelinedModbusTcpConnection(
                 host=self.host,
                 port=self.port,
                 timeout=self.timeout,
-                retries=self.retries,
+                depth=self.pipeline_depth,
+                message_capture=self.message_capture,
+                log=self.log,
             )
             self.connected = await self.client.connect()
             if self.connected:
@@ -73,7 +91,7 @@ class AsyncModbusClient:
                 # 先将连接状态设为 False，防止其他操作继续使用
                 self.connected = False
                 
-                # pymodbus 的 close() 是同步方法
+                # close() 是同步方法
                 self.client.close()
                 
                 # 等待一小段时间确保连接完全关闭
@@ -89,70 +107,38 @@ class AsyncModbusClient:
                     self.log.error(f"断开连接时出错: {e}")
                 self.client = None
 
-    # ===== 报文捕获辅助方法 =====
-
-    def _capture_request(self, request: ModbusRequest):
-        """捕获请求报文"""
-        try:
-            if not self.message_capture:
-                return
-
-            # 构造 PDU (功能码 + 数据)
-            pdu = bytes([request.function_code]) + request.encode()
-            
-            # 构造模拟的 MBAP 头部 (为了显示效果)
-            transaction_id = 0
-            protocol_id = 0x0000
-            length = len(pdu) + 1  # PDU长度 + 从机ID
-            unit_id = request.slave_id
+    # ===== 标准 Modbus 操作 =====
 
-            mbap_header = bytearray([
-                (transaction_id >> 8) & 0xFF,
-                transaction_id & 0xFF,
-                (protocol_id >> 8) & 0xFF,
-                protocol_id & 0xFF,
-                (length >> 8) & 0xFF,
-                length & 0xFF,
-                unit_id,
-            ])
-            
-            full_request = mbap_header + pdu
-            self.message_capture.add_tx(full_request)
-        except Exception as e:
-            pass
+    async def _read(self, func_code: int, slave_id: int, address: int, count: int) -> list:
+        """按功能码读取 (FC1-4)，异常应答或失败时返回空列表"""
+        if not self.connected or not self.client:
+            return []
 
-    def _capture_response(self, response: ModbusResponse, request: ModbusRequest):
-        """捕获响应报文"""
         try:
-            if not self.message_capture:
-                return
-
-            if response:
-                # 构造响应 PDU
-                response_pdu = bytes([response.function_code]) + response.encode()
-                
-                # 构造模拟的 MBAP 头部
-                transaction_id = 0
-                protocol_id = 0x0000
-                length = len(response_pdu) + 1
-                unit_id = request.slave_id
+            self.last_exception_code, values = await self.client.read(func_code, slave_id, address, count)
+        except ModbusException as e:
+            if self.log:
+                self.log.error(f"Modbus 异常: {e}")
+            return []
+        if self.last_exception_code and self.log:
+            self.log.error(f"读取错误: 功能码 {func_code}, 异常码 {self.last_exception_code}")
+        return values
 
-                response_mbap_header = bytearray([
-                    (transaction_id >> 8) & 0xFF,
-                    transaction_id & 0xFF,
-                    (protocol_id >> 8) & 0xFF,
-                    protocol_id & 0xFF,
-                    (length >> 8) & 0xFF,
-                    length & 0xFF,
-                    unit_id,
-                ])
-                
-                full_response = response_mbap_header + response_pdu
-                self.message_capture.add_rx(full_response)
-        except Exception as e:
-            pass
+    async def _write(self, func_code: int, slave_id: int, address: int, value) -> bool:
+        """按功能码写入 (FC5/6/15/16)，返回是否成功"""
+        if not self.connected or not self.client:
+            return False
 
-    # ===== 标准 Modbus 操作 =====
+        try:
+            if func_code in (5, 6):
+                self.last_exception_code = await self.client.write_single(func_code, slave_id, address, value)
+            else:
+                self.last_exception_code = await self.client.write_multiple(func_code, slave_id, address, value)
+        except ModbusException as e:
+            if self.log:
+                self.log.error(f"Modbus 写入异常: {e}")
+            return False
+        return not self.last_exception_code
 
     async def read_holding_registers(
         self, slave_id: int, address: int, count: int = 1
@@ -162,178 +148,49 @@ class AsyncModbusClient:
             if self.log:
                 self.log.error("客户端未连接")
             return []
-
-        try:
-            request = ReadHoldingRegistersRequest(address, count, slave=slave_id)
-            self._capture_request(request)
-            
-            response = await self.client.execute(request)
-            
-            self._capture_response(response, request)
-
-            if not response.isError():
-                return response.registers
-            else:
-                if self.log:
-                    self.log.error(f"读取保持寄存器错误: {response}")
-                return []
-        except ModbusException as e:
-            if self.log:
-                self.log.error(f"Modbus 异常: {e}")
-            return []
+        return await self._read(3, slave_id, address, count)
 
     async def read_input_registers(
         self, slave_id: int, address: int, count: int = 1
     ) -> List[int]:
         """异步读取输入寄存器"""
-        if not self.connected or not self.client:
-            return []
-
-        try:
-            request = ReadInputRegistersRequest(address, count, slave=slave_id)
-            self._capture_request(request)
-
-            response = await self.client.execute(request)
-            
-            self._capture_response(response, request)
-
-            if not response.isError():
-                return response.registers
-            return []
-        except ModbusException as e:
-            if self.log:
-                self.log.error(f"Modbus 异常: {e}")
-            return []
+        return await self._read(4, slave_id, address, count)
 
     async def read_coils(
         self, slave_id: int, address: int, count: int = 1
     ) -> List[bool]:
         """异步读取线圈"""
-        if not self.connected or not self.client:
-            return []
-
-        try:
-            request = ReadCoilsRequest(address, count, slave=slave_id)
-            self._capture_request(request)
-
-            response = await self.client.execute(request)
-            
-            self._capture_response(response, request)
-
-            if not response.isError():
-                return response.bits[:count]
-            return []
-        except ModbusException as e:
-            if self.log:
-                self.log.error(f"Modbus 异常: {e}")
-            return []
+        return await self._read(1, slave_id, address, count)
 
     async def read_discrete_inputs(
         self, slave_id: int, address: int, count: int = 1
     ) -> List[bool]:
         """异步读取离散输入"""
-        if not self.connected or not self.client:
-            return []
-
-        try:
-            request = ReadDiscreteInputsRequest(address, count, slave=slave_id)
-            self._capture_request(request)
-
-            response = await self.client.execute(request)
-            
-            self._capture_response(response, request)
-
-            if not response.isError():
-                return response.bits[:count]
-            return []
-        except ModbusException as e:
-            if self.log:
-                self.log.error(f"Modbus 异常: {e}")
-            return []
+        return await self._read(2, slave_id, address, count)
 
     async def write_register(
         self, slave_id: int, address: int, value: int
     ) -> bool:
         """异步写入单个寄存器"""
-        if not self.connected or not self.client:
-            return False
-
-        try:
-            request = WriteSingleRegisterRequest(address, value, slave=slave_id)
-            self._capture_request(request)
-
-            response = await self.client.execute(request)
-            
-            self._capture_response(response, request)
-
-            return not response.isError()
-        except ModbusException as e:
-            if self.log:
-                self.log.error(f"Modbus 写入异常: {e}")
-            return False
+        return await self._write(6, slave_id, address, value)
 
     async def write_registers(
         self, slave_id: int, address: int, values: List[int]
     ) -> bool:
         """异步写入多个寄存器"""
-        if not self.connected or not self.client:
-            return False
-
-        try:
-            request = WriteMultipleRegistersRequest(address, values, slave=slave_id)
-            self._capture_request(request)
-
-            response = await self.client.execute(request)
-            
-            self._capture_response(response, request)
-
-            return not response.isError()
-        except ModbusException as e:
-            if self.log:
-                self.log.error(f"Modbus 写入异常: {e}")
-            return False
+        return await self._write(16, slave_id, address, values)
 
     async def write_coil(
         self, slave_id: int, address: int, value: bool
     ) -> bool:
         """异步写入单个线圈"""
-        if not self.connected or not self.client:
-            return False
-            
-        try:
-            request = WriteSingleCoilRequest(address, value, slave=slave_id)
-            self._capture_request(request)
-
-            response = await self.client.execute(request)
-            
-            self._capture_response(response, request)
-
-            return not response.isError()
-        except ModbusException as e:
-            if self.log:
-                self.log.error(f"Modbus 写入异常: {e}")
-            return False
+        return await self._write(5, slave_id, address, value)
 
     async def write_coils(
         self, slave_id: int, address: int, values: List[bool]
     ) -> bool:
         """异步写入多个线圈"""
-        if not self.connected or not self.client:
-            return False
-
-        try:
-            request = WriteMultipleCoilsRequest(address, values, slave=slave_id)
-            self._capture_request(request)
-
-            response = await self.client.execute(request)
-            
-            self._capture_response(response, request)
-
-            return not response.isError()
-        except ModbusException as e:
-            if self.log:
-                self.log.error(f"Modbus 写入异常: {e}")
-            return False
+        return await self._write(15, slave_id, address, values)
 
     async def read_value_by_address(
         self,
@@ -348,52 +205,26 @@ class AsyncModbusClient:
         if not self.connected:
             return None
 
-        # 获取解析码完整信息
-        info = Decode.get_info(decode)
-        register_cnt = info.register_cnt
-
-        values = None
-        registers = None
-
-        # 读取寄存器值
-        # 读取寄存器值
-        if func_code == 1 or func_code == 5 or func_code == 15:  # 读取线圈
-            values = await self.read_coils(slave_id, address, register_cnt)
-            if not values:
-                return None
-            return values[0]
-        elif func_code == 2:  # 读取离散输入
-            values = await self.read_discrete_inputs(slave_id, address, register_cnt)
-            if not values:
-                return None
-            return values[0]
-        elif func_code == 3 or func_code == 6 or func_code == 16:  # 读取保持寄存器
-            registers = await self.read_holding_registers(slave_id, address, register_cnt)
+        if func_code in (1, 5, 15):  # 读取线圈
+            values = await self.read_coils(slave_id, address, 1)
+            return values[0] if values else None
+        if func_code == 2:  # 读取离散输入
+            values = await self.read_discrete_inputs(slave_id, address, 1)
+            return values[0] if values else None
+        if func_code in (3, 6, 16):  # 读取保持寄存器
+            read_func = 3
         elif func_code == 4:  # 读取输入寄存器
-            registers = await self.read_input_registers(slave_id, address, register_cnt)
+            read_func = 4
         else:
             if self.log:
                 self.log.error(f"Unsupported function code: {func_code}")
             return None
 
+        registers = await self._read(read_func, slave_id, address, Decode.get_info(decode).register_cnt)
         if not registers:
             return None
-
-        # 将寄存器值打包为字节
-        if register_cnt == 4:  # 64位
-            packed = struct.pack(">HHHH" if info.is_big_endian else "<HHHH", *registers)
-        elif register_cnt == 2:  # 32位
-            packed = struct.pack(">HH" if info.is_big_endian else "<HH", *registers)
-        else:  # 16位
-            value = registers[0]
-            if not info.is_big_endian:  # 小端序处理
-                value = ((value & 0xFF) << 8) | ((value >> 8) & 0xFF)
-            if info.is_signed and value > 0x7FFF:
-                value -= 0x10000
-            return value
-        
-        # 使用统一的解包方法
-        return Decode.unpack_value(info.pack_format, packed)
+        # 按解析码缓存的解码函数
+        return register_codec(decode)(registers)
 
     async def write_value_by_address(
         self,
@@ -409,25 +240,8 @@ class AsyncModbusClient:
         if not self.connected:
             return False
 
-        # 获取解析码完整信息
-        info = Decode.get_info(decode)
-        register_cnt = info.register_cnt
-        
-        # 使用统一的打包方法
-        packed = Decode.pack_value(info.pack_format, value)
-        
-        # 将打包后的字节转换为寄存器值列表
-        if register_cnt == 4:  # 64位
-            registers = list(struct.unpack(">HHHH" if info.is_big_endian else "<HHHH", packed))
-        elif register_cnt == 2:  # 32位
-            registers = list(struct.unpack(">HH" if info.is_big_endian else "<HH", packed))
-        else:  # 16位
-            val = int(value)
-            if info.is_signed and val < 0:
-                val = (1 << 16) + val
-            registers = [val & 0xFFFF]
-            if not info.is_big_endian:  # 小端序处理
-                registers[0] = ((registers[0] & 0xFF) << 8) | ((registers[0] >> 8) & 0xFF)
+        # 按解析码缓存的编码函数
+        registers = register_encoder(decode)(value)
 
         # 写入寄存器值
         if func_code in [5, 15]:  # 线圈操作
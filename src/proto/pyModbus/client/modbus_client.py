@@ -58,6 +58,7 @@ class ModbusClient:
         self.client = None
         self.connected = False
         self.log = log
+        self.last_exception_code: int = 0  # 最近一次读写的 Modbus 异常码 (0 表示无异常)
         self.message_capture = MessageCapture() # 报文捕获器
 
     def getCapturedMessages(self, limit: int = 100):
@@ -166,6 +167,7 @@ class ModbusClient:
 
         try:
             response = self.client.read_coils(address, count, slave=slave_id)
+            self.last_exception_code = getattr(response, "exception_code", 0) if response.isError() else 0
             if not response.isError():
                 return response.bits[:count]
             else:
@@ -200,6 +202,7 @@ class ModbusClient:
 
         try:
             response = self.client.read_discrete_inputs(address, count, slave=slave_id)
+            self.last_exception_code = getattr(response, "exception_code", 0) if response.isError() else 0
             if not response.isError():
                 return response.bits[:count]
             else:
@@ -244,6 +247,7 @@ class ModbusClient:
             response = self.client.read_holding_registers(
                 address, count, slave=slave_id
             )
+            self.last_exception_code = getattr(response, "exception_code", 0) if response.isError() else 0
             if not response.isError():
                 return response.registers
             else:
@@ -281,6 +285,7 @@ class ModbusClient:
 
         try:
             response = self.client.read_input_registers(address, count, slave=slave_id)
+            self.last_exception_code = getattr(response, "exception_code", 0) if response.isError() else 0
             if not response.isError():
                 return response.registers
             else:
@@ -316,6 +321,7 @@ class ModbusClient:
 
         try:
             response = self.client.write_coil(address, value, slave=slave_id)
+            self.last_exception_code = getattr(response, "exception_code", 0) if response.isError() else 0
             return not response.isError()
         except ModbusException as e:
             if self.log:
@@ -344,6 +350,7 @@ class ModbusClient:
 
         try:
             response = self.client.write_register(address, value, slave=slave_id)
+            self.last_exception_code = getattr(response, "exception_code", 0) if response.isError() else 0
             return not response.isError()
         except ModbusException as e:
             if self.log:
@@ -374,6 +381,7 @@ class ModbusClient:
 
         try:
             response = self.client.write_coils(address, values, slave=slave_id)
+            self.last_exception_code = getattr(response, "exception_code", 0) if response.isError() else 0
             return not response.isError()
         except ModbusException as e:
             if self.log:
@@ -404,6 +412,7 @@ class ModbusClient:
 
         try:
             response = self.client.write_registers(address, values, slave=slave_id)
+            self.last_exception_code = getattr(response, "exception_code", 0) if response.isError() else 0
             return not response.isError()
         except ModbusException as e:
             if self.log:
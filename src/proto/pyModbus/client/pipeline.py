@@ -0,0 +1,284 @@
+"""
+Modbus TCP 流水线连接
+在一条 TCP 连接上同时保持多个在途请求，按 MBAP 事务号匹配应答。
+单个事务超时只放弃该事务而不断开连接，迟到的应答按未知事务丢弃。
+
+读写线圈/寄存器使用精简路径：请求帧 (MBAP + PDU) 由预编译的 struct 一次打包，
+应答直接从收到的字节解析，不构造 pymodbus 请求/应答对象；报文捕获直接记录收发的原始帧。
+"""
+
+import asyncio
+import struct
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+from pymodbus.factory import ClientDecoder
+from pymodbus.pdu import ModbusRequest, ModbusResponse
+
+# MBAP 头部：事务号、协议号、长度、单元号
+_MBAP = struct.Struct(">HHHB")
+_MBAP_SIZE = _MBAP.size
+
+# 完整请求帧：MBAP + 功能码 + 地址 + 数量/值 (读请求、写单个线圈/寄存器)
+_ADDRESS_FRAME = struct.Struct(">HHHBBHH")
+# 写多个线圈/寄存器的帧头：MBAP + 功能码 + 起始地址 + 数量 + 字节数
+_MULTI_WRITE_HEAD = struct.Struct(">HHHBBHHB")
+
+_REGISTER_READS = (3, 4)
+_COIL_ON = 0xFF00
+
+# 字节 -> 8 个线圈状态 (低位在前)
+_BYTE_BITS = tuple(tuple(bool(byte >> i & 1) for i in range(8)) for byte in range(256))
+
+
+@lru_cache(maxsize=None)
+def _words(count: int) -> struct.Struct:
+    """count 个大端 16 位寄存器的打包格式"""
+    return struct.Struct(f">{count}H")
+
+
+def _expire(future: asyncio.Future) -> None:
+    """应答超时：以 TimeoutError 结束仍在等待的 future"""
+    if not future.done():
+        future.set_exception(asyncio.TimeoutError())
+
+
+def _pack_bits(values: List[bool]) -> bytes:
+    """线圈状态打包为字节 (低位在前)"""
+    packed = bytearray((len(values) + 7) // 8)
+    for i, value in enumerate(values):
+        if value:
+            packed[i >> 3] |= 1 << (i & 7)
+    return bytes(packed)
+
+
+class PipelinedModbusTcpConnection(asyncio.Protocol):
+    """支持多个在途事务的 Modbus TCP 连接
+
+    接口与 pymodbus 的 AsyncModbusTcpClient 保持一致 (connect/close/connected/execute)，
+    可直接作为 AsyncModbusClient.client 使用；depth=1 时请求逐个发送。
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 502,
+        timeout: float = 1.0,
+        depth: int = 8,
+        message_capture=None,
+        log=None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout  # 单个事务的应答超时 (从发送开始计时)
+        self.depth = max(1, int(depth))
+        self.message_capture = message_capture
+        self.log = log
+        self._decoder = ClientDecoder()
+        self._transport: Optional[asyncio.Transport] = None
+        self._buffer = bytearray()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_tid = 0
+        self._slots = asyncio.Semaphore(self.depth)
+        self.stats: Dict[str, int] = {
+            "sent": 0,
+            "received": 0,
+            "timeouts": 0,
+            "unsolicited": 0,
+            "max_in_flight": 0,
+        }
+
+    # ---------- 连接管理 ----------
+
+    @property
+    def connected(self) -> bool:
+        return self._transport is not None and not self._transport.is_closing()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def connect(self) -> bool:
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(
+                loop.create_connection(lambda: self, self.host, self.port), timeout=self.timeout
+            )
+            return True
+        except (OSError, asyncio.TimeoutError) as e:
+            if self.log:
+                self.log.error(f"流水线连接失败 {self.host}:{self.port}: {e}")
+            return False
+
+    def close(self) -> None:
+        if self._transport:
+            self._transport.close()
+
+    def set_depth(self, depth: int) -> None:
+        """调整最大在途请求数 (已在途的请求不受影响)"""
+        self.depth = max(1, int(depth))
+        self._slots = asyncio.Semaphore(self.depth)
+
+    def summary(self) -> dict:
+        return {"depth": self.depth, "in_flight": self.in_flight, "timeout": self.timeout, **self.stats}
+
+    # ---------- asyncio.Protocol ----------
+
+    def connection_made(self, transport) -> None:
+        self._transport = transport
+        self._buffer.clear()
+
+    def connection_lost(self, exc) -> None:
+        self._transport = None
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionException("Connection lost during request"))
+
+    def data_received(self, data: bytes) -> None:
+        buffer = self._buffer
+        buffer += data
+        while len(buffer) >= _MBAP_SIZE:
+            tid, _, length, unit = _MBAP.unpack_from(buffer)
+            size = 6 + length
+            if len(buffer) < size:
+                break
+            frame = bytes(buffer[:size])
+            del buffer[:size]
+            self._dispatch(tid, frame)
+
+    def _dispatch(self, tid: int, frame: bytes) -> None:
+        """按事务号把应答帧交给等待中的请求 (由请求方解析)"""
+        if self.message_capture:
+            self.message_capture.add_rx(frame)
+        future = self._pending.pop(tid, None)
+        if future is None or future.done():
+            self.stats["unsolicited"] += 1
+            return
+        self.stats["received"] += 1
+        future.set_result(frame)
+
+    # ---------- 请求 ----------
+
+    def _allocate_tid(self) -> int:
+        for _ in range(0x10000):
+            self._next_tid = (self._next_tid + 1) & 0xFFFF
+            if self._next_tid not in self._pending:
+                return self._next_tid
+        raise ModbusIOException("没有可用的事务号")
+
+    async def _transact(self, build_frame: Callable[[int], bytes]) -> bytes:
+        """按事务号发送一帧并等待应答帧，在途请求数达到上限时排队
+
+        Args:
+            build_frame: 根据事务号生成完整请求帧的函数
+        """
+        async with self._slots:
+            if not self.connected:
+                raise ConnectionException("Client is not connected")
+            tid = self._allocate_tid()
+            frame = build_frame(tid)
+
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[tid] = future
+            if self.message_capture:
+                self.message_capture.add_tx(frame)
+            self._transport.write(frame)
+            self.stats["sent"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], len(self._pending))
+
+            # 直接在 future 上挂超时定时器，省去 wait_for 每次包装任务的开销
+            timer = loop.call_later(self.timeout, _expire, future)
+            try:
+                return await future
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                raise ModbusIOException(f"事务 {tid} 等待应答超时 ({self.timeout}s)")
+            finally:
+                timer.cancel()
+                if self._pending.get(tid) is future:
+                    del self._pending[tid]
+
+    async def execute(self, request: ModbusRequest) -> ModbusResponse:
+        """发送 pymodbus 请求对象并解析应答 (通用路径，支持任意功能码)"""
+        pdu = bytes([request.function_code]) + request.encode()
+
+        def build_frame(tid: int) -> bytes:
+            request.transaction_id = tid
+            return _MBAP.pack(tid, 0, len(pdu) + 1, request.slave_id) + pdu
+
+        frame = await self._transact(build_frame)
+        tid, _, _, unit = _MBAP.unpack_from(frame)
+        try:
+            response = self._decoder.decode(frame[_MBAP_SIZE:])
+        except Exception as e:
+            response = None
+            if self.log:
+                self.log.debug(f"无法解析事务 {tid} 的应答: {e}")
+        if response is None:
+            raise ModbusIOException(f"无法解析事务 {tid} 的应答")
+        response.transaction_id = tid
+        response.slave_id = unit
+        return response
+
+    async def read(self, func_code: int, slave_id: int, address: int, count: int) -> Tuple[int, list]:
+        """读取线圈/离散输入/保持寄存器/输入寄存器 (FC1-4)
+
+        Returns:
+            (异常码, 值列表)，异常应答时值列表为空
+        """
+        frame = await self._transact(
+            lambda tid: _ADDRESS_FRAME.pack(tid, 0, 6, slave_id, func_code, address, count)
+        )
+        exception_code = self._exception_code(frame, func_code)
+        if exception_code:
+            return exception_code, []
+        byte_count = frame[8]
+        if func_code in _REGISTER_READS:
+            if byte_count != count * 2 or len(frame) < 9 + byte_count:
+                raise ModbusIOException(f"应答长度不匹配: 期望 {count * 2} 字节，实际 {byte_count} 字节")
+            return 0, list(_words(count).unpack_from(frame, 9))
+        if byte_count * 8 < count or len(frame) < 9 + byte_count:
+            raise ModbusIOException(f"应答长度不匹配: {count} 个数据点，实际 {byte_count} 字节")
+        bits: List[bool] = []
+        for byte in frame[9:9 + byte_count]:
+            bits.extend(_BYTE_BITS[byte])
+        del bits[count:]
+        return 0, bits
+
+    async def write_single(self, func_code: int, slave_id: int, address: int, value) -> int:
+        """写单个线圈 (FC5) / 单个寄存器 (FC6)，返回异常码 (0 表示成功)"""
+        word = (_COIL_ON if value else 0) if func_code == 5 else int(value) & 0xFFFF
+        frame = await self._transact(
+            lambda tid: _ADDRESS_FRAME.pack(tid, 0, 6, slave_id, func_code, address, word)
+        )
+        return self._exception_code(frame, func_code)
+
+    async def write_multiple(self, func_code: int, slave_id: int, address: int, values: list) -> int:
+        """写多个线圈 (FC15) / 多个寄存器 (FC16)，返回异常码 (0 表示成功)"""
+        count = len(values)
+        data = _pack_bits(values) if func_code == 15 else _words(count).pack(*values)
+        size = len(data)
+
+        def build_frame(tid: int) -> bytearray:
+            frame = bytearray(_MULTI_WRITE_HEAD.size + size)
+            _MULTI_WRITE_HEAD.pack_into(frame, 0, tid, 0, 7 + size, slave_id, func_code, address, count, size)
+            frame[_MULTI_WRITE_HEAD.size:] = data
+            return frame
+
+        frame = await self._transact(build_frame)
+        return self._exception_code(frame, func_code)
+
+    @staticmethod
+    def _exception_code(frame: bytes, func_code: int) -> int:
+        """应答帧的异常码 (0 表示正常应答)"""
+        if len(frame) < _MBAP_SIZE + 2:
+            raise ModbusIOException("应答帧过短")
+        response_code = frame[7]
+        if response_code == func_code | 0x80:
+            return frame[8]
+        if response_code != func_code:
+            raise ModbusIOException(f"应答功能码不匹配: 请求 {func_code}，应答 {response_code}")
+        return 0
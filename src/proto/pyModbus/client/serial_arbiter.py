@@ -0,0 +1,301 @@
+"""
+Modbus RTU 串口仲裁
+同步 ModbusClient 的读写原本各自在线程池中执行，自动读取、界面手动读取、计算驱动的写入
+会无序地争用同一个串口。SerialArbiter 持有该串口上唯一的客户端连接，由一个工作线程独占执行：
+同一串口上的各设备共用这个连接，作业按优先级排队 (写优先于读)，相邻两次事务之间保证 t3.5 帧间隔，
+排队中同一从站、同一数据表的读请求合并为一次块读取，再按地址拆分给各请求方。
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from src.device.core.data.read_planner import func_code_table, protocol_max_count
+from src.proto.pyModbus.server.rtu_framing import frame_gap
+
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+
+# 块读取函数: (功能码, 从站地址, 起始地址, 数量) -> 值列表 (失败时为空列表)
+BlockReader = Callable[[int, int, int, int], list]
+
+
+@dataclass(order=True)
+class _Job:
+    """排队中的串口作业，按 (优先级, 入队顺序) 出队"""
+    priority: int
+    seq: int
+    future: Future = field(compare=False, default_factory=Future)
+    call: Optional[Callable[[], Any]] = field(compare=False, default=None)
+    # 以下为读作业字段，reader 为 None 表示普通作业
+    reader: Optional[BlockReader] = field(compare=False, default=None)
+    func_code: int = field(compare=False, default=0)
+    slave_id: int = field(compare=False, default=0)
+    address: int = field(compare=False, default=0)
+    count: int = field(compare=False, default=0)
+
+    @property
+    def batch_key(self) -> tuple:
+        """可合并读取的作业具有相同的读取函数、从站和数据表"""
+        return (self.reader, self.slave_id, func_code_table(self.func_code))
+
+
+class SerialArbiter:
+    """一个串口对应一个仲裁器，由唯一的工作线程执行该串口上的所有事务
+
+    Args:
+        port: 串口名
+        baudrate: 波特率 (用于计算 t3.5 帧间隔)
+        max_gap: 合并读取时允许跨越的最大空地址数，0 表示只合并相邻或重叠的请求
+    """
+
+    def __init__(self, port: str, baudrate: int = 9600, max_gap: int = 0, logger=None) -> None:
+        self.port = port
+        self.gap = frame_gap(baudrate)
+        self.max_gap = max(0, int(max_gap))
+        self._logger = logger
+        self.client = None  # 串口上唯一的客户端连接，由各使用者共用
+        self.owners: Set[int] = set()
+        self._heap: List[_Job] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._bus_free_at = 0.0
+        self.stats: Dict[str, int] = {
+            "transactions": 0,
+            "writes": 0,
+            "reads": 0,
+            "merged_reads": 0,
+            "max_queue": 0,
+        }
+
+    # ---------- 启停 ----------
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        """启动工作线程 (已在运行时直接返回)"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=f"serial_arbiter_{self.port}", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """停止工作线程，取消尚未执行的作业 (正在执行的事务会先完成)"""
+        with self._cond:
+            self._running = False
+            pending, self._heap = self._heap, []
+            self._cond.notify_all()
+        for job in pending:
+            job.future.cancel()
+        thread, self._thread = self._thread, None
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+
+    # ---------- 提交作业 ----------
+
+    def submit(self, call: Callable[[], Any], priority: int = PRIORITY_READ) -> Future:
+        """提交一个独占串口执行的调用"""
+        return self._put(_Job(priority, next(self._seq), call=call))
+
+    def submit_write(self, call: Callable[[], Any]) -> Future:
+        """提交写作业，排在所有读作业之前"""
+        return self.submit(call, PRIORITY_WRITE)
+
+    def submit_read(self, reader: BlockReader, func_code: int, slave_id: int, address: int, count: int) -> Future:
+        """提交块读取作业，可能与排队中的相邻读取合并为一次请求"""
+        return self._put(
+            _Job(
+                PRIORITY_READ,
+                next(self._seq),
+                reader=reader,
+                func_code=int(func_code),
+                slave_id=int(slave_id),
+                address=int(address),
+                count=int(count),
+            )
+        )
+
+    def open_client(self) -> Future:
+        """在工作线程中打开共用的客户端连接 (已连接时直接返回 True)"""
+        return self.submit(self._open_client, PRIORITY_WRITE)
+
+    def _open_client(self) -> bool:
+        if self.client is None:
+            return False
+        if self.client.is_connected():
+            return True
+        return bool(self.client.connect())
+
+    def _put(self, job: _Job) -> Future:
+        with self._cond:
+            if not self._running:
+                job.future.set_exception(RuntimeError(f"串口 {self.port} 仲裁器未运行"))
+                return job.future
+            heapq.heappush(self._heap, job)
+            self.stats["max_queue"] = max(self.stats["max_queue"], len(self._heap))
+            self._cond.notify()
+        return job.future
+
+    def _take(self) -> Optional[List[_Job]]:
+        """取出下一个作业；读作业连同排队中可合并的读作业一起取出"""
+        with self._cond:
+            while self._running and not self._heap:
+                self._cond.wait()
+            if not self._running:
+                return None
+            job = heapq.heappop(self._heap)
+            if job.reader is None:
+                return [job]
+            key = job.batch_key
+            batch = [job]
+            remaining = []
+            for other in self._heap:
+                if other.reader is not None and other.batch_key == key:
+                    batch.append(other)
+                else:
+                    remaining.append(other)
+            if len(batch) > 1:
+                heapq.heapify(remaining)
+                self._heap = remaining
+            return batch
+
+    # ---------- 工作线程 ----------
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            if batch[0].reader is None:
+                self._execute(batch[0])
+            else:
+                for span in self._plan(batch):
+                    self._read_span(span)
+
+    def _transact(self, call: Callable[[], Any]) -> Any:
+        """执行一次串口事务，与上一帧之间至少间隔 t3.5"""
+        delay = self._bus_free_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            return call()
+        finally:
+            self._bus_free_at = time.monotonic() + self.gap
+            self.stats["transactions"] += 1
+
+    def _execute(self, job: _Job) -> None:
+        if not job.future.set_running_or_notify_cancel():
+            return
+        if job.priority == PRIORITY_WRITE:
+            self.stats["writes"] += 1
+        try:
+            job.future.set_result(self._transact(job.call))
+        except Exception as e:
+            job.future.set_exception(e)
+
+    def _plan(self, jobs: List[_Job]) -> List[List[_Job]]:
+        """按地址把读作业划分为若干次块读取 (不超过协议单次最大数量)"""
+        limit = protocol_max_count(jobs[0].func_code)
+        spans: List[List[_Job]] = []
+        start = end = 0
+        for job in sorted(jobs, key=lambda j: (j.address, j.count)):
+            job_end = job.address + job.count
+            if spans and job.address <= end + self.max_gap and max(end, job_end) - start <= limit:
+                spans[-1].append(job)
+                end = max(end, job_end)
+            else:
+                spans.append([job])
+                start, end = job.address, job_end
+        return spans
+
+    def _read_span(self, jobs: List[_Job]) -> None:
+        """执行一次块读取并把结果按地址拆分给各作业"""
+        jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+        if not jobs:
+            return
+        start = min(job.address for job in jobs)
+        count = max(job.address + job.count for job in jobs) - start
+        first = jobs[0]
+        try:
+            values = self._transact(lambda: first.reader(first.func_code, first.slave_id, start, count))
+        except Exception as e:
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+        self.stats["reads"] += 1
+
+        if len(values) < count and len(jobs) > 1:
+            # 合并范围内有从站不支持的地址时整块失败，退回逐个读取
+            for job in jobs:
+                try:
+                    job.future.set_result(
+                        self._transact(lambda: job.reader(job.func_code, job.slave_id, job.address, job.count))
+                    )
+                except Exception as e:
+                    job.future.set_exception(e)
+                self.stats["reads"] += 1
+            return
+
+        self.stats["merged_reads"] += len(jobs) - 1
+        for job in jobs:
+            offset = job.address - start
+            job.future.set_result(list(values[offset:offset + job.count]) if values else [])
+
+    def summary(self) -> dict:
+        with self._cond:
+            queued = len(self._heap)
+        return {
+            "port": self.port,
+            "running": self._running,
+            "gap_ms": round(self.gap * 1000, 3),
+            "max_gap": self.max_gap,
+            "queued": queued,
+            "owners": len(self.owners),
+            **self.stats,
+        }
+
+
+# 串口名 -> 仲裁器
+_arbiters: Dict[str, SerialArbiter] = {}
+_arbiters_lock = threading.Lock()
+
+
+def acquire_arbiter(
+    port: str, owner: Any, create_client: Optional[Callable[[], Any]] = None, **kwargs
+) -> SerialArbiter:
+    """获取 (或创建) 串口对应的仲裁器并登记使用者，已有仲裁器时沿用其参数和客户端连接"""
+    with _arbiters_lock:
+        arbiter = _arbiters.get(port)
+        if arbiter is None:
+            arbiter = _arbiters[port] = SerialArbiter(port, **kwargs)
+            arbiter.client = create_client() if create_client else None
+        arbiter.owners.add(id(owner))
+    arbiter.start()
+    return arbiter
+
+
+def release_arbiter(arbiter: SerialArbiter, owner: Any) -> None:
+    """注销使用者，串口上没有使用者时停止仲裁器并关闭串口"""
+    with _arbiters_lock:
+        arbiter.owners.discard(id(owner))
+        if arbiter.owners:
+            return
+        if _arbiters.get(arbiter.port) is arbiter:
+            del _arbiters[arbiter.port]
+    arbiter.stop()
+    if arbiter.client is not None:
+        arbiter.client.disconnect()
+
+
+def get_arbiter(port: str) -> Optional[SerialArbiter]:
+    return _arbiters.get(port)
@@ -0,0 +1,102 @@
+"""
+严格地址表模式
+按从站、按数据表预计算测点覆盖的地址位图，越界请求直接返回 ILLEGAL DATA ADDRESS (0x02)
+"""
+
+from typing import Dict, Iterable, Optional
+
+from pymodbus.datastore import ModbusSlaveContext
+
+from src.enums.modbus_register import Decode
+
+
+# 功能码 -> 数据表标识 (与 pymodbus ModbusSlaveContext 保持一致)
+_FUNC_CODE_TABLE: Dict[int, str] = {2: "d", 4: "i"}
+_FUNC_CODE_TABLE.update({fc: "h" for fc in (3, 6, 10, 16, 22, 23)})
+_FUNC_CODE_TABLE.update({fc: "c" for fc in (1, 5, 15)})
+
+# 位表 (线圈/离散输入) 每个测点只占一个地址
+_BIT_TABLES = ("c", "d")
+
+
+class AddressMap:
+    """从站地址位图
+
+    每个 (slave_id, table) 使用一个 Python 大整数作为 65536 位的位图，
+    第 n 位为 1 表示地址 n 被某个已配置测点覆盖。
+    """
+
+    def __init__(self) -> None:
+        self._bitmaps: Dict[int, Dict[str, int]] = {}
+
+    @staticmethod
+    def table_of(func_code: int) -> Optional[str]:
+        """获取功能码对应的数据表标识"""
+        return _FUNC_CODE_TABLE.get(int(func_code))
+
+    def clear(self) -> None:
+        """清空所有位图"""
+        self._bitmaps = {}
+
+    def mark(self, slave_id: int, func_code: int, address: int, count: int = 1) -> None:
+        """标记 [address, address + count) 为有效地址"""
+        table = self.table_of(func_code)
+        if table is None or count <= 0:
+            return
+        tables = self._bitmaps.setdefault(int(slave_id), {})
+        tables[table] = tables.get(table, 0) | (((1 << count) - 1) << int(address))
+
+    def mark_point(self, point) -> None:
+        """按测点的从站、功能码、地址与寄存器数标记位图"""
+        table = self.table_of(point.func_code)
+        if table is None:
+            return
+        count = 1 if table in _BIT_TABLES else Decode.get_info(point.decode).register_cnt
+        self.mark(point.rtu_addr, point.func_code, point.address, count)
+
+    def rebuild(self, points: Iterable) -> None:
+        """根据测点列表重建全部位图"""
+        self.clear()
+        for point in points:
+            if hasattr(point, "func_code") and hasattr(point, "rtu_addr"):
+                self.mark_point(point)
+
+    def is_covered(self, slave_id: int, table: str, address: int, count: int = 1) -> bool:
+        """检查 [address, address + count) 是否全部被测点覆盖"""
+        bitmap = self._bitmaps.get(slave_id, {}).get(table, 0)
+        if not bitmap or address < 0 or count <= 0:
+            return False
+        mask = (1 << count) - 1
+        return (bitmap >> address) & mask == mask
+
+    def covered_count(self, slave_id: int, table: str) -> int:
+        """获取某从站某数据表的有效地址数量"""
+        return bin(self._bitmaps.get(slave_id, {}).get(table, 0)).count("1")
+
+    def summary(self) -> Dict[int, Dict[str, int]]:
+        """获取各从站各数据表的有效地址数量"""
+        return {
+            slave_id: {table: bin(bitmap).count("1") for table, bitmap in tables.items()}
+            for slave_id, tables in self._bitmaps.items()
+        }
+
+
+class StrictSlaveContext(ModbusSlaveContext):
+    """支持严格地址表模式的从站上下文
+
+    pymodbus 的请求在访问数据存储前会先调用 validate()，
+    校验失败时直接回复异常码 0x02，因此在这里做位图检查即可。
+    """
+
+    def __init__(self, slave_id: int, address_map: AddressMap, **kwargs):
+        super().__init__(**kwargs)
+        self.slave_id = slave_id
+        self.address_map = address_map
+        self.strict = False
+
+    def validate(self, fc_as_hex, address, count=1):
+        if self.strict and not self.address_map.is_covered(
+            self.slave_id, self.decode(fc_as_hex), address, count
+        ):
+            return False
+        return super().validate(fc_as_hex, address, count)
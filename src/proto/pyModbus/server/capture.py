@@ -1,33 +1,120 @@
+import asyncio
+from time import monotonic, perf_counter
+
 from pymodbus.framer.socket_framer import ModbusSocketFramer
 from pymodbus.framer.rtu_framer import ModbusRtuFramer
+from pymodbus.logging import Log
+
+from .rtu_framing import RTU_OVER_TCP_FRAME_GAP, RtuFrameAssembler
+from .timing import RequestTimer
+
+
+def _timed_process(framer, base, data, callback, args, kwargs):
+    """计时执行 processIncomingPacket (未启用统计时直接透传)"""
+    timer = framer._timer
+    if timer is None or timer.stats is None:
+        return base.processIncomingPacket(framer, data, callback, *args, **kwargs)
+    timer.start(perf_counter())
+    return base.processIncomingPacket(
+        framer, data, timer.wrap(callback, perf_counter), *args, **kwargs
+    )
+
 
-def CreateCaptureSocketFramer(message_capture):
+def _timed_build(framer, base, message):
+    """计时执行 buildPacket"""
+    timer = framer._timer
+    if timer is None or timer.stats is None:
+        return base.buildPacket(framer, message)
+    start = perf_counter()
+    data = base.buildPacket(framer, message)
+    timer.mark_build(start, perf_counter())
+    return data
+
+
+def CreateCaptureSocketFramer(message_capture, timing_stats=None):
     class CaptureSocketFramer(ModbusSocketFramer):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._timer = RequestTimer(timing_stats)
+
         def processIncomingPacket(self, data, callback, *args, **kwargs):
             if data and message_capture:
                 message_capture.add_rx(data)
-            return super().processIncomingPacket(data, callback, *args, **kwargs)
+            return _timed_process(self, ModbusSocketFramer, data, callback, args, kwargs)
 
         def buildPacket(self, message):
-            data = super().buildPacket(message)
+            data = _timed_build(self, ModbusSocketFramer, message)
             if data and message_capture:
                 message_capture.add_tx(data)
             return data
     return CaptureSocketFramer
 
-def CreateCaptureRtuFramer(message_capture):
+def CreateCaptureRtuFramer(message_capture, timing_stats=None, frame_gap=RTU_OVER_TCP_FRAME_GAP):
+    """创建带缓冲组帧的 RTU framer
+
+    数据块先经 RtuFrameAssembler 按帧长和 t3.5 静默拼成完整帧，
+    每帧只校验一次 CRC、只记录一条 RX 报文，再直接解码执行。
+    """
     class CaptureRtuFramer(ModbusRtuFramer):
-        def processIncomingPacket(self, data, callback, *args, **kwargs):
-            # RTU framer appends data to buffer; interception point might differ
-            # But processIncomingPacket is where data is fed.
-            # However, RTU framer might be fed byte by byte.
-            # Ideally we capture what is fed to it.
-            if data and message_capture:
-                message_capture.add_rx(data)
-            return super().processIncomingPacket(data, callback, *args, **kwargs)
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._timer = RequestTimer(timing_stats)
+            self._assembler = RtuFrameAssembler(self.decoder, frame_gap)
+            self._silence_handle = None
+
+        def processIncomingPacket(self, data, callback, slave, **kwargs):
+            if not isinstance(slave, (list, tuple)):
+                slave = [slave]
+            single = kwargs.get("single", False)
+            if self._silence_handle is not None:
+                self._silence_handle.cancel()
+                self._silence_handle = None
+            for frame, crc_ok in self._assembler.feed(data, monotonic()):
+                self._dispatch(frame, crc_ok, callback, slave, single)
+            if self._assembler.pending:
+                self._schedule_silence(callback, slave, single)
+
+        def _schedule_silence(self, callback, slave, single):
+            """t3.5 内没有新数据时把剩余数据作为一帧处理"""
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # 无事件循环时，在下一次收到数据时按静默间隔判断
+            self._silence_handle = loop.call_later(
+                self._assembler.gap, self._on_silence, callback, slave, single
+            )
+
+        def _on_silence(self, callback, slave, single):
+            self._silence_handle = None
+            for frame, crc_ok in self._assembler.flush():
+                self._dispatch(frame, crc_ok, callback, slave, single)
+
+        def _dispatch(self, frame, crc_ok, callback, slave, single):
+            if message_capture:
+                message_capture.add_rx(frame)
+            if not crc_ok:
+                Log.debug("RTU frame CRC check failed, ignoring: {}", frame, ":hex")
+                return
+            slave_id = frame[0]
+            if not (single or 0 in slave or 0xFF in slave or slave_id in slave):
+                return
+            if self._timer.stats is not None:
+                self._timer.start(perf_counter())
+                callback = self._timer.wrap(callback, perf_counter)
+            result = self.decoder.decode(frame[1:-2])
+            if result is None:
+                Log.debug("Unable to decode RTU request: {}", frame, ":hex")
+                return
+            result.slave_id = slave_id
+            result.transaction_id = slave_id
+            callback(result)
+
+        def resetFrame(self):
+            super().resetFrame()
+            self._assembler.reset()
 
         def buildPacket(self, message):
-            data = super().buildPacket(message)
+            data = _timed_build(self, ModbusRtuFramer, message)
             if data and message_capture:
                 message_capture.add_tx(data)
             return data
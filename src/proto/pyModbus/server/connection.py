@@ -0,0 +1,266 @@
+"""
+Modbus TCP 服务端连接管理
+提供按连接的统计 (请求数、收发字节、错误、最后活动时间)、
+最大连接数、空闲超时以及按连接的请求限速 (令牌桶)，
+避免单个异常主站占满事件循环影响其他连接。
+"""
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+from pymodbus.pdu import ModbusExceptions as merror
+from pymodbus.server import ModbusTcpServer
+from pymodbus.server.async_io import ModbusServerRequestHandler
+
+
+@dataclass
+class ConnectionLimits:
+    """连接限制配置 (0 表示不限制)"""
+
+    max_connections: int = 0  # 最大并发连接数
+    idle_timeout: float = 0.0  # 空闲超时 (秒)，超时后主动断开
+    max_requests_per_second: float = 0.0  # 每连接每秒最大请求数
+    burst: int = 0  # 令牌桶容量，0 时取 max(1, max_requests_per_second)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# 补充令牌时的浮点误差容限
+_EPSILON = 1e-9
+
+
+class TokenBucket:
+    """令牌桶限速器"""
+
+    def __init__(self, rate: float, capacity: float = 0) -> None:
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity > 0 else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last
+        self._last = now
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    def consume(self, now: Optional[float] = None) -> bool:
+        """尝试取出一个令牌，成功返回 True"""
+        if self.rate <= 0:
+            return True
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1 - _EPSILON:
+            self.tokens = max(self.tokens - 1, 0.0)
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """距离下一个令牌可用的时间 (秒)"""
+        if self.rate <= 0 or self.tokens >= 1 - _EPSILON:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+@dataclass
+class ConnectionStats:
+    """单个连接的统计信息"""
+
+    conn_id: int
+    peer: str
+    connected_at: float = field(default_factory=time.time)
+    last_activity: float = field(default_factory=time.time)
+    requests: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    errors: int = 0
+    throttled: int = 0
+    queue_depth: int = 0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["idle_seconds"] = round(time.time() - self.last_activity, 3)
+        return data
+
+
+class ConnectionManager:
+    """连接注册表，保存连接限制、活动连接统计和累计计数"""
+
+    def __init__(self, limits: Optional[ConnectionLimits] = None) -> None:
+        self.limits = limits or ConnectionLimits()
+        self._ids = itertools.count(1)
+        self._connections: Dict[int, ConnectionStats] = {}
+        self.total_accepted = 0
+        self.total_rejected = 0
+        self.total_idle_closed = 0
+
+    def set_limits(self, **kwargs) -> ConnectionLimits:
+        """更新连接限制，未提供的字段保持不变"""
+        for key, value in kwargs.items():
+            if value is not None and hasattr(self.limits, key):
+                setattr(self.limits, key, type(getattr(self.limits, key))(value))
+        return self.limits
+
+    def can_accept(self) -> bool:
+        """是否还能接受新连接"""
+        limit = self.limits.max_connections
+        return limit <= 0 or len(self._connections) < limit
+
+    def register(self, peer: str) -> Optional[ConnectionStats]:
+        """登记新连接，超过最大连接数时返回 None"""
+        if not self.can_accept():
+            self.total_rejected += 1
+            return None
+        stats = ConnectionStats(conn_id=next(self._ids), peer=peer)
+        self._connections[stats.conn_id] = stats
+        self.total_accepted += 1
+        return stats
+
+    def unregister(self, conn_id: int) -> None:
+        self._connections.pop(conn_id, None)
+
+    def new_bucket(self) -> Optional[TokenBucket]:
+        """按当前限制创建令牌桶，未限速时返回 None"""
+        if self.limits.max_requests_per_second <= 0:
+            return None
+        return TokenBucket(self.limits.max_requests_per_second, self.limits.burst)
+
+    @property
+    def active_count(self) -> int:
+        return len(self._connections)
+
+    def get_connections(self) -> List[ConnectionStats]:
+        return list(self._connections.values())
+
+    def summary(self) -> dict:
+        """获取连接统计汇总"""
+        return {
+            "limits": self.limits.to_dict(),
+            "active": self.active_count,
+            "total_accepted": self.total_accepted,
+            "total_rejected": self.total_rejected,
+            "total_idle_closed": self.total_idle_closed,
+            "connections": [stats.to_dict() for stats in self.get_connections()],
+        }
+
+
+class ManagedRequestHandler(ModbusServerRequestHandler):
+    """带统计与限制的连接处理器"""
+
+    def __init__(self, owner, manager: ConnectionManager):
+        super().__init__(owner)
+        self.manager = manager
+        self.stats: Optional[ConnectionStats] = None
+        self.bucket: Optional[TokenBucket] = None
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
+        self._resume_handle: Optional[asyncio.TimerHandle] = None
+
+    def callback_connected(self) -> None:
+        peername = self.transport.get_extra_info("peername") if self.transport else None
+        peer = f"{peername[0]}:{peername[1]}" if peername else "unknown"
+        self.stats = self.manager.register(peer)
+        if self.stats is None:
+            # 超过最大连接数，直接断开
+            self.transport_close()
+            return
+        self.bucket = self.manager.new_bucket()
+        super().callback_connected()
+        self._schedule_idle_check()
+
+    def callback_disconnected(self, call_exc: Exception | None) -> None:
+        for handle in (self._idle_handle, self._resume_handle):
+            if handle:
+                handle.cancel()
+        self._idle_handle = self._resume_handle = None
+        if self.stats is not None:
+            self.manager.unregister(self.stats.conn_id)
+            self.stats = None
+        super().callback_disconnected(call_exc)
+
+    def callback_data(self, data: bytes, addr: tuple | None = ()) -> int:
+        if self.stats is not None:
+            self.stats.bytes_in += len(data)
+            self.stats.last_activity = time.time()
+            self.stats.queue_depth = self.receive_queue.qsize() + 1
+        return super().callback_data(data, addr)
+
+    def execute(self, request, *addr):
+        if self.stats is not None:
+            self.stats.requests += 1
+            self.stats.queue_depth = self.receive_queue.qsize()
+        if self.bucket is not None and not self.bucket.consume():
+            # 超过限速：回复从站忙并暂停读取，由 TCP 窗口向主站施加背压
+            if self.stats is not None:
+                self.stats.throttled += 1
+            response = request.doException(merror.SlaveBusy)
+            response.transaction_id = request.transaction_id
+            response.slave_id = request.slave_id
+            self.send(response, *addr)
+            self._pause_reading(self.bucket.wait_time())
+            return
+        super().execute(request, *addr)
+
+    def send(self, message, addr, **kwargs):
+        if self.stats is not None and not kwargs.get("skip_encoding", False):
+            if message.isError():
+                self.stats.errors += 1
+        if self.transport is None:
+            return
+        super().send(message, addr, **kwargs)
+
+    def transport_send(self, data: bytes, addr: tuple | None = None) -> None:
+        if self.stats is not None:
+            self.stats.bytes_out += len(data)
+        super().transport_send(data, addr=addr)
+
+    def _pause_reading(self, delay: float) -> None:
+        if not self.transport or self._resume_handle is not None:
+            return
+        try:
+            self.transport.pause_reading()
+        except (AttributeError, RuntimeError):
+            return
+        loop = asyncio.get_running_loop()
+        self._resume_handle = loop.call_later(max(delay, 0.001), self._resume_reading)
+
+    def _resume_reading(self) -> None:
+        self._resume_handle = None
+        if self.transport:
+            try:
+                self.transport.resume_reading()
+            except (AttributeError, RuntimeError):
+                pass
+
+    def _schedule_idle_check(self) -> None:
+        timeout = self.manager.limits.idle_timeout
+        if timeout <= 0 or self.stats is None:
+            return
+        idle = time.time() - self.stats.last_activity
+        loop = asyncio.get_running_loop()
+        self._idle_handle = loop.call_later(max(timeout - idle, 0.001), self._check_idle)
+
+    def _check_idle(self) -> None:
+        self._idle_handle = None
+        if self.stats is None or not self.transport:
+            return
+        timeout = self.manager.limits.idle_timeout
+        if timeout > 0 and time.time() - self.stats.last_activity >= timeout:
+            self.manager.total_idle_closed += 1
+            self.transport_close()
+            self.callback_disconnected(None)
+            return
+        self._schedule_idle_check()
+
+
+class ManagedModbusTcpServer(ModbusTcpServer):
+    """带连接管理的 Modbus TCP 服务端"""
+
+    def __init__(self, *args, connection_manager: ConnectionManager, **kwargs):
+        self.connection_manager = connection_manager
+        super().__init__(*args, **kwargs)
+
+    def callback_new_connection(self):
+        return ManagedRequestHandler(self, self.connection_manager)
@@ -31,6 +31,10 @@ from src.device.core.message.message_capture import MessageCapture
 
 # 从子模块导入捕获Framer
 from .capture import CreateCaptureSocketFramer, CreateCaptureRtuFramer
+from .address_map import AddressMap, StrictSlaveContext
+from .connection import ConnectionLimits, ConnectionManager, ManagedModbusTcpServer
+from .timing import ProcessingTimeStats
+from .serial_bus import acquire_bus, get_bus, release_bus
 
 class ModbusServer:
     def __init__(
@@ -45,8 +49,12 @@ class ModbusServer:
         parity: str = "N",
         stopbits: int = 1,
         keep_connection: bool = True,
+        strict_address_map: bool = False,
+        connection_limits: ConnectionLimits = None,
+        name: str = "",
     ):
         self._logger = logger
+        self.name = name
         self.server = None
         self.protocol_type = protocol_type
         self.ip = "0.0.0.0"
@@ -62,7 +70,14 @@ class ModbusServer:
         self.keep_connection = keep_connection
         self.stop_event = asyncio.Event()
         self.message_capture = MessageCapture() # 报文捕获器
+        self.processing_times = ProcessingTimeStats()  # 请求处理耗时直方图
+        self.address_map = AddressMap()  # 严格地址表模式使用的地址位图
+        self.strict_address_map = strict_address_map
+        self.connection_manager = ConnectionManager(connection_limits)  # TCP 连接统计与限制
         
+        self.serial_bus = None  # RTU 模式下挂载的共享串口总线
+        self._configured_slave_ids = sorted(set(slave_id_list)) or [1]  # 设备实际配置的从站地址
+
         # 确保 slave_id_list 包含常用的从站地址 (0, 1)
         all_slave_ids = set(slave_id_list)
         all_slave_ids.add(0)  # 添加广播地址
@@ -72,20 +87,81 @@ class ModbusServer:
         
         # 创建从站上下文
         self.slaves = {
-            slave_id: ModbusSlaveContext(
-                di=ModbusSequentialDataBlock(
-                    0, [0] * 65535
-                ),  # Discrete Inputs 初始化为 0
-                co=ModbusSequentialDataBlock(0, [0] * 65535),  # Coils 初始化为 0
-                hr=ModbusSequentialDataBlock(
-                    0, [0] * 65535
-                ),  # Holding Registers 初始化为 0
-                ir=ModbusSequentialDataBlock(0, [0] * 65535),
-            )  # Input Registers 初始化为 0
+            slave_id: self._create_slave_context(slave_id)
             for slave_id in self._slave_id_list
         }
         self.context = ModbusServerContext(slaves=self.slaves, single=False)
 
+    def _create_slave_context(self, slave_id: int) -> StrictSlaveContext:
+        """创建从站上下文（四类数据表均初始化为 0）"""
+        context = StrictSlaveContext(
+            slave_id,
+            self.address_map,
+            di=ModbusSequentialDataBlock(0, [0] * 65535),  # Discrete Inputs
+            co=ModbusSequentialDataBlock(0, [0] * 65535),  # Coils
+            hr=ModbusSequentialDataBlock(0, [0] * 65535),  # Holding Registers
+            ir=ModbusSequentialDataBlock(0, [0] * 65535),  # Input Registers
+        )
+        context.strict = self.strict_address_map
+        return context
+
+    def setStrictAddressMap(self, enabled: bool) -> None:
+        """开启/关闭严格地址表模式
+
+        开启后，未被已配置测点覆盖的地址请求直接返回异常码 0x02 (ILLEGAL DATA ADDRESS)
+        """
+        self.strict_address_map = enabled
+        for slave in self.slaves.values():
+            if isinstance(slave, StrictSlaveContext):
+                slave.strict = enabled
+        self._logger.info(f"严格地址表模式: {'开启' if enabled else '关闭'}")
+
+    def rebuildAddressMap(self, points) -> None:
+        """根据测点列表重建地址位图"""
+        self.address_map.rebuild(points)
+
+    def markAddressMap(self, points) -> None:
+        """将新增测点标记到地址位图"""
+        for point in points:
+            if hasattr(point, "func_code") and hasattr(point, "rtu_addr"):
+                self.address_map.mark_point(point)
+
+    def setConnectionLimits(self, **kwargs) -> ConnectionLimits:
+        """设置连接限制 (max_connections / idle_timeout / max_requests_per_second / burst)
+
+        最大连接数和空闲超时立即生效，限速对之后建立的连接生效
+        """
+        limits = self.connection_manager.set_limits(**kwargs)
+        self._logger.info(f"连接限制已更新: {limits.to_dict()}")
+        return limits
+
+    def getConnectionStats(self) -> dict:
+        """获取连接统计 (仅 TCP 类服务端有效)"""
+        return self.connection_manager.summary()
+
+    def _bus_slave_ids(self) -> List[int]:
+        """挂到共享串口总线上的从站地址 (不含自动补充的 0/1 默认地址)"""
+        return [slave_id for slave_id in self._configured_slave_ids if slave_id != 0]
+
+    def busConflicts(self) -> List[int]:
+        """RTU 模式下本设备与同一串口上其他设备冲突的从站地址"""
+        if self.protocol_type != ProtocolType.ModbusRtu:
+            return []
+        bus = get_bus(self.serial_port)
+        return bus.conflicts(self, self._bus_slave_ids()) if bus else []
+
+    def getSerialBusInfo(self) -> dict:
+        """获取共享串口总线信息 (从站地址 -> 设备)"""
+        if not self.serial_bus:
+            return {}
+        return {
+            "port": self.serial_bus.port,
+            "baudrate": self.serial_bus.baudrate,
+            "turnaround_ms": round(self.serial_bus.turnaround * 1000, 3),
+            "devices": len(self.serial_bus.servers),
+            "slaves": self.serial_bus.slave_map(),
+        }
+
     def setServerAddress(self, address):
         self.ip = address
 
@@ -199,11 +275,12 @@ class ModbusServer:
                 )
                 
                 # 使用自定义 Frmaer
-                framer_cls = CreateCaptureSocketFramer(self.message_capture)
+                framer_cls = CreateCaptureSocketFramer(self.message_capture, self.processing_times)
                 
-                self.server = ModbusTcpServer(
+                self.server = ManagedModbusTcpServer(
                     address=address,  # listen address
                     framer=framer_cls,
+                    connection_manager=self.connection_manager,
                     **common_params,
                 )
             elif self.protocol_type == ProtocolType.ModbusRtuOverTcp:
@@ -212,11 +289,12 @@ class ModbusServer:
                     self.port if self.port else None,
                 )
                 
-                framer_cls = CreateCaptureRtuFramer(self.message_capture)
+                framer_cls = CreateCaptureRtuFramer(self.message_capture, self.processing_times)
                 
-                self.server = ModbusTcpServer(
+                self.server = ManagedModbusTcpServer(
                     address=address,  # listen address
                     framer=framer_cls,  # The framer strategy to use
+                    connection_manager=self.connection_manager,
                     **common_params,
                 )
             elif self.protocol_type == ProtocolType.ModbusUdp:
@@ -225,7 +303,7 @@ class ModbusServer:
                     self.port if self.port else None,
                 )
                 
-                framer_cls = CreateCaptureSocketFramer(self.message_capture)
+                framer_cls = CreateCaptureSocketFramer(self.message_capture, self.processing_times)
                 
                 self.server = ModbusUdpServer(
                     address=address,  # listen address
@@ -241,14 +319,16 @@ class ModbusServer:
                     "stopbits": self.stopbits,
                 }
                 self._logger.info(f"启动 Modbus RTU 服务器: {serial_params}")
-                
-                framer_cls = CreateCaptureRtuFramer(self.message_capture)
-                
-                self.server = ModbusSerialServer(
-                    framer=framer_cls,
-                    **common_params,
-                    **serial_params,
-                )
+
+                # 同一串口上的多个 RTU 设备共用一条总线，由总线统一收发并按从站地址分发
+                self.serial_bus = acquire_bus(logger=self._logger, **serial_params)
+                if not self.serial_bus.attach(self, self._bus_slave_ids()):
+                    await release_bus(self.serial_bus, self)
+                    self.serial_bus = None
+                    raise RuntimeError(f"串口 {self.serial_port} 上的从站地址与其他设备冲突")
+                await self.serial_bus.start()
+                await self.stop_event.wait()
+                return
             elif self.protocol_type == ProtocolType.Tls:
                 address = (
                     self.ip if self.ip else "",
@@ -323,6 +403,13 @@ class ModbusServer:
         self._logger.info("停止Modbus服务器")
         self.is_running = False
         self.stop_event.set()
+
+        # 共享串口总线：仅卸载本设备，总线上没有设备时才关闭串口
+        if self.serial_bus:
+            await release_bus(self.serial_bus, self)
+            self.serial_bus = None
+            self._logger.info("已从串口总线卸载")
+            return
         
         # 检查 server 是否存在
         if not self.server:
@@ -330,11 +417,12 @@ class ModbusServer:
             return
             
         try:
-            # 主动关闭所有活动连接
+            # 主动关闭所有活动连接 (同时注销连接统计)
             if hasattr(self.server, 'active_connections'):
                 for conn in list(self.server.active_connections.values()):
                     try:
-                        conn.close()
+                        conn.callback_disconnected(None)
+                        conn.transport_close()
                     except Exception as e:
                         self._logger.debug(f"关闭连接时出错: {e}")
                 self.server.active_connections.clear()
@@ -399,6 +487,11 @@ class ModbusServer:
     def clearCapturedMessages(self) -> None:
         """清空捕获的报文"""
         self.message_capture.clear()
+        self.processing_times.reset()
+
+    def getProcessingTimes(self) -> dict:
+        """获取请求处理耗时统计 (p50/p95/p99，按功能码/从站，区分数据存储与编解码耗时)"""
+        return self.processing_times.summary()
 
     def add_slave(self, slave_id: int):
         """动态添加从站"""
@@ -407,13 +500,7 @@ class ModbusServer:
             return
 
         # 创建新的从站上下文
-        from pymodbus.datastore import ModbusSequentialDataBlock, ModbusSlaveContext
-        self.slaves[slave_id] = ModbusSlaveContext(
-            di=ModbusSequentialDataBlock(0, [0] * 65535),
-            co=ModbusSequentialDataBlock(0, [0] * 65535),
-            hr=ModbusSequentialDataBlock(0, [0] * 65535),
-            ir=ModbusSequentialDataBlock(0, [0] * 65535),
-        )
+        self.slaves[slave_id] = self._create_slave_context(slave_id)
         # 更新 ServerContext
         # 注意: pymodbus 的 ModbusServerContext 可能没有直接提供 add/remove slave 的公开接口
         # 但通常可以通过修改 slaves 字典 (如果是非 single 模式)
@@ -427,6 +514,11 @@ class ModbusServer:
         if slave_id not in self._slave_id_list:
             self._slave_id_list.append(slave_id)
             self._slave_id_list.sort()
+        if slave_id not in self._configured_slave_ids:
+            self._configured_slave_ids.append(slave_id)
+            self._configured_slave_ids.sort()
+        if self.serial_bus and slave_id != 0:
+            self.serial_bus.bind_slave(self, slave_id)
             
         self._logger.info(f"已动态添加从站: {slave_id}")
 
@@ -436,6 +528,10 @@ class ModbusServer:
             self._logger.warning(f"从站 {slave_id} 不存在")
             return
 
+        if self.serial_bus:
+            self.serial_bus.unbind_slave(self, slave_id)
+        if slave_id in self._configured_slave_ids:
+            self._configured_slave_ids.remove(slave_id)
         del self.slaves[slave_id]
         
         # 更新 ServerContext
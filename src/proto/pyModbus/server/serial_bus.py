@@ -0,0 +1,243 @@
+"""
+Modbus RTU 串口总线复用
+多个 RTU 设备 (ModbusServer) 共用一个串口时，由 SerialBus 独占该串口，
+按从站地址把请求分发到对应设备的从站上下文，并统一控制应答转向延时和帧间隔，
+从而用一个 USB-485 适配器模拟一整段 RS-485 总线。
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from pymodbus.server import ModbusSerialServer
+from pymodbus.server.async_io import ModbusServerRequestHandler
+from pymodbus.datastore import ModbusServerContext
+
+from .capture import CreateCaptureRtuFramer
+from .rtu_framing import frame_gap
+
+# 每个字符的位数：起始位 + 8 数据位 + 校验位 + 停止位
+_BITS_PER_CHAR = 11
+
+
+class _BusCapture:
+    """按帧首字节 (从站地址) 把报文记录转发到所属设备的报文捕获器"""
+
+    def __init__(self, bus: "SerialBus") -> None:
+        self._bus = bus
+
+    def _targets(self, data: bytes):
+        if not data:
+            return []
+        if data[0] == 0:
+            return [server.message_capture for server in self._bus.servers]
+        owner = self._bus.owner_of(data[0])
+        return [owner.message_capture] if owner else []
+
+    def add_rx(self, data: bytes) -> None:
+        for capture in self._targets(data):
+            capture.add_rx(data)
+
+    def add_tx(self, data: bytes) -> None:
+        for capture in self._targets(data):
+            capture.add_tx(data)
+
+
+class _BusTiming:
+    """按从站地址把处理耗时记录转发到所属设备"""
+
+    def __init__(self, bus: "SerialBus") -> None:
+        self._bus = bus
+
+    def record(self, func_code: int, slave_id: int, datastore: float, framing: float) -> None:
+        owner = self._bus.owner_of(slave_id)
+        if owner is not None:
+            owner.processing_times.record(func_code, slave_id, datastore, framing)
+
+
+class BusRequestHandler(ModbusServerRequestHandler):
+    """总线请求处理器：应答按转向延时和 t3.5 帧间隔排队发送"""
+
+    def send(self, message, addr, **kwargs):
+        if kwargs.get("skip_encoding", False):
+            packet = message
+        elif message.should_respond:
+            packet = self.framer.buildPacket(message)
+        else:
+            return
+        self.server.bus.schedule_send(self, packet, addr)
+
+
+class SerialBusServer(ModbusSerialServer):
+    """共享串口的 Modbus RTU 服务端"""
+
+    def __init__(self, bus: "SerialBus", **kwargs):
+        self.bus = bus
+        super().__init__(**kwargs)
+
+    def callback_new_connection(self):
+        return BusRequestHandler(self)
+
+
+class SerialBus:
+    """一个物理串口对应一个 SerialBus，设备按从站地址挂载"""
+
+    def __init__(
+        self,
+        port: str,
+        baudrate: int = 9600,
+        bytesize: int = 8,
+        parity: str = "N",
+        stopbits: int = 1,
+        turnaround: Optional[float] = None,
+        logger=None,
+    ) -> None:
+        self.port = port
+        self.baudrate = baudrate
+        self.bytesize = bytesize
+        self.parity = parity
+        self.stopbits = stopbits
+        self.gap = frame_gap(baudrate)
+        self.turnaround = self.gap if turnaround is None else turnaround  # 收到请求到开始应答的延时
+        self._logger = logger
+        self.servers: List = []
+        self._owners: Dict[int, object] = {}
+        self.context = ModbusServerContext(slaves={}, single=False)
+        self.server: Optional[SerialBusServer] = None
+        self._task: Optional[asyncio.Task] = None
+        self._bus_free_at = 0.0
+
+    # ---------- 从站路由 ----------
+
+    def owner_of(self, slave_id: int):
+        """获取从站地址所属的设备服务端"""
+        return self._owners.get(slave_id)
+
+    def bind_slave(self, server, slave_id: int) -> bool:
+        """把设备的一个从站挂到总线上，地址已被其他设备占用时返回 False"""
+        owner = self._owners.get(slave_id)
+        if owner is not None and owner is not server:
+            if self._logger:
+                self._logger.warning(f"串口 {self.port} 从站地址 {slave_id} 已被其他设备占用")
+            return False
+        self._owners[slave_id] = server
+        self.context[slave_id] = server.slaves[slave_id]
+        return True
+
+    def unbind_slave(self, server, slave_id: int) -> None:
+        if self._owners.get(slave_id) is server:
+            del self._owners[slave_id]
+            del self.context[slave_id]
+
+    def conflicts(self, server, slave_ids: List[int]) -> List[int]:
+        """获取已被其他设备占用的从站地址"""
+        return [
+            slave_id for slave_id in slave_ids
+            if self._owners.get(slave_id) not in (None, server)
+        ]
+
+    def attach(self, server, slave_ids: List[int]) -> bool:
+        """挂载设备服务端，任一从站地址已被其他设备占用时不挂载并返回 False"""
+        taken = self.conflicts(server, slave_ids)
+        if taken:
+            if self._logger:
+                self._logger.warning(f"串口 {self.port} 从站地址 {taken} 已被其他设备占用")
+            return False
+        if server not in self.servers:
+            self.servers.append(server)
+        for slave_id in slave_ids:
+            self.bind_slave(server, slave_id)
+        return True
+
+    def detach(self, server) -> None:
+        """卸载设备服务端"""
+        for slave_id in [sid for sid, owner in self._owners.items() if owner is server]:
+            self.unbind_slave(server, slave_id)
+        if server in self.servers:
+            self.servers.remove(server)
+
+    def slave_map(self) -> Dict[int, str]:
+        """获取从站地址到设备的映射"""
+        return {slave_id: getattr(owner, "name", "") for slave_id, owner in sorted(self._owners.items())}
+
+    # ---------- 应答时序 ----------
+
+    def frame_time(self, size: int) -> float:
+        """发送 size 字节所需时间 (秒)"""
+        return size * _BITS_PER_CHAR / self.baudrate if self.baudrate else 0.0
+
+    def schedule_send(self, handler: ModbusServerRequestHandler, packet: bytes, addr) -> None:
+        """按转向延时发送应答，并保证总线上相邻两帧之间至少间隔 t3.5"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        send_at = max(now + self.turnaround, self._bus_free_at)
+        self._bus_free_at = send_at + self.frame_time(len(packet)) + self.gap
+        if send_at <= now:
+            handler.transport_send(packet, addr=addr)
+        else:
+            loop.call_at(send_at, self._send_if_open, handler, packet, addr)
+
+    @staticmethod
+    def _send_if_open(handler, packet: bytes, addr) -> None:
+        if handler.transport:
+            handler.transport_send(packet, addr=addr)
+
+    # ---------- 启停 ----------
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """启动共享串口服务 (已在运行时直接返回)"""
+        if self.is_running:
+            return
+        self.server = SerialBusServer(
+            self,
+            context=self.context,
+            framer=CreateCaptureRtuFramer(_BusCapture(self), _BusTiming(self), self.gap),
+            port=self.port,
+            baudrate=self.baudrate,
+            bytesize=self.bytesize,
+            parity=self.parity,
+            stopbits=self.stopbits,
+            broadcast_enable=True,
+            ignore_missing_slaves=True,  # 其他设备的地址不应答，与真实总线一致
+        )
+        self._task = asyncio.create_task(self.server.serve_forever())
+        if self._logger:
+            self._logger.info(f"串口总线 {self.port} 已启动，转向延时 {self.turnaround * 1000:.2f}ms")
+
+    async def stop(self) -> None:
+        if self.server:
+            await self.server.shutdown()
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+        self.server = None
+        self._task = None
+
+
+# 串口名 -> 总线
+_buses: Dict[str, SerialBus] = {}
+
+
+def acquire_bus(port: str, **kwargs) -> SerialBus:
+    """获取 (或创建) 串口对应的总线，已有总线时沿用其串口参数"""
+    bus = _buses.get(port)
+    if bus is None:
+        bus = _buses[port] = SerialBus(port, **kwargs)
+    elif kwargs.get("baudrate", bus.baudrate) != bus.baudrate and bus._logger:
+        bus._logger.warning(f"串口 {port} 已按 {bus.baudrate}bps 打开，忽略新的波特率 {kwargs['baudrate']}")
+    return bus
+
+
+async def release_bus(bus: SerialBus, server) -> None:
+    """卸载设备，总线上没有设备时关闭串口"""
+    bus.detach(server)
+    if not bus.servers:
+        await bus.stop()
+        if _buses.get(bus.port) is bus:
+            del _buses[bus.port]
+
+
+def get_bus(port: str) -> Optional[SerialBus]:
+    return _buses.get(port)
@@ -0,0 +1,176 @@
+"""
+Modbus 服务端请求处理耗时统计
+使用固定分桶直方图 (对数刻度) 记录每个请求的处理耗时，按功能码和从站分别统计，
+并拆分为数据存储耗时 (datastore) 与报文编解码耗时 (framing)。
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# 分桶上界 (秒)：10us ~ 1s，最后一个桶为溢出桶
+_BUCKET_BOUNDS: List[float] = [
+    base * scale
+    for scale in (1e-5, 1e-4, 1e-3, 1e-2, 1e-1)
+    for base in (1.0, 2.0, 5.0)
+] + [1.0]
+
+_PERCENTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+
+
+class LatencyHistogram:
+    """固定分桶耗时直方图
+
+    记录只做一次二分查找和计数累加，百分位在查询时按桶内线性插值估算。
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect_left(_BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """估算百分位耗时 (秒)"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count == 0:
+                continue
+            if cumulative + bucket_count >= target:
+                lower = _BUCKET_BOUNDS[index - 1] if index > 0 else 0.0
+                upper = _BUCKET_BOUNDS[index] if index < len(_BUCKET_BOUNDS) else self.max
+                upper = min(upper, self.max)
+                fraction = (target - cumulative) / bucket_count
+                return lower + (max(upper, lower) - lower) * fraction
+            cumulative += bucket_count
+        return self.max
+
+    def to_dict(self) -> Dict[str, float]:
+        """导出统计结果 (毫秒)"""
+        result = {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 4) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 4),
+        }
+        for name, q in _PERCENTILES:
+            result[f"{name}_ms"] = round(self.percentile(q) * 1000, 4)
+        return result
+
+
+class _TimingGroup:
+    """一组耗时直方图：总耗时、数据存储耗时、编解码耗时"""
+
+    __slots__ = ("total", "datastore", "framing")
+
+    def __init__(self) -> None:
+        self.total = LatencyHistogram()
+        self.datastore = LatencyHistogram()
+        self.framing = LatencyHistogram()
+
+    def record(self, datastore: float, framing: float) -> None:
+        self.total.record(datastore + framing)
+        self.datastore.record(datastore)
+        self.framing.record(framing)
+
+    def to_dict(self) -> dict:
+        data = self.total.to_dict()
+        data["datastore"] = self.datastore.to_dict()
+        data["framing"] = self.framing.to_dict()
+        return data
+
+
+class ProcessingTimeStats:
+    """服务端请求处理耗时统计 (按功能码、按从站)"""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self._overall = _TimingGroup()
+        self._by_func_code: Dict[int, _TimingGroup] = {}
+        self._by_slave: Dict[int, _TimingGroup] = {}
+
+    def record(self, func_code: int, slave_id: int, datastore: float, framing: float) -> None:
+        """记录一次请求处理耗时 (秒)"""
+        self._overall.record(datastore, framing)
+        group = self._by_func_code.get(func_code)
+        if group is None:
+            group = self._by_func_code[func_code] = _TimingGroup()
+        group.record(datastore, framing)
+        group = self._by_slave.get(slave_id)
+        if group is None:
+            group = self._by_slave[slave_id] = _TimingGroup()
+        group.record(datastore, framing)
+
+    def summary(self) -> dict:
+        return {
+            "overall": self._overall.to_dict(),
+            "by_func_code": {fc: g.to_dict() for fc, g in sorted(self._by_func_code.items())},
+            "by_slave": {slave: g.to_dict() for slave, g in sorted(self._by_slave.items())},
+        }
+
+
+class RequestTimer:
+    """单个 framer 实例内的请求计时状态
+
+    processIncomingPacket 内部同步完成 解码 -> callback(执行请求/访问数据存储) -> buildPacket，
+    因此可在 framer 内按时间点拆分：
+        framing   = 解码耗时 + buildPacket 耗时
+        datastore = callback 开始到 buildPacket 开始之间的耗时
+    """
+
+    __slots__ = ("stats", "_decode_start", "_build_start", "_build_end")
+
+    def __init__(self, stats: Optional[ProcessingTimeStats]) -> None:
+        self.stats = stats
+        self._decode_start = 0.0
+        self._build_start = 0.0
+        self._build_end = 0.0
+
+    def wrap(self, callback, clock):
+        """包装 framer 的请求回调，在回调前后打点"""
+        stats = self.stats
+
+        def timed_callback(request):
+            exec_start = clock()
+            self._build_start = 0.0
+            try:
+                callback(request)
+            finally:
+                end = clock()
+                if self._build_start:
+                    datastore = self._build_start - exec_start
+                    encode = self._build_end - self._build_start
+                else:
+                    # 广播或无需回复的请求没有 buildPacket
+                    datastore = end - exec_start
+                    encode = 0.0
+                decode = exec_start - self._decode_start
+                stats.record(
+                    getattr(request, "function_code", 0),
+                    getattr(request, "slave_id", 0),
+                    datastore,
+                    decode + encode,
+                )
+                # 同一数据块中的下一个请求从这里开始计算解码耗时
+                self._decode_start = end
+
+        return timed_callback
+
+    def start(self, now: float) -> None:
+        self._decode_start = now
+
+    def mark_build(self, start: float, end: float) -> None:
+        self._build_start = start
+        self._build_end = end
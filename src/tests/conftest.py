@@ -0,0 +1,14 @@
+"""
+测试公共辅助函数
+"""
+import time
+
+
+def wait_for(condition, timeout: float = 3.0) -> bool:
+    """轮询等待条件成立 (异步上送、定时召唤等后台线程的结果)，超时返回最后一次判断结果"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
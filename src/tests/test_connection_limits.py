@@ -0,0 +1,117 @@
+"""
+测试 Modbus TCP 服务端连接管理：令牌桶限速、最大连接数、连接统计
+"""
+import asyncio
+import struct
+
+import pytest
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusServerContext, ModbusSlaveContext
+
+from src.proto.pyModbus.server.connection import (
+    ConnectionLimits,
+    ConnectionManager,
+    ManagedModbusTcpServer,
+    TokenBucket,
+)
+
+_TEST_PORT = 15027
+
+
+def test_token_bucket_limits_burst():
+    """令牌桶容量耗尽后拒绝，随时间补充"""
+    bucket = TokenBucket(rate=10, capacity=2)
+    now = bucket._last
+    assert bucket.consume(now)
+    assert bucket.consume(now)
+    assert not bucket.consume(now)
+    assert bucket.wait_time() > 0
+    assert bucket.consume(now + 0.1)
+
+
+def test_token_bucket_unlimited():
+    """速率为 0 表示不限速"""
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.consume() for _ in range(1000))
+
+
+def test_connection_manager_max_connections():
+    """超过最大连接数的登记应被拒绝并计数"""
+    manager = ConnectionManager(ConnectionLimits(max_connections=1))
+    first = manager.register("127.0.0.1:1000")
+    assert first is not None
+    assert manager.register("127.0.0.1:1001") is None
+    assert manager.total_rejected == 1
+
+    manager.unregister(first.conn_id)
+    assert manager.register("127.0.0.1:1002") is not None
+    assert manager.summary()["active"] == 1
+
+
+def test_set_limits_keeps_unspecified_fields():
+    """更新限制时未提供的字段保持不变"""
+    manager = ConnectionManager(ConnectionLimits(max_connections=5, idle_timeout=30))
+    manager.set_limits(max_requests_per_second=20, idle_timeout=None)
+    assert manager.limits.max_connections == 5
+    assert manager.limits.idle_timeout == 30
+    assert manager.limits.max_requests_per_second == 20
+
+
+def _read_holding_frame(transaction_id: int) -> bytes:
+    pdu = struct.pack(">BHH", 3, 0, 1)
+    return struct.pack(">HHHB", transaction_id, 0, len(pdu) + 1, 1) + pdu
+
+
+async def _exchange(reader, writer, transaction_id: int) -> bytes:
+    writer.write(_read_holding_frame(transaction_id))
+    await writer.drain()
+    return await asyncio.wait_for(reader.read(256), timeout=2)
+
+
+def test_server_accounting_and_rate_limit():
+    """真实 TCP 连接：统计请求与字节，超速时返回从站忙 (0x06)，超出连接数被断开"""
+
+    async def scenario():
+        manager = ConnectionManager(
+            ConnectionLimits(max_connections=1, max_requests_per_second=1, burst=1)
+        )
+        slave = ModbusSlaveContext(hr=ModbusSequentialDataBlock(0, [0] * 100))
+        server = ManagedModbusTcpServer(
+            context=ModbusServerContext(slaves={1: slave}, single=False),
+            address=("127.0.0.1", _TEST_PORT),
+            connection_manager=manager,
+        )
+        serve_task = asyncio.create_task(server.serve_forever())
+        await asyncio.sleep(0.2)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", _TEST_PORT)
+            first = await _exchange(reader, writer, 1)
+            assert first[7] == 3
+
+            second = await _exchange(reader, writer, 2)
+            assert second[7] == 0x83
+            assert second[8] == 0x06
+
+            # 第二个连接超过最大连接数，应被服务端关闭
+            reader2, writer2 = await asyncio.open_connection("127.0.0.1", _TEST_PORT)
+            assert await asyncio.wait_for(reader2.read(16), timeout=2) == b""
+            writer2.close()
+
+            summary = manager.summary()
+            assert summary["active"] == 1
+            assert summary["total_rejected"] == 1
+            stats = summary["connections"][0]
+            assert stats["requests"] == 2
+            assert stats["throttled"] == 1
+            assert stats["errors"] == 1
+            assert stats["bytes_in"] == 24
+            assert stats["bytes_out"] == len(first) + len(second)
+            writer.close()
+        finally:
+            await server.shutdown()
+            await serve_task
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
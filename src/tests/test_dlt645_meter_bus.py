@@ -0,0 +1,82 @@
+"""
+测试 DLT645 多电表总线：多个服务端设备共用一个 TCP 端口，请求按电表地址分发到各自的数据，
+通配地址由地址最小的匹配电表应答，广播校时与未知地址不应答
+"""
+import asyncio
+import socket
+
+import pytest
+
+pytest.importorskip("dlt645")
+
+from dlt645.common.transform import bcd_to_value
+from dlt645.protocol.protocol import DLT645Protocol
+
+from src.device.protocol.dlt645_handler import DLT645ServerHandler
+from src.enums.point_data import Yc
+from src.proto.dlt645.meter_bus import get_bus
+
+_PORT = 8993
+_ENERGY_DI = 0x00000000
+
+
+def _handler(address: str, name: str) -> DLT645ServerHandler:
+    handler = DLT645ServerHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": _PORT, "meter_address": address, "name": name, "timeout": 2})
+    handler.add_points([Yc(address=hex(_ENERGY_DI), code="energy", frame_type=0)])
+    return handler
+
+
+def _request(sock: socket.socket, address: str, ctrl_code: int, data: bytes) -> bytes:
+    sock.sendall(bytes(DLT645Protocol.build_frame(bytes.fromhex(address), ctrl_code, data)))
+    try:
+        return sock.recv(256)
+    except socket.timeout:
+        return b""
+
+
+def _read_energy(sock: socket.socket, address: str):
+    resp = _request(sock, address, 0x11, _ENERGY_DI.to_bytes(4, "little"))
+    if not resp:
+        return None, None
+    frame = DLT645Protocol.deserialize(resp)
+    return bytes(frame.addr).hex(), bcd_to_value(frame.data[4:8], "XXXXXX.XX", "little")
+
+
+def test_meters_share_one_port():
+    meter_a = _handler("000000000001", "meter_a")
+    meter_b = _handler("000000000002", "meter_b")
+    energy = Yc(address=hex(_ENERGY_DI), code="energy", frame_type=0)
+    assert meter_a.write_value(energy, 100)
+    assert meter_b.write_value(energy, 200)
+    # 同一 DI 在两块表上的值互不影响
+    assert meter_a.read_value(energy) == 100
+    assert meter_b.read_value(energy) == 200
+
+    duplicate = _handler("000000000001", "duplicate")
+
+    async def scenario():
+        assert await meter_a.start()
+        assert await meter_b.start()
+        assert not await duplicate.start()
+        bus = get_bus(f"tcp://127.0.0.1:{_PORT}")
+        assert bus.meter_map() == {"000000000001": "meter_a", "000000000002": "meter_b"}
+
+        sock = socket.create_connection(("127.0.0.1", _PORT), timeout=1)
+        sock.settimeout(0.5)
+        try:
+            assert _read_energy(sock, "000000000001")[1] == 100
+            assert _read_energy(sock, "000000000002")[1] == 200
+            assert _read_energy(sock, "aaaaaaaaaa02") == ("000000000002", 200)
+            assert _read_energy(sock, "aaaaaaaaaaaa") == ("000000000001", 100)
+            assert _read_energy(sock, "000000000003") == (None, None)
+            assert _request(sock, "999999999999", 0x08, bytes(6)) == b""
+        finally:
+            sock.close()
+
+        await meter_a.stop()
+        assert get_bus(f"tcp://127.0.0.1:{_PORT}") is bus and bus.is_running
+        await meter_b.stop()
+        assert get_bus(f"tcp://127.0.0.1:{_PORT}") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,114 @@
+"""
+测试 DLT645 客户端批量轮询：同一网关上的多块电表共用一个通道，同一 DI 只读一次，
+相邻两帧保留帧间隔，轮询类别按 DI 类别划分 (变量快速，电能慢速)
+"""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("dlt645")
+
+from src.device.core.data.data_reader import DataReader
+from src.device.core.data.poll_scheduler import PollScheduler
+from src.device.protocol.dlt645_handler import DLT645ClientHandler, DLT645ServerHandler
+from src.enums.point_data import Yc
+from src.proto.dlt645.meter_channel import get_channel
+
+_PORT = 8995
+_ENERGY_DI = 0x00000000
+_VOLTAGE_DI = 0x02010100
+
+
+def _points():
+    return [
+        Yc(address=hex(_VOLTAGE_DI), code="ua", frame_type=0),
+        Yc(address=hex(_VOLTAGE_DI), code="ua_copy", frame_type=0),
+        Yc(address=hex(_ENERGY_DI), code="energy", frame_type=0),
+    ]
+
+
+def _meter(address: str, voltage: int, energy: int) -> DLT645ServerHandler:
+    meter = DLT645ServerHandler()
+    meter.initialize({"ip": "127.0.0.1", "port": _PORT, "meter_address": address, "timeout": 2})
+    points = _points()
+    meter.add_points(points)
+    assert meter.write_value(points[0], voltage)
+    assert meter.write_value(points[2], energy)
+    return meter
+
+
+def _client(address: str) -> DLT645ClientHandler:
+    client = DLT645ClientHandler()
+    client.initialize({
+        "ip": "127.0.0.1", "port": _PORT, "meter_address": address, "timeout": 2, "frame_gap": 0.01,
+    })
+    return client
+
+
+def _device(handler) -> SimpleNamespace:
+    device = SimpleNamespace(
+        name="dlt645_poll_test",
+        protocol_handler=handler,
+        log=logging.getLogger("test_dlt645_poll_batch"),
+        _logger=None,
+        ip="127.0.0.1",
+        serial_port=None,
+        is_protocol_running=lambda: True,
+        yc_dict={1: _points()},
+        yx_dict={},
+    )
+    device.data_reader = DataReader(device)
+    return device
+
+
+def test_meters_share_channel_and_batch_dedupes_di():
+    meters = [_meter("000000000001", 220, 100), _meter("000000000002", 230, 200)]
+    client_a, client_b = _client("000000000001"), _client("000000000002")
+    channel = get_channel(f"tcp://127.0.0.1:{_PORT}")
+    assert client_a._channel is channel and client_b._channel is channel
+
+    async def scenario():
+        for meter in meters:
+            assert await meter.start()
+        assert await client_a.start()
+        assert await client_b.start()
+        assert channel.users == 2
+
+        device = _device(client_a)
+        frames = channel.stats["frames"]
+        assert await device.data_reader.get_slave_values_async(device.yc_dict[1], []) == (3, 0)
+        assert [point.value for point in device.yc_dict[1]] == [220, 220, 100]
+        # 两个测点共用电压 DI，只发出两帧；第二帧等待了帧间隔
+        assert channel.stats["frames"] - frames == 2
+        assert channel.stats["gap_waits"] >= 1
+
+        assert client_b.read_points_batch(_points()) == {"ua": 230, "ua_copy": 230, "energy": 200}
+        assert client_b.read_points_batch([Yc(address=hex(0x7F000000), code="bad", frame_type=0)]) == {"bad": None}
+
+        await client_a.stop()
+        assert get_channel(channel.key) is channel and channel.users == 1
+        assert client_b.read_value(_points()[2]) == 200
+        await client_b.stop()
+        assert get_channel(channel.key) is None
+        # 断开后不再经通道发帧，测点全部无效
+        frames = channel.stats["frames"]
+        assert client_b.read_points_batch(_points()) == {"ua": None, "ua_copy": None, "energy": None}
+        assert client_b.read_value(_points()[2]) is None
+        assert channel.stats["frames"] == frames
+        for meter in meters:
+            await meter.stop()
+
+    asyncio.run(scenario())
+
+
+def test_poll_class_follows_di_category():
+    client = _client("000000000003")
+    scheduler = PollScheduler(_device(client))
+    voltage, _, energy = _points()
+    assert scheduler.poll_class_of(voltage) == "fast"
+    assert scheduler.poll_class_of(energy) == "slow"
+    # 显式指定优先于 DI 类别
+    scheduler.assign("energy", "normal")
+    assert scheduler.poll_class_of(energy) == "normal"
@@ -0,0 +1,103 @@
+"""
+测试 DLT645 服务端读数据应答缓存：重复抄表直接返回缓存帧，写入后失效并重新编码；
+同一进程内的客户端解析应答不改写任何模拟电表的数据
+"""
+import threading
+
+import pytest
+
+pytest.importorskip("dlt645")
+
+from dlt645.model.data.define import DIMap
+from dlt645.protocol.protocol import DLT645Protocol
+from dlt645.service.serversvc.server_service import MeterServerService
+
+from src.device.protocol.dlt645_handler import DLT645ServerHandler
+from src.enums.point_data import Yc
+from src.proto.dlt645.meter_client import IsolatedMeterClientService
+from src.proto.dlt645.meter_server import capture_item
+
+_ADDRESS = "000000000001"
+_ENERGY_DI = 0x00000000
+_VOLTAGE_DI = 0x02010100
+_EVENT_DI = 0x03010000
+
+
+def _read_frame(di: int, address: str = _ADDRESS):
+    raw = DLT645Protocol.build_frame(bytes.fromhex(address), 0x11, di.to_bytes(4, "little"))
+    return DLT645Protocol.deserialize(bytes(raw))
+
+
+def _handler(address: str = _ADDRESS) -> DLT645ServerHandler:
+    handler = DLT645ServerHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": 8981, "meter_address": address})
+    handler.add_points([
+        Yc(address=hex(_ENERGY_DI), code="energy", frame_type=0),
+        Yc(address=hex(_VOLTAGE_DI), code="ua", frame_type=0),
+    ])
+    return handler
+
+
+def test_read_response_is_cached_until_write():
+    handler = _handler()
+    service = handler.server
+    energy = Yc(address=hex(_ENERGY_DI), code="energy", frame_type=0)
+    assert handler.write_value(energy, 1234)
+
+    first = service.handle_request(_read_frame(_ENERGY_DI))
+    assert service.handle_request(_read_frame(_ENERGY_DI)) is first
+    assert handler.get_cache_stats() == {"hit": 1, "miss": 1}
+    # 缓存帧与库逐次编码的应答一致
+    with service._own_data(_ENERGY_DI):
+        assert first == bytes(MeterServerService.handle_request(service, _read_frame(_ENERGY_DI)))
+
+    assert handler.write_value(energy, 4321)
+    second = service.handle_request(_read_frame(_ENERGY_DI))
+    assert second != first
+    assert handler.read_value(energy) == 4321
+
+
+def test_unsupported_di_and_errors_are_not_cached():
+    handler = _handler()
+    service = handler.server
+    assert not handler.write_value(Yc(address=hex(0x7F000000), code="bad", frame_type=0), 1)
+    # 数据项不存在时返回异常应答，不进入缓存
+    service.handle_request(_read_frame(0x0000FF00))
+    service.handle_request(_read_frame(0x0000FF00))
+    assert handler.get_cache_stats()["hit"] == 0
+
+
+def test_client_parse_inside_meter_swap_window_leaves_meters_intact():
+    meter = _handler()
+    energy = Yc(address=hex(_ENERGY_DI), code="energy", frame_type=0)
+    assert meter.write_value(energy, 100)
+    source = _handler("000000000002")
+    assert source.write_value(energy, 555)
+    assert source.server.resolve_setter(_EVENT_DI)(_EVENT_DI, [("000012", "000034")] * len(DIMap[_EVENT_DI]))
+    shared_energy = DIMap[_ENERGY_DI].value
+    shared_event = capture_item(DIMap[_EVENT_DI])
+
+    client = IsolatedMeterClientService(None)
+    client.set_address("000000000002")
+    responses = [
+        DLT645Protocol.deserialize(bytes(source.server.handle_request(_read_frame(di, "000000000002"))))
+        for di in (_ENERGY_DI, _EVENT_DI)
+    ]
+    results = []
+
+    def parse():
+        results.extend(client.handle_response(frame) for frame in responses)
+
+    # 客户端在电表换入自身数据期间解析应答：等电表换回后才执行
+    with meter.server._own_data(_ENERGY_DI):
+        worker = threading.Thread(target=parse)
+        worker.start()
+        worker.join(0.1)
+        assert worker.is_alive()
+    worker.join(2)
+
+    assert results[0].value == 555
+    assert results[1][0].value.event == ("000012", "000034")
+    assert meter.read_value(energy) == 100
+    assert DIMap[_ENERGY_DI].value == shared_energy
+    assert capture_item(DIMap[_EVENT_DI]) == shared_event
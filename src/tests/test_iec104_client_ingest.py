@@ -0,0 +1,56 @@
+"""
+测试 IEC104 客户端事件驱动入值：服务端上送的值通过接收回调按 IOA 直接写入内部测点，无需表格查询触发同步
+"""
+import time
+
+import pytest
+
+c104 = pytest.importorskip("c104")
+
+from src.device.protocol.iec104_handler import IEC104ClientHandler, IEC104ServerHandler, _raw_value
+from src.enums.point_data import Yc, Yx
+from src.tests.conftest import wait_for
+
+_PORT = 2518
+
+
+def _points():
+    return [
+        Yc(address=hex(1), code="yc1", frame_type=0, mul_coe=0.1),
+        Yx(address=hex(2), code="yx2", frame_type=1),
+    ]
+
+
+def test_spontaneous_values_reach_internal_points():
+    server = IEC104ServerHandler()
+    server.initialize({"ip": "127.0.0.1", "port": _PORT})
+    server.add_points(_points())
+    server.server.start()
+
+    client = IEC104ClientHandler()
+    client.initialize({"ip": "127.0.0.1", "port": _PORT})
+    yc, yx = _points()
+    client.add_points([yc, yx])
+    try:
+        assert client.connect()
+        time.sleep(0.5)
+        server.server.set_point_values({1: 12.5, 2: True})
+        # 遥测按系数 0.1 反向换算为原始值
+        assert wait_for(lambda: yc.value == 125)
+        assert wait_for(lambda: yx.value is True)
+
+        client.remove_points([yx])
+        server.server.set_point_values({2: False})
+        time.sleep(0.3)
+        assert yx.value is True
+    finally:
+        client.disconnect()
+        server.server.stop()
+
+
+def test_raw_value_rounds_scaled_yc():
+    yc, yx = _points()
+    # 12.5 / 0.1 = 124.99999...，截断会得到 124；上送与读取两条路径都取整为 125
+    assert _raw_value(yc, 12.5) == 125
+    assert _raw_value(yc, "bad") is None
+    assert _raw_value(yx, True) is True
@@ -0,0 +1,61 @@
+"""
+测试 IEC104 服务端增量增删测点：运行中的站增删 IOA 不重建服务器，已有点的值和连接保持不变
+"""
+import time
+
+import pytest
+
+c104 = pytest.importorskip("c104")
+
+from src.device.protocol.iec104_handler import IEC104ServerHandler
+from src.enums.point_data import Yc, Yx
+from src.proto.iec104.iec104client import IEC104Client
+
+_PORT = 2498
+
+
+def _yc(ioa: int, value: int = 0) -> Yc:
+    return Yc(address=hex(ioa), code=f"yc{ioa}", value=value, frame_type=0)
+
+
+def _yx(ioa: int) -> Yx:
+    return Yx(address=hex(ioa), code=f"yx{ioa}", frame_type=1)
+
+
+def test_sync_points_only_touches_changed_ioas():
+    handler = IEC104ServerHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": _PORT})
+    handler.add_points([_yc(1), _yc(2), _yx(3)])
+    server = handler.server
+    kept = server.point_index[(1, 1)][0]
+    server.set_point_value(1, 12.5, frame_type=0)
+
+    result = handler.sync_points([_yc(1), _yx(2), _yc(4, value=7)])
+
+    assert result == {"added": 2, "removed": 2, "kept": 1}
+    assert server.point_index[(1, 1)][0] is kept
+    assert server.get_point_value(1, frame_type=0) == 12.5
+    assert server.point_frame_type(2) == 1
+    assert server.point_frame_type(3) is None
+    assert server.get_point_value(4, frame_type=0) == 7.0
+
+
+def test_add_and_remove_keep_connection():
+    handler = IEC104ServerHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": _PORT + 1})
+    handler.add_points([_yc(ioa) for ioa in range(1, 2001)])
+    server = handler.server
+    server.start()
+    client = IEC104Client(ip="127.0.0.1", port=_PORT + 1)
+    try:
+        assert client.connect()
+        time.sleep(0.5)
+        handler.add_points([_yc(5000)])
+        assert handler.remove_points([_yc(10)]) == 1
+        assert server.point_frame_type(5000) == 0
+        assert server.point_frame_type(10) is None
+        assert client.is_connected
+        assert server.server.has_active_connections
+    finally:
+        client.disconnect()
+        server.stop()
@@ -0,0 +1,79 @@
+"""
+测试 IEC104 客户端周期召唤：服务端关闭突发与周期上送时，值由定时总召唤刷新，
+召唤间隔按 jitter 浮动，并记录每个测点的新鲜度
+"""
+import time
+
+import pytest
+
+c104 = pytest.importorskip("c104")
+
+from src.device.protocol.iec104_handler import IEC104ClientHandler, IEC104ServerHandler
+from src.enums.point_data import Yc
+from src.tests.conftest import wait_for
+
+_PORT = 2548
+
+
+def test_jitter_spreads_schedule():
+    handler = IEC104ClientHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": _PORT, "iec104_interrogation": {"jitter": 0.2}})
+    firsts = [handler._next_delay(100, first=True) for _ in range(200)]
+    assert 0 <= min(firsts) and max(firsts) <= 100 and max(firsts) - min(firsts) > 50
+    assert all(80 <= handler._next_delay(100) <= 120 for _ in range(200))
+
+
+def test_disconnect_during_timer_callback_stops_schedule():
+    handler = IEC104ClientHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": _PORT, "iec104_interrogation": {"gi_interval": 0.05}})
+
+    class _Client:
+        is_connected = True
+
+        def interrogate(self):
+            # 召唤发送期间断开连接，回调返回后不得再续排定时器
+            handler.disconnect()
+            return True
+
+        def disconnect(self):
+            pass
+
+    handler._client = _Client()
+    handler._schedule("gi", 0)
+    assert wait_for(lambda: handler.get_interrogation_stats()["gi"] == 1)
+    time.sleep(0.2)
+    assert handler._timers == {}
+    assert handler.get_interrogation_stats()["gi"] == 1
+
+
+def test_periodic_interrogation_refreshes_quiet_points():
+    server = IEC104ServerHandler()
+    server.initialize(
+        {"ip": "127.0.0.1", "port": _PORT + 1, "iec104_reporting": {"spontaneous": False, "cyclic_ms": {"yc": 0}}}
+    )
+    server.add_points([Yc(address=hex(1), code="yc1", frame_type=0)])
+    server.server.start()
+
+    client = IEC104ClientHandler()
+    client.initialize(
+        {
+            "ip": "127.0.0.1",
+            "port": _PORT + 1,
+            "iec104_interrogation": {"gi_interval": 0.3, "ci_interval": 0.3, "jitter": 0.0},
+        }
+    )
+    yc = Yc(address=hex(1), code="yc1", frame_type=0)
+    client.add_points([yc])
+    try:
+        assert client.connect()
+        time.sleep(0.5)
+        server.server.set_point_value(1, 42, frame_type=0)
+        assert wait_for(lambda: yc.value == 42)
+        assert client.get_point_age(yc) < 1.0
+        assert client.get_stale_points(5.0) == []
+        assert wait_for(lambda: client.get_interrogation_stats()["ci"] >= 1)
+        assert client.get_interrogation_stats()["gi"] >= 1
+    finally:
+        client.disconnect()
+        server.server.stop()
+    assert client._timers == {}
@@ -0,0 +1,86 @@
+"""
+测试 IEC104 服务端多站：测点按配置的公共地址分站，未配置的归入默认站，同一端口上的各站 IOA 互不干扰，
+客户端按公共地址分别读取
+"""
+import time
+
+import pytest
+
+c104 = pytest.importorskip("c104")
+
+from src.data.service.yc_service import YcService
+from src.data.service.yx_service import YxService
+from src.device.protocol.iec104_handler import IEC104ServerHandler
+from src.enums.modbus_def import ProtocolType
+from src.enums.point_data import Yc, Yx
+from src.proto.iec104.iec104client import IEC104Client
+from src.tests.conftest import wait_for
+
+_PORT = 2538
+
+
+def _yc(common_address: int, ioa: int, value: int = 0) -> Yc:
+    point = Yc(address=hex(ioa), code=f"yc{common_address}_{ioa}", value=value, frame_type=0)
+    point.common_address = common_address
+    return point
+
+
+def test_points_are_mapped_per_common_address():
+    handler = IEC104ServerHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": _PORT})
+    handler.add_points([_yc(1, 1), _yc(2, 1), _yc(2, 2)])
+    server = handler.server
+    assert sorted(server.stations) == [1, 2]
+
+    handler.write_values([(_yc(1, 1), 10), (_yc(2, 1), 20)])
+    assert server.get_point_value(1, frame_type=0) == 10.0
+    assert server.get_point_value(1, frame_type=0, common_address=2) == 20.0
+    assert handler.get_value_by_address(0, 2, 1) == 20.0
+
+    result = handler.sync_points([_yc(1, 1), _yc(3, 5)])
+    assert result == {"added": 1, "removed": 2, "kept": 1}
+    # 站 2 的点全部移除后站也随之移除，默认站始终保留
+    assert sorted(server.stations) == [1, 3]
+
+
+def test_unconfigured_points_follow_default_common_address():
+    """默认站地址不是 1 时，未配置公共地址的遥测、遥信都归入默认站，不会拆到站 1"""
+    handler = IEC104ServerHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": _PORT, "common_address": 5})
+    yc = Yc(address=hex(1), code="yc", frame_type=0)
+    yx = Yx(address=hex(2), code="yx", frame_type=1)
+    handler.add_points([yc, yx, _yc(7, 1)])
+    server = handler.server
+    assert sorted(server.stations) == [5, 7]
+    assert server.point_frame_type(1, 5) is not None
+    assert server.point_frame_type(2, 5) is not None
+
+
+def test_points_take_common_address_from_config_column():
+    item = {"reg_addr": "1", "name": "ua", "code": "ua", "max_limit": 999, "min_limit": 0,
+            "add_coe": 0.0, "mul_coe": 1.0, "iec_common_address": 9}
+    assert YcService._create_point(item, ProtocolType.Iec104Server).common_address == 9
+    item = {"reg_addr": "2", "name": "brk", "code": "brk", "iec_common_address": None}
+    assert YxService._create_point(item, ProtocolType.Iec104Server).common_address is None
+
+
+def test_stations_share_one_listener():
+    handler = IEC104ServerHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": _PORT + 1})
+    handler.add_points([_yc(1, 1), _yc(2, 1)])
+    server = handler.server
+    server.start()
+
+    client = IEC104Client(ip="127.0.0.1", port=_PORT + 1)
+    other = client.connection.add_station(common_address=2)
+    near = client.add_point(io_address=1)
+    far = other.add_point(io_address=1, type=c104.Type.M_ME_NC_1)
+    try:
+        assert client.connect()
+        time.sleep(0.5)
+        server.set_point_values({(1, 1): 3, (2, 1): 4})
+        assert wait_for(lambda: near.value == 3.0 and far.value == 4.0)
+        assert server.server.active_connection_count == 1
+    finally:
+        client.disconnect()
+        server.stop()
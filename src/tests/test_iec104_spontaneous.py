@@ -0,0 +1,61 @@
+"""
+测试 IEC104 服务端变化突发上送：默认不再 1 秒周期上报，死区内的变化被抑制，最小间隔内的变化推迟补发
+"""
+import time
+
+import pytest
+
+c104 = pytest.importorskip("c104")
+
+from src.device.protocol.iec104_handler import IEC104ServerHandler
+from src.enums.point_data import Yc, Yx
+from src.proto.iec104.iec104client import IEC104Client
+
+_PORT = 2508
+
+
+def _handler(port: int, reporting: dict) -> IEC104ServerHandler:
+    handler = IEC104ServerHandler()
+    handler.initialize({"ip": "127.0.0.1", "port": port, "iec104_reporting": reporting})
+    handler.add_points(
+        [
+            Yc(address=hex(1), code="yc1", frame_type=0, mul_coe=0.1),
+            Yx(address=hex(2), code="yx2", frame_type=1),
+        ]
+    )
+    return handler
+
+
+def test_cyclic_report_follows_group_config():
+    handler = _handler(_PORT, {"cyclic_ms": {"yc": 30000, "yx": 0}})
+    server = handler.server
+    assert server.point_index[(1, 1)][0].report_ms == 30000
+    assert server.point_index[(1, 2)][0].report_ms == 0
+
+
+def test_deadband_and_min_interval():
+    handler = _handler(_PORT + 1, {"deadband": {"yc": 0.5}, "min_interval": 0.2})
+    server = handler.server
+    # 工程值死区 0.5，系数 0.1 -> 原始值死区 5
+    assert server._reports[(1, 1)].deadband == pytest.approx(5.0)
+    server.start()
+    client = IEC104Client(ip="127.0.0.1", port=_PORT + 1)
+    try:
+        assert client.connect()
+        time.sleep(0.5)
+        stats = server.report_stats
+
+        server.set_point_values({1: 3, 2: True})  # 遥测在死区内，遥信变位
+        assert stats["spontaneous"] == 1 and stats["deadband"] == 1
+
+        server.set_point_values({1: 10})  # 超出死区，上送
+        server.set_point_values({1: 20})  # 间隔未到，推迟
+        assert stats["spontaneous"] == 2 and stats["deferred"] == 1
+        assert server.flush_reports() == 1
+
+        time.sleep(0.25)
+        assert server.flush_reports() == 0
+        assert stats["spontaneous"] == 3
+    finally:
+        client.disconnect()
+        server.stop()
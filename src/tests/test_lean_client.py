@@ -0,0 +1,134 @@
+"""
+测试异步客户端精简请求路径：各功能码读写与解析码编解码、异常应答、报文捕获记录真实帧
+(与 pymodbus 请求对象路径的每秒请求数对比见 scripts/bench_lean_client.py)
+"""
+import asyncio
+import struct
+
+import pytest
+
+from src.proto.pyModbus.client.async_client import AsyncModbusClient
+
+_ILLEGAL_ADDRESS = 0xFFF0
+
+
+class _Memory:
+    """本地从站：65536 个寄存器与线圈"""
+
+    def __init__(self):
+        self.registers = [0] * 0x10000
+        self.coils = [False] * 0x10000
+
+    def handle(self, pdu: bytes) -> bytes:
+        func_code = pdu[0]
+        address, count = struct.unpack_from(">HH", pdu, 1)
+        if address >= _ILLEGAL_ADDRESS:
+            return bytes([func_code | 0x80, 0x02])
+        if func_code in (3, 4):
+            return struct.pack(f">BB{count}H", func_code, count * 2, *self.registers[address:address + count])
+        if func_code in (1, 2):
+            packed = bytearray((count + 7) // 8)
+            for i in range(count):
+                if self.coils[address + i]:
+                    packed[i >> 3] |= 1 << (i & 7)
+            return bytes([func_code, len(packed)]) + bytes(packed)
+        if func_code == 5:
+            self.coils[address] = count == 0xFF00
+            return pdu
+        if func_code == 6:
+            self.registers[address] = count
+            return pdu
+        if func_code == 15:
+            data = pdu[6:]
+            for i in range(count):
+                self.coils[address + i] = bool(data[i >> 3] >> (i & 7) & 1)
+            return pdu[:5]
+        if func_code == 16:
+            self.registers[address:address + count] = struct.unpack_from(f">{count}H", pdu, 6)
+            return pdu[:5]
+        return bytes([func_code | 0x80, 0x01])
+
+
+def _serve(memory: _Memory):
+    async def server(reader, writer):
+        try:
+            while True:
+                tid, _, length, unit = struct.unpack(">HHHB", await reader.readexactly(7))
+                body = memory.handle(await reader.readexactly(length - 1))
+                writer.write(struct.pack(">HHHB", tid, 0, len(body) + 1, unit) + body)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    return server
+
+
+def _run(scenario):
+    async def main():
+        memory = _Memory()
+        # 绑定临时端口，避免与并行运行的测试冲突
+        server = await asyncio.start_server(_serve(memory), "127.0.0.1", 0)
+        client = AsyncModbusClient(port=server.sockets[0].getsockname()[1], timeout=1.0)
+        try:
+            assert await client.connect()
+            return await scenario(client, memory)
+        finally:
+            await client.disconnect()
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(main())
+
+
+def test_reads_and_writes_round_trip():
+    async def scenario(client, memory):
+        assert await client.write_registers(1, 10, [1, 2, 0xFFFF])
+        assert await client.read_holding_registers(1, 10, 3) == [1, 2, 0xFFFF]
+        assert await client.write_register(1, 20, 0x1234)
+        assert await client.read_input_registers(1, 20, 1) == [0x1234]
+        assert await client.write_coils(1, 0, [True, False, True] * 4)
+        assert await client.read_coils(1, 0, 12) == [True, False, True] * 4
+        assert await client.write_coil(1, 12, True)
+        assert await client.read_discrete_inputs(1, 11, 2) == [True, True]
+        assert not client.client.stats["timeouts"]
+
+    _run(scenario)
+
+
+def test_value_codecs_match_decode_table():
+    async def scenario(client, memory):
+        for decode, value in (("0x41", -123456), ("0x42", 1.5), ("0x45", -2.25), ("0xC1", -2), ("0x62", 3.25)):
+            assert await client.write_value_by_address(16, 1, 100, value, decode)
+            assert await client.read_value_by_address(3, 1, 100, decode) == value
+        assert await client.write_value_by_address(5, 1, 7, 1, "0x20")
+        assert await client.read_value_by_address(1, 1, 7, "0x20") is True
+
+    _run(scenario)
+
+
+def test_exception_reply_sets_code():
+    async def scenario(client, memory):
+        assert await client.read_holding_registers(1, _ILLEGAL_ADDRESS, 1) == []
+        assert client.last_exception_code == 2
+        assert not await client.write_register(1, _ILLEGAL_ADDRESS, 1)
+        assert client.last_exception_code == 2
+        assert await client.read_holding_registers(1, 0, 1) == [0]
+        assert client.last_exception_code == 0
+
+    _run(scenario)
+
+
+def test_capture_records_sent_frames():
+    async def scenario(client, memory):
+        client.clearCapturedMessages()
+        await client.read_holding_registers(7, 0x10, 2)
+        messages = client.getCapturedMessages()
+        assert [m["direction"] for m in messages] == ["TX", "RX"]
+        # 捕获内容与实际收发的帧一致 (含真实事务号与从站号)
+        assert messages[0]["data"].replace(" ", "").upper().endswith("0006070300100002")
+        assert messages[1]["data"].replace(" ", "")[:4] == messages[0]["data"].replace(" ", "")[:4]
+
+    _run(scenario)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,135 @@
+"""
+测试 Modbus TCP 流水线客户端：多个在途请求按事务号匹配、乱序应答、单事务超时不断开连接
+"""
+import asyncio
+import logging
+import struct
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.device.core.data.data_reader import DataReader
+from src.enums.point_data import Yc
+from src.proto.pyModbus.client.async_client import AsyncModbusClient
+
+_PORT = 15033
+_RTT = 0.1
+_SILENT_ADDRESS = 99  # 该地址的请求延迟到超时之后才应答
+
+
+async def _slow_server(reader, writer):
+    """模拟高延迟网关：每个请求 _RTT 后应答，地址越大应答越早 (乱序)"""
+
+    async def reply(tid, unit, address, count):
+        delay = 1.5 if address == _SILENT_ADDRESS else _RTT - address / 10000
+        await asyncio.sleep(delay)
+        body = struct.pack(">BB", 3, count * 2) + b"".join(
+            struct.pack(">H", address + i) for i in range(count)
+        )
+        writer.write(struct.pack(">HHHB", tid, 0, len(body) + 1, unit) + body)
+
+    try:
+        while True:
+            header = await reader.readexactly(7)
+            tid, _, length, unit = struct.unpack(">HHHB", header)
+            pdu = await reader.readexactly(length - 1)
+            _, address, count = struct.unpack(">BHH", pdu)
+            asyncio.create_task(reply(tid, unit, address, count))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        writer.close()
+
+
+def test_requests_are_pipelined_and_matched_by_transaction_id():
+    """8 个请求同时在途，乱序应答仍对应到各自请求"""
+
+    async def scenario():
+        server = await asyncio.start_server(_slow_server, "127.0.0.1", _PORT)
+        client = AsyncModbusClient(port=_PORT, timeout=1.0, pipeline_depth=8)
+        try:
+            assert await client.connect()
+            assert client.pipelined
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                *(client.read_holding_registers(1, address * 10, 2) for address in range(8))
+            )
+            elapsed = time.perf_counter() - started
+            assert results == [[a * 10, a * 10 + 1] for a in range(8)]
+            assert elapsed < _RTT * 3
+            stats = client.get_pipeline_stats()
+            assert stats["max_in_flight"] == 8
+            # 报文捕获使用真实事务号
+            tids = {m["data"][:4] for m in client.getCapturedMessages() if m["direction"] == "TX"}
+            assert len(tids) == 8
+        finally:
+            await client.disconnect()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_transaction_timeout_keeps_connection():
+    """单个事务超时只使该请求失败，连接保持，迟到的应答被丢弃"""
+
+    async def scenario():
+        server = await asyncio.start_server(_slow_server, "127.0.0.1", _PORT)
+        client = AsyncModbusClient(port=_PORT, timeout=0.5, pipeline_depth=4)
+        try:
+            assert await client.connect()
+            silent, normal = await asyncio.gather(
+                client.read_holding_registers(1, _SILENT_ADDRESS, 1),
+                client.read_holding_registers(1, 0, 1),
+            )
+            assert silent == []
+            assert normal == [0]
+            assert client.client.connected
+            assert client.get_pipeline_stats()["timeouts"] == 1
+
+            await asyncio.sleep(1.2)
+            assert client.get_pipeline_stats()["unsolicited"] == 1
+            assert await client.read_holding_registers(1, 5, 1) == [5]
+        finally:
+            await client.disconnect()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+class _PipelinedHandler:
+    """记录并发度的流水线处理器"""
+
+    pipelined = True
+    max_in_flight = 8
+    last_exception_code = 0
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def read_registers_batch_async(self, func_code, slave_id, start, count):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return [start + i for i in range(count)]
+
+
+def test_data_reader_issues_groups_concurrently():
+    """流水线处理器下 DataReader 同时发出所有分组"""
+    handler = _PipelinedHandler()
+    device = SimpleNamespace(
+        protocol_handler=handler, log=logging.getLogger("test_pipelined_client"), _logger=None
+    )
+    reader = DataReader(device)
+    reader.planner.set_override(1, max_gap=0)
+    points = [Yc(rtu_addr="1", address=hex(a * 10), func_code=3, decode="0x20") for a in range(5)]
+
+    assert asyncio.run(reader._batch_read_async(points)) == (5, 0)
+    assert handler.peak == 5
+    assert [p.value for p in points] == [0, 10, 20, 30, 40]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
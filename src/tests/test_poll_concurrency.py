@@ -0,0 +1,107 @@
+"""
+测试并发轮询：同一主机/串口总线的并发上限、单连接在途数限制、成功/失败计数合并
+"""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from src.device.core.data.data_reader import DataReader
+from src.device.core.data.poll_limiter import PollLimiter, poll_limiter, poll_target
+from src.enums.point_data import Yc
+
+
+class _Counter:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+
+class _Handler:
+    """模拟客户端处理器，记录所有处理器合计的并发请求数"""
+
+    last_exception_code = 0
+
+    def __init__(self, counter: _Counter, max_in_flight: int = 1, fail_slave: int = -1):
+        self.counter = counter
+        self.max_in_flight = max_in_flight
+        self.fail_slave = fail_slave
+
+    async def read_registers_batch_async(self, func_code, slave_id, start, count):
+        self.counter.active += 1
+        self.counter.peak = max(self.counter.peak, self.counter.active)
+        await asyncio.sleep(0.01)
+        self.counter.active -= 1
+        if slave_id == self.fail_slave:
+            return []
+        return [start + i for i in range(count)]
+
+
+def _reader(handler, **device_attrs) -> DataReader:
+    device = SimpleNamespace(
+        protocol_handler=handler, log=logging.getLogger("test_poll_concurrency"), _logger=None, **device_attrs
+    )
+    reader = DataReader(device)
+    for slave_id in range(1, 5):
+        reader.planner.set_override(slave_id, max_gap=0)
+    return reader
+
+
+def _points(slave_id: int, count: int = 4):
+    return [Yc(rtu_addr=str(slave_id), address=hex(a * 10), func_code=3, decode="0x20") for a in range(count)]
+
+
+def test_poll_target_and_default_limits():
+    """串口设备按串口区分，默认一次一帧；网络设备按主机区分"""
+    limiter = PollLimiter(host_limit=6, serial_limit=1)
+    assert poll_target(SimpleNamespace(serial_port="COM3", ip="1.2.3.4")) == "serial:COM3"
+    assert poll_target(SimpleNamespace(serial_port=None, ip="1.2.3.4")) == "tcp:1.2.3.4"
+    assert limiter.get_limit("serial:COM3") == 1
+    assert limiter.get_limit("tcp:1.2.3.4") == 6
+    limiter.set_limit("tcp:1.2.3.4", 2)
+    assert limiter.get_limit("tcp:1.2.3.4") == 2
+    limiter.set_limit("tcp:1.2.3.4", None)
+    assert limiter.get_limit("tcp:1.2.3.4") == 6
+
+
+def test_host_limit_spans_devices():
+    """同一网关主机上的多个设备合计并发不超过主机上限，计数按设备合并"""
+    counter = _Counter()
+    readers = [_reader(_Handler(counter, max_in_flight=8), ip="10.0.0.34", serial_port=None) for _ in range(3)]
+    poll_limiter.set_limit("tcp:10.0.0.34", 3)
+    try:
+        results = asyncio.run(_gather(readers, fail_reader=readers[2]))
+    finally:
+        poll_limiter.set_limit("tcp:10.0.0.34", None)
+    assert counter.peak == 3
+    assert results == [(8, 0), (8, 0), (4, 4)]
+
+
+async def _gather(readers, fail_reader=None):
+    if fail_reader is not None:
+        fail_reader._handler.fail_slave = 2
+    return await asyncio.gather(
+        *(reader._batch_read_async(_points(1) + _points(2)) for reader in readers)
+    )
+
+
+def test_serial_bus_serializes_devices():
+    """同一串口总线上的设备逐帧轮询"""
+    counter = _Counter()
+    readers = [_reader(_Handler(counter, max_in_flight=4), ip="", serial_port="COM34") for _ in range(2)]
+    results = asyncio.run(_gather(readers))
+    assert counter.peak == 1
+    assert results == [(8, 0), (8, 0)]
+
+
+def test_single_connection_without_pipelining():
+    """未启用流水线的连接一次只有一个请求在途"""
+    counter = _Counter()
+    reader = _reader(_Handler(counter), ip="10.0.0.35", serial_port=None)
+    assert asyncio.run(reader._batch_read_async(_points(1) + _points(2))) == (8, 0)
+    assert counter.peak == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
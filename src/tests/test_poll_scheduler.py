@@ -0,0 +1,102 @@
+"""
+测试客户端轮询调度器：默认轮询类别、按类别周期批量读取、启停
+"""
+import asyncio
+import logging
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.device.core.data.data_reader import DataReader
+from src.device.core.data.poll_scheduler import PollScheduler, default_poll_class
+from src.device.protocol.modbus_handler import ModbusClientHandler
+from src.enums.point_data import Yc, Yx
+
+
+class _Handler(ModbusClientHandler):
+    """记录批量读取请求的 Modbus 客户端处理器"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    @property
+    def is_running(self) -> bool:
+        return True
+
+    async def read_registers_batch_async(self, func_code, slave_id, start, count):
+        self.requests.append((func_code, start, count))
+        return [1] * count
+
+
+def _device():
+    handler = _Handler()
+    device = SimpleNamespace(
+        name="poll_test",
+        protocol_handler=handler,
+        log=logging.getLogger("test_poll_scheduler"),
+        _logger=None,
+        ip="10.0.0.35",
+        serial_port=None,
+        is_protocol_running=lambda: True,
+        yc_dict={1: [
+            Yc(address="0x0000", code="voltage", decode="0x20"),
+            Yc(address="0x0001", code="current", decode="0x20"),
+            Yc(address="0x0100", code="total_energy", decode="0x20"),
+        ]},
+        yx_dict={1: [Yx(address="0x0000", func_code=2, code="breaker")]},
+    )
+    device.data_reader = DataReader(device)
+    return device, handler
+
+
+def test_default_poll_classes_and_assignment():
+    """遥信为快速、电能为慢速、其余遥测为常规；可按测点覆盖"""
+    device, _ = _device()
+    scheduler = PollScheduler(device)
+    yc = device.yc_dict[1]
+    assert default_poll_class(device.yx_dict[1][0]) == "fast"
+    assert default_poll_class(yc[0]) == "normal"
+    assert default_poll_class(yc[2]) == "slow"
+
+    scheduler.assign("current", "fast")
+    assert scheduler.points_of("fast") == ([yc[1]], device.yx_dict[1])
+    scheduler.assign("current", None)
+    assert scheduler.poll_class_of(yc[1]) == "normal"
+    with pytest.raises(ValueError):
+        scheduler.assign("current", "hourly")
+
+
+def test_classes_poll_at_their_own_period():
+    """各类别按各自周期批量读取，不创建线程"""
+    device, handler = _device()
+    scheduler = PollScheduler(device)
+    scheduler.set_period("fast", 0.05)
+    scheduler.set_period("normal", 0.1)
+    scheduler.set_period("slow", 10)
+
+    async def scenario():
+        threads = threading.active_count()
+        assert scheduler.start()
+        assert not scheduler.start()
+        await asyncio.sleep(0.32)
+        assert threading.active_count() == threads
+        scheduler.stop()
+        await asyncio.sleep(0)
+        assert not scheduler.is_running
+
+    asyncio.run(scenario())
+
+    summary = scheduler.summary()["classes"]
+    assert 5 <= summary["fast"]["cycles"] <= 8
+    assert 3 <= summary["normal"]["cycles"] <= 5
+    assert summary["slow"]["cycles"] == 1
+    # 常规类别两个相邻遥测合并为一次读取
+    assert handler.requests.count((3, 0, 2)) == summary["normal"]["cycles"]
+    assert handler.requests.count((2, 0, 1)) == summary["fast"]["cycles"]
+    assert summary["normal"]["fail"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,82 @@
+"""
+测试 Modbus 服务端请求处理耗时统计（固定分桶直方图、捕获 framer 内计时）
+"""
+import struct
+
+import pytest
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusSlaveContext
+from pymodbus.factory import ServerDecoder
+
+from src.device.core.message.message_capture import MessageCapture
+from src.proto.pyModbus.server.capture import CreateCaptureSocketFramer
+from src.proto.pyModbus.server.timing import LatencyHistogram, ProcessingTimeStats
+
+
+def test_histogram_percentiles():
+    """百分位应落在对应样本所在的桶内"""
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.record(0.0005)  # 0.5ms
+    for _ in range(10):
+        histogram.record(0.03)  # 30ms
+
+    assert histogram.count == 100
+    assert 0.0002 < histogram.percentile(0.50) <= 0.0005
+    assert 0.02 < histogram.percentile(0.95) <= 0.03
+    assert histogram.percentile(0.99) <= histogram.max
+    data = histogram.to_dict()
+    assert data["max_ms"] == 30.0
+    assert data["p50_ms"] <= data["p95_ms"] <= data["p99_ms"]
+
+
+def test_empty_histogram():
+    """无样本时百分位为 0"""
+    assert LatencyHistogram().to_dict()["p99_ms"] == 0.0
+
+
+def test_stats_grouped_by_func_code_and_slave():
+    """按功能码和从站分别统计"""
+    stats = ProcessingTimeStats()
+    stats.record(3, 1, 0.001, 0.0002)
+    stats.record(3, 2, 0.001, 0.0002)
+    stats.record(6, 1, 0.002, 0.0001)
+
+    summary = stats.summary()
+    assert summary["overall"]["count"] == 3
+    assert summary["by_func_code"][3]["count"] == 2
+    assert summary["by_func_code"][6]["datastore"]["count"] == 1
+    assert summary["by_slave"][1]["count"] == 2
+
+    stats.reset()
+    assert stats.summary()["overall"]["count"] == 0
+
+
+def test_capture_framer_records_processing_time():
+    """捕获 framer 处理一帧请求后应记录一次耗时，且拆分出数据存储和编解码耗时"""
+    stats = ProcessingTimeStats()
+    capture = MessageCapture()
+    framer = CreateCaptureSocketFramer(capture, stats)(ServerDecoder(), client=None)
+    context = ModbusSlaveContext(hr=ModbusSequentialDataBlock(0, [7] * 100))
+
+    responses = []
+
+    def execute(request):
+        response = request.execute(context)
+        response.transaction_id = request.transaction_id
+        response.slave_id = request.slave_id
+        responses.append(framer.buildPacket(response))
+
+    pdu = struct.pack(">BHH", 3, 0, 2)
+    frame = struct.pack(">HHHB", 1, 0, len(pdu) + 1, 1) + pdu
+    framer.processIncomingPacket(frame, execute, slave=[1], single=False)
+
+    assert len(responses) == 1
+    summary = stats.summary()
+    assert summary["overall"]["count"] == 1
+    assert summary["by_func_code"][3]["framing"]["count"] == 1
+    assert summary["by_slave"][1]["count"] == 1
+    assert capture.get_avg_time()["tx_count"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,108 @@
+"""
+测试批量读取规划缓存：规划复用、测点布局变更失效、批量读取路径按解析码表解码
+"""
+import asyncio
+import logging
+import math
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+from src.device.core.data.data_reader import DataReader
+from src.enums.modbus_register import Decode, DecodeCode
+from src.enums.point_data import Yc
+
+
+def _yc(address: int, decode: str = "0x20", slave: int = 1) -> Yc:
+    return Yc(rtu_addr=str(slave), address=hex(address), func_code=3, decode=decode)
+
+
+class _Handler:
+    def __init__(self):
+        self.requests = []
+        self.last_exception_code = 0
+
+    async def read_registers_batch_async(self, func_code, slave_id, start, count):
+        self.requests.append((start, count))
+        return [(start + i) * 257 for i in range(count)]
+
+
+def _reader() -> DataReader:
+    device = SimpleNamespace(
+        protocol_handler=_Handler(), log=logging.getLogger("test_read_plan_cache"), _logger=None
+    )
+    return DataReader(device)
+
+
+def test_plan_is_reused_until_invalidated():
+    """测点不变时复用规划，地址修改后 invalidate_plans 触发重新规划"""
+    reader = _reader()
+    points = [_yc(0), _yc(1), _yc(2)]
+    first = reader._group_points_by_address(points)[(1, 3)]
+    assert reader._group_points_by_address(points)[(1, 3)] is first
+
+    # 原地修改地址：对象不变，必须显式失效
+    points[2].address = 200
+    assert reader._group_points_by_address(points)[(1, 3)] is first
+    reader.invalidate_plans(1)
+    groups = reader._group_points_by_address(points)[(1, 3)]
+    assert [(g.start_address, g.register_count) for g in groups] == [(0, 2), (200, 1)]
+
+    # 增删测点 (测点集合变化) 自动重新规划
+    points.append(_yc(3))
+    assert reader._group_points_by_address(points)[(1, 3)] is not groups
+
+
+def test_planner_change_refreshes_cache():
+    """规划器覆盖配置变化后缓存的规划失效"""
+    reader = _reader()
+    points = [_yc(0), _yc(5)]
+    assert len(reader._group_points_by_address(points)[(1, 3)]) == 1
+    reader.planner.set_override(1, max_gap=0)
+    assert len(reader._group_points_by_address(points)[(1, 3)]) == 2
+
+
+def _reference_decode(registers, info):
+    """按解析码逐项解码 (字节序、符号、多寄存器拼接)，作为对照"""
+    if info.register_cnt == 1:
+        value = registers[0]
+        if not info.is_big_endian:
+            value = ((value & 0xFF) << 8) | ((value >> 8) & 0xFF)
+        if info.is_signed and value > 0x7FFF:
+            value -= 0x10000
+        return value
+    order = ">" if info.is_big_endian else "<"
+    packed = struct.pack(order + "H" * info.register_cnt, *registers)
+    return Decode.unpack_value(info.pack_format, packed)
+
+
+@pytest.mark.parametrize("code", [item.value.code for item in DecodeCode])
+def test_group_decode_matches_decode_table(code):
+    """批量读取路径预先计算的解码函数按解析码表正确解码"""
+    reader = _reader()
+    info = Decode.get_info(code)
+    registers = [0x8123, 0x4567, 0x89AB, 0xCDEF][: info.register_cnt]
+    # _decode_group 使用规划时写入分组的解码函数
+    slot = reader.planner.plan(1, 3, [_yc(0, code)])[0].slots[0]
+    actual = slot.codec(registers[slot.offset : slot.offset + slot.count])
+    expected = _reference_decode(registers, info)
+    if isinstance(expected, float) and math.isnan(expected):
+        assert math.isnan(actual)
+    else:
+        assert actual == expected
+
+
+def test_batch_read_uses_slots():
+    """批量读取按预先计算的偏移解码"""
+    reader = _reader()
+    points = [_yc(0), _yc(1, "0x41"), _yc(3, "0x21")]
+    ok, failed = asyncio.run(reader._batch_read_async(points))
+    assert (ok, failed) == (3, 0)
+    assert points[0].value == 0
+    assert points[1].value == (257 << 16) | 514
+    assert points[2].value == 771
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
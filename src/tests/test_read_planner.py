@@ -0,0 +1,112 @@
+"""
+测试批量读取规划器：按代价跨越空洞、最大读取数量、非法区间学习与从站覆盖
+"""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from src.device.core.data.data_reader import DataReader
+from src.device.core.data.read_planner import ReadCostModel, ReadPlanner
+from src.enums.point_data import Yc, Yx
+
+
+def _yc(address: int, decode: str = "0x20", slave: int = 1) -> Yc:
+    return Yc(rtu_addr=str(slave), address=hex(address), func_code=3, decode=decode)
+
+
+def test_bridges_small_gaps_by_default():
+    """默认代价下小空洞合并为一次读取"""
+    planner = ReadPlanner()
+    groups = planner.plan(1, 3, [_yc(0), _yc(5), _yc(10, "0x41")])
+    assert len(groups) == 1
+    assert groups[0].start_address == 0
+    assert groups[0].register_count == 12
+    assert groups[0].gaps() == [(1, 5), (6, 10)]
+
+
+def test_respects_protocol_max_count():
+    """保持寄存器单次不超过 125 个，线圈不超过 2000 个"""
+    planner = ReadPlanner()
+    groups = planner.plan(1, 3, [_yc(0), _yc(124), _yc(125)])
+    assert [g.register_count for g in groups] == [125, 1]
+
+    coils = [Yx(rtu_addr="1", address=hex(a), func_code=1) for a in (0, 1999, 2000)]
+    groups = planner.plan(1, 1, coils)
+    assert [g.register_count for g in groups] == [2000, 1]
+
+
+def test_cost_model_prefers_split_when_transfer_is_expensive():
+    """单寄存器传输代价高 (慢串口) 时不跨越大空洞"""
+    planner = ReadPlanner()
+    for count, elapsed in ((1, 12.0), (10, 30.0), (50, 110.0), (100, 210.0)):
+        planner.observe(1, count, elapsed)
+    model = planner.cost_model(1)
+    assert model.register_ms == pytest.approx(2.0, rel=0.05)
+    assert model.request_ms == pytest.approx(10.0, rel=0.1)
+
+    groups = planner.plan(1, 3, [_yc(0), _yc(3), _yc(40)])
+    assert [(g.start_address, g.register_count) for g in groups] == [(0, 4), (40, 1)]
+
+
+def test_learned_illegal_range_and_override():
+    """已学习的非法区间不再跨越；从站覆盖可限制空洞和数量"""
+    planner = ReadPlanner()
+    planner.learn_illegal(1, 3, 2, 4)
+    assert len(planner.plan(1, 3, [_yc(0), _yc(5)])) == 2
+    # 其他从站不受影响
+    assert len(planner.plan(2, 3, [_yc(0, slave=2), _yc(5, slave=2)])) == 1
+
+    planner.set_override(2, max_gap=0)
+    assert len(planner.plan(2, 3, [_yc(0, slave=2), _yc(5, slave=2)])) == 2
+    planner.set_override(2, max_count=4)
+    assert len(planner.plan(2, 3, [_yc(0, slave=2), _yc(3, slave=2), _yc(4, slave=2)])) == 2
+
+
+def test_cost_model_defaults_without_samples():
+    """无测量数据时使用默认代价"""
+    model = ReadCostModel()
+    model.observe(10, 20.0)
+    assert model.samples == 1
+    assert model.request_ms > 0
+
+
+class _FakeHandler:
+    """模拟从站：地址 2~3 不存在，跨越读取时返回非法地址异常"""
+
+    def __init__(self):
+        self.requests = []
+        self.last_exception_code = 0
+
+    async def read_registers_batch_async(self, func_code, slave_id, start, count):
+        self.requests.append((start, count))
+        if start < 4 and start + count > 2:
+            self.last_exception_code = 0x02
+            return []
+        self.last_exception_code = 0
+        return [start + i for i in range(count)]
+
+
+def test_batch_read_learns_illegal_gap_and_splits():
+    """跨空洞读取返回 0x02 后立即拆分重读，并在下一轮直接按拆分规划"""
+    handler = _FakeHandler()
+    device = SimpleNamespace(
+        protocol_handler=handler, log=logging.getLogger("test_read_planner"), _logger=None
+    )
+    reader = DataReader(device)
+    points = [_yc(0), _yc(1), _yc(5)]
+
+    ok, failed = asyncio.run(reader._batch_read_async(points))
+    assert (ok, failed) == (3, 0)
+    assert handler.requests == [(0, 6), (0, 2), (5, 1)]
+    assert [p.value for p in points] == [0, 1, 5]
+
+    handler.requests.clear()
+    asyncio.run(reader._batch_read_async(points))
+    assert handler.requests == [(0, 2), (5, 1)]
+    assert "1:3" in reader.planner.summary()["illegal_ranges"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
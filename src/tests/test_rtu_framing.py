@@ -0,0 +1,91 @@
+"""
+测试 Modbus RTU 缓冲组帧：分片拼帧、每帧一次 CRC 校验、每帧一条捕获记录
+"""
+import struct
+
+import pytest
+from pymodbus.factory import ServerDecoder
+from pymodbus.utilities import computeCRC
+
+from src.device.core.message.message_capture import MessageCapture
+from src.proto.pyModbus.server.capture import CreateCaptureRtuFramer
+from src.proto.pyModbus.server.rtu_framing import RtuFrameAssembler, frame_gap
+
+
+def _rtu_frame(slave: int, pdu: bytes) -> bytes:
+    body = bytes([slave]) + pdu
+    return body + struct.pack(">H", computeCRC(body))
+
+
+def _read_holding(slave: int = 1, address: int = 0, count: int = 2) -> bytes:
+    return _rtu_frame(slave, struct.pack(">BHH", 3, address, count))
+
+
+def test_frame_gap_follows_baudrate():
+    """9600bps 时 t3.5 约 4ms，高波特率使用固定 1.75ms"""
+    assert frame_gap(9600) == pytest.approx(3.5 * 11 / 9600)
+    assert frame_gap(115200) == pytest.approx(0.00175)
+
+
+def test_assembler_joins_fragments():
+    """分多块到达的帧应在凑满帧长时一次性输出"""
+    assembler = RtuFrameAssembler(ServerDecoder(), gap=0.01)
+    frame = _read_holding()
+    assert assembler.feed(frame[:3], 0.0) == []
+    assert assembler.feed(frame[3:5], 0.001) == []
+    assert assembler.feed(frame[5:], 0.002) == [(frame, True)]
+    assert assembler.pending == b""
+
+
+def test_assembler_variable_length_and_back_to_back():
+    """可变长请求 (FC16) 按字节计数推算帧长，连续两帧分别输出"""
+    fc16 = _rtu_frame(1, struct.pack(">BHHB", 16, 0, 2, 4) + b"\x00\x01\x00\x02")
+    fc3 = _read_holding()
+    frames = RtuFrameAssembler(ServerDecoder(), gap=0.01).feed(fc16 + fc3, 0.0)
+    assert frames == [(fc16, True), (fc3, True)]
+
+
+def test_assembler_silence_ends_broken_frame():
+    """静默超过 t3.5 后残缺数据自成一帧，CRC 校验失败"""
+    assembler = RtuFrameAssembler(ServerDecoder(), gap=0.004)
+    frame = _read_holding()
+    assembler.feed(frame[:5], 0.0)
+    frames = assembler.feed(frame, 0.1)
+    assert frames[0] == (frame[:5], False)
+    assert frames[1] == (frame, True)
+    assert assembler.crc_errors == 1
+
+
+def test_framer_captures_one_record_per_frame():
+    """逐字节送入的帧只产生一条 RX 记录和一次请求回调"""
+    capture = MessageCapture()
+    framer = CreateCaptureRtuFramer(capture, frame_gap=0.01)(ServerDecoder(), client=None)
+    requests = []
+    frame = _read_holding(slave=2, address=0x10, count=3)
+    for byte in frame:
+        framer.processIncomingPacket(bytes([byte]), requests.append, slave=[0, 1, 2], single=False)
+
+    assert len(requests) == 1
+    assert requests[0].function_code == 3
+    assert requests[0].slave_id == 2
+    assert requests[0].address == 0x10
+    messages = capture.get_messages()
+    assert len(messages) == 1
+    assert messages[0]["data"] == frame.hex()
+
+
+def test_framer_drops_bad_crc():
+    """CRC 错误的帧记录一次但不执行"""
+    capture = MessageCapture()
+    framer = CreateCaptureRtuFramer(capture, frame_gap=0.01)(ServerDecoder(), client=None)
+    requests = []
+    frame = bytearray(_read_holding())
+    frame[-1] ^= 0xFF
+    framer.processIncomingPacket(bytes(frame), requests.append, slave=[1], single=False)
+
+    assert requests == []
+    assert len(capture.get_messages()) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,181 @@
+"""
+测试 RTU 串口仲裁器：写优先、排队读取合并与拆分、合并失败退回逐个读取、帧间隔、取消排队作业、
+同一串口上的设备共用一个串口连接
+"""
+import asyncio
+import threading
+import time
+
+from src.device.protocol.modbus_handler import ModbusClientHandler
+from src.enums.modbus_def import ProtocolType
+from src.proto.pyModbus.client.serial_arbiter import (
+    SerialArbiter,
+    acquire_arbiter,
+    get_arbiter,
+    release_arbiter,
+)
+
+
+class _Line:
+    """模拟串口：记录每次事务，寄存器值等于地址，地址 >= 100 时返回异常 (空列表)"""
+
+    def __init__(self):
+        self.calls = []
+        self.times = []
+
+    def read(self, func_code, slave_id, address, count):
+        self.calls.append(("read", slave_id, address, count))
+        self.times.append(time.monotonic())
+        if address + count > 100:
+            return []
+        return list(range(address, address + count))
+
+    def write(self, tag):
+        self.calls.append(("write", tag))
+        self.times.append(time.monotonic())
+        return True
+
+
+def _blocked(arbiter: SerialArbiter) -> threading.Event:
+    """让工作线程停在一个作业上，便于在其后排队"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(2)
+
+    arbiter.submit(hold)
+    started.wait(1)
+    return release
+
+
+def test_writes_run_before_queued_reads():
+    line = _Line()
+    arbiter = SerialArbiter("test-priority", baudrate=115200)
+    arbiter.start()
+    try:
+        release = _blocked(arbiter)
+        reads = [arbiter.submit_read(line.read, 3, 1, 50 + i * 10, 1) for i in range(3)]
+        write = arbiter.submit_write(lambda: line.write("yk"))
+        release.set()
+        assert write.result(1) is True
+        assert [f.result(1) for f in reads] == [[50], [60], [70]]
+        assert line.calls[0] == ("write", "yk")
+    finally:
+        arbiter.stop()
+
+
+def test_queued_adjacent_reads_are_merged():
+    line = _Line()
+    arbiter = SerialArbiter("test-merge", baudrate=115200)
+    arbiter.start()
+    try:
+        release = _blocked(arbiter)
+        futures = [arbiter.submit_read(line.read, 3, 1, address, 2) for address in (4, 0, 2, 20)]
+        other_slave = arbiter.submit_read(line.read, 3, 2, 6, 1)
+        release.set()
+        assert [f.result(1) for f in futures] == [[4, 5], [0, 1], [2, 3], [20, 21]]
+        assert other_slave.result(1) == [6]
+        # 0-5 合并为一次读取，20 不相邻单独读取，其他从站不参与合并
+        assert sorted(call for call in line.calls if call[1] == 1) == [("read", 1, 0, 6), ("read", 1, 20, 2)]
+        assert arbiter.stats["merged_reads"] == 2
+    finally:
+        arbiter.stop()
+
+
+def test_failed_merged_read_falls_back_to_single_reads():
+    line = _Line()
+    arbiter = SerialArbiter("test-fallback", baudrate=115200)
+    arbiter.start()
+    try:
+        release = _blocked(arbiter)
+        good = arbiter.submit_read(line.read, 3, 1, 98, 2)
+        bad = arbiter.submit_read(line.read, 3, 1, 100, 1)
+        release.set()
+        assert good.result(1) == [98, 99]
+        assert bad.result(1) == []
+        assert line.calls == [("read", 1, 98, 3), ("read", 1, 98, 2), ("read", 1, 100, 1)]
+    finally:
+        arbiter.stop()
+
+
+def test_frame_gap_between_transactions():
+    line = _Line()
+    arbiter = SerialArbiter("test-gap", baudrate=1200)
+    arbiter.start()
+    try:
+        futures = [arbiter.submit_write(lambda i=i: line.write(i)) for i in range(4)]
+        for future in futures:
+            future.result(1)
+        gaps = [b - a for a, b in zip(line.times, line.times[1:])]
+        assert min(gaps) >= arbiter.gap * 0.95
+    finally:
+        arbiter.stop()
+
+
+def test_cancelled_job_is_skipped():
+    line = _Line()
+    arbiter = SerialArbiter("test-cancel", baudrate=115200)
+    arbiter.start()
+    try:
+        release = _blocked(arbiter)
+        cancelled = arbiter.submit_read(line.read, 3, 1, 0, 1)
+        kept = arbiter.submit_read(line.read, 3, 1, 10, 1)
+        assert cancelled.cancel()
+        release.set()
+        assert kept.result(1) == [10]
+        assert line.calls == [("read", 1, 10, 1)]
+    finally:
+        arbiter.stop()
+
+
+def test_arbiter_is_shared_per_port():
+    first, second = object(), object()
+    arbiter = acquire_arbiter("test-shared", first, baudrate=9600)
+    assert acquire_arbiter("test-shared", second) is arbiter
+    release_arbiter(arbiter, first)
+    assert get_arbiter("test-shared") is arbiter and arbiter.is_running
+    release_arbiter(arbiter, second)
+    assert get_arbiter("test-shared") is None and not arbiter.is_running
+
+
+class _SerialClient:
+    """模拟串口客户端：记录打开/关闭次数"""
+
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+        self.connected = False
+
+    def is_connected(self):
+        return self.connected
+
+    def connect(self):
+        self.opened += 1
+        self.connected = True
+        return True
+
+    def disconnect(self):
+        self.closed += 1
+        self.connected = False
+
+
+def test_devices_on_one_port_share_one_connection():
+    """同一串口上的多个 RTU 客户端设备只打开一次串口，最后一个设备断开时才关闭"""
+    config = {"protocol_type": ProtocolType.ModbusRtu, "serial_port": "test-owned", "baudrate": 115200}
+    first, second = ModbusClientHandler(), ModbusClientHandler()
+    first.initialize(dict(config))
+    second.initialize(dict(config))
+    line = first._client = _SerialClient()
+
+    async def scenario():
+        assert await first.connect()
+        assert await second.connect()
+        assert second._client is line and line.opened == 1
+        await first.disconnect()
+        assert line.closed == 0 and get_arbiter("test-owned").is_running
+        await second.disconnect()
+        assert line.closed == 1 and get_arbiter("test-owned") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,102 @@
+"""
+测试 Modbus RTU 共享串口总线：多个设备挂在同一串口，按从站地址分发
+使用 pymodbus 的 socket:// 串口地址在本机 TCP 端口上模拟串口
+"""
+import asyncio
+import logging
+import struct
+
+import pytest
+from pymodbus.utilities import computeCRC
+
+from src.enums.modbus_def import ProtocolType
+from src.proto.pyModbus.server import ModbusServer
+from src.proto.pyModbus.server.serial_bus import get_bus
+
+_PORT = 15030
+_SERIAL = f"socket://127.0.0.1:{_PORT}"
+
+
+def _read_holding(slave: int, address: int = 0, count: int = 1) -> bytes:
+    body = bytes([slave]) + struct.pack(">BHH", 3, address, count)
+    return body + struct.pack(">H", computeCRC(body))
+
+
+def _make_server(slave_id: int, name: str) -> ModbusServer:
+    server = ModbusServer(
+        logging.getLogger("test_serial_bus"),
+        [slave_id],
+        protocol_type=ProtocolType.ModbusRtu,
+        serial_port=_SERIAL,
+        baudrate=115200,
+        name=name,
+    )
+    server.setValueByAddress(3, slave_id, 0, slave_id * 100, "0x20")
+    return server
+
+
+async def _request(reader, writer, frame: bytes, timeout: float = 1.0) -> bytes:
+    writer.write(frame)
+    await writer.drain()
+    try:
+        return await asyncio.wait_for(reader.read(64), timeout=timeout)
+    except asyncio.TimeoutError:
+        return b""
+
+
+def test_devices_share_one_serial_port(monkeypatch):
+    """两个设备共用串口，各自只应答自己的从站地址"""
+    # setUpServer 会解析命令行参数，避免读到 pytest 的参数
+    monkeypatch.setattr("sys.argv", ["test_serial_bus"])
+
+    async def scenario():
+        dev_a = _make_server(1, "meter_a")
+        dev_b = _make_server(2, "meter_b")
+        tasks = [asyncio.create_task(dev_a.start()), asyncio.create_task(dev_b.start())]
+        await asyncio.sleep(0.3)
+        try:
+            bus = get_bus(_SERIAL)
+            assert bus is not None
+            assert bus.slave_map() == {1: "meter_a", 2: "meter_b"}
+
+            # 从站地址冲突的设备启动失败，不改变已有路由
+            dup = _make_server(1, "duplicate")
+            assert dup.busConflicts() == [1]
+            await asyncio.wait_for(dup.start(), timeout=1)
+            assert not dup.is_running and dup.serial_bus is None
+            assert bus.slave_map() == {1: "meter_a", 2: "meter_b"}
+            assert dup not in bus.servers
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", _PORT)
+            resp_a = await _request(reader, writer, _read_holding(1))
+            assert resp_a[:3] == b"\x01\x03\x02"
+            assert struct.unpack(">H", resp_a[3:5])[0] == 100
+
+            resp_b = await _request(reader, writer, _read_holding(2))
+            assert struct.unpack(">H", resp_b[3:5])[0] == 200
+
+            # 总线上不存在的地址不应答
+            assert await _request(reader, writer, _read_holding(9), timeout=0.3) == b""
+
+            # 报文只记录到所属设备
+            assert [m["direction"] for m in dev_a.getCapturedMessages()] == ["RX", "TX"]
+            assert [m["direction"] for m in dev_b.getCapturedMessages()] == ["RX", "TX"]
+
+            # 卸载一个设备后总线继续服务其他设备
+            await dev_a.stopAsync()
+            assert get_bus(_SERIAL) is bus
+            assert await _request(reader, writer, _read_holding(1), timeout=0.3) == b""
+            resp_b = await _request(reader, writer, _read_holding(2))
+            assert struct.unpack(">H", resp_b[3:5])[0] == 200
+            writer.close()
+        finally:
+            await dev_a.stopAsync()
+            await dev_b.stopAsync()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        assert get_bus(_SERIAL) is None
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
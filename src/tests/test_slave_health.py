@@ -0,0 +1,164 @@
+"""
+测试从站健康跟踪：自适应超时、熔断打开与指数退避探测、异常应答视为在线、处理器跳过熔断从站
+"""
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.device.protocol.modbus_handler import ModbusClientHandler
+from src.device.protocol.slave_health import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    SlaveHealthTracker,
+)
+from src.enums.point_data import Yc
+from src.proto.pyModbus.client.async_client import AsyncModbusClient
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_adaptive_timeout_follows_rtt():
+    tracker = SlaveHealthTracker(min_timeout=0.05, max_timeout=1.0)
+    assert tracker.timeout_for(1) == 1.0
+    for _ in range(20):
+        tracker.record_success(1, 0.02)
+    assert 0.05 <= tracker.timeout_for(1) < 0.1
+    for _ in range(20):
+        tracker.record_success(2, 0.8)
+    assert tracker.timeout_for(2) == 1.0
+
+
+def test_breaker_opens_and_backs_off_exponentially():
+    clock = _Clock()
+    tracker = SlaveHealthTracker(failure_threshold=3, base_backoff=1.0, max_backoff=4.0, clock=clock)
+    for _ in range(3):
+        assert tracker.allow(5)
+        tracker.record_failure(5)
+    assert tracker.health(5).state == BREAKER_OPEN
+    assert not tracker.allow(5)
+
+    for expected_backoff in (2.0, 4.0, 4.0):
+        clock.now = tracker.health(5).open_until
+        assert tracker.allow(5)  # 到期放行一个探测请求
+        assert tracker.health(5).state == BREAKER_HALF_OPEN
+        assert not tracker.allow(5)  # 探测进行中，其余请求直接拒绝
+        tracker.record_failure(5)
+        assert tracker.health(5).backoff == expected_backoff
+
+    clock.now = tracker.health(5).open_until
+    assert tracker.allow(5)
+    tracker.record_success(5, 0.01)
+    assert tracker.health(5).state == BREAKER_CLOSED
+    assert tracker.summary()[5]["trips"] == 1
+    assert tracker.summary()[5]["skipped"] == 4
+
+
+class _GatewayClient(AsyncModbusClient):
+    """模拟网关：slave 2 无应答，slave 3 返回非法地址异常，其余正常"""
+
+    def __init__(self):
+        super().__init__()
+        self.connected = True
+        self.client = SimpleNamespace(connected=True)
+        self.calls = {}
+
+    async def read_holding_registers(self, slave_id, address, count=1):
+        self.calls[slave_id] = self.calls.get(slave_id, 0) + 1
+        if slave_id == 2:
+            await asyncio.sleep(10)
+        if slave_id == 3:
+            self.last_exception_code = 2
+            return []
+        await asyncio.sleep(0.005)
+        return [0] * count
+
+
+def _handler():
+    handler = ModbusClientHandler(logging.getLogger("test_slave_health"))
+    handler._client = _GatewayClient()
+    handler._is_running = True
+    handler._health = SlaveHealthTracker(max_timeout=0.05, retries=1, failure_threshold=2, base_backoff=60.0)
+    return handler
+
+
+def test_dead_slave_is_skipped_after_breaker_opens():
+    handler = _handler()
+
+    async def run():
+        for _ in range(2):
+            assert await handler.read_registers_batch_async(3, 1, 0, 4) == [0, 0, 0, 0]
+        # 第一次调用：首次尝试 + 1 次重试均超时，熔断打开
+        assert await handler.read_registers_batch_async(3, 2, 0, 4) == []
+        started = time.perf_counter()
+        for _ in range(10):
+            assert await handler.read_registers_batch_async(3, 2, 0, 4) == []
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.05
+    assert handler._client.calls[2] == 2
+    health = handler.get_slave_health()
+    assert health[2]["state"] == BREAKER_OPEN and health[2]["skipped"] == 10
+    assert health[1]["state"] == BREAKER_CLOSED and health[1]["srtt_ms"] is not None
+
+
+def test_exception_response_counts_as_alive():
+    handler = _handler()
+
+    async def run():
+        for _ in range(5):
+            assert await handler.read_registers_batch_async(3, 3, 0, 4) == []
+
+    asyncio.run(run())
+    assert handler._client.calls[3] == 5  # 异常应答不重试
+    assert handler.get_slave_health()[3]["state"] == BREAKER_CLOSED
+
+
+def test_single_point_read_goes_through_breaker():
+    handler = _handler()
+    point = Yc(address="0x0000", code="p", decode="0x20", rtu_addr=2)
+
+    async def run():
+        assert await handler.read_registers_batch_async(3, 2, 0, 4) == []
+        started = time.perf_counter()
+        assert await handler.read_value_async(point) is None
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(run())
+    # 熔断打开后单点读取直接返回，不再发出请求
+    assert elapsed < 0.02
+    assert handler._client.calls[2] == 2
+    assert handler.get_slave_health()[2]["skipped"] == 1
+
+
+def test_cancelled_probe_releases_half_open_breaker():
+    clock = _Clock()
+    handler = _handler()
+    handler._health = SlaveHealthTracker(max_timeout=5.0, retries=0, failure_threshold=1, base_backoff=1.0, clock=clock)
+
+    async def run():
+        handler._health.record_failure(2)
+        clock.now = handler._health.health(2).open_until
+        probe = asyncio.ensure_future(handler.read_registers_batch_async(3, 2, 0, 4))
+        await asyncio.sleep(0.01)
+        assert handler._health.health(2).probing
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(run())
+    health = handler._health.health(2)
+    assert not health.probing and health.state == BREAKER_OPEN
+    # 退避到期后可以再次探测
+    clock.now = health.open_until
+    assert handler._health.allow(2)
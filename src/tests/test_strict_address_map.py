@@ -0,0 +1,91 @@
+"""
+测试 Modbus 服务端严格地址表模式
+
+开启后，未被已配置测点覆盖的地址请求应直接返回异常码 0x02 (ILLEGAL DATA ADDRESS)
+"""
+import pytest
+from pymodbus.datastore import ModbusSequentialDataBlock
+from pymodbus.pdu import ExceptionResponse, ModbusExceptions
+from pymodbus.register_read_message import ReadHoldingRegistersRequest
+from pymodbus.bit_read_message import ReadCoilsRequest
+
+from src.enums.point_data import Yc, Yk
+from src.proto.pyModbus.server.address_map import AddressMap, StrictSlaveContext
+
+
+def _make_context(address_map: AddressMap, slave_id: int = 1) -> StrictSlaveContext:
+    context = StrictSlaveContext(
+        slave_id,
+        address_map,
+        di=ModbusSequentialDataBlock(0, [0] * 65535),
+        co=ModbusSequentialDataBlock(0, [0] * 65535),
+        hr=ModbusSequentialDataBlock(0, [0] * 65535),
+        ir=ModbusSequentialDataBlock(0, [0] * 65535),
+    )
+    context.strict = True
+    return context
+
+
+def test_mark_point_uses_register_count():
+    """32 位测点应占用两个寄存器地址"""
+    address_map = AddressMap()
+    address_map.mark_point(Yc(rtu_addr="1", address="0x0010", func_code=3, decode="0x41"))
+
+    assert address_map.is_covered(1, "h", 0x10, 2)
+    assert not address_map.is_covered(1, "h", 0x10, 3)
+    assert not address_map.is_covered(1, "h", 0x0F, 1)
+    assert not address_map.is_covered(2, "h", 0x10, 1)
+    assert address_map.covered_count(1, "h") == 2
+
+
+def test_bit_table_point_occupies_one_address():
+    """线圈测点只占用一个地址"""
+    address_map = AddressMap()
+    address_map.mark_point(Yk(rtu_addr="1", address="0x0005", func_code=5))
+
+    assert address_map.is_covered(1, "c", 5, 1)
+    assert not address_map.is_covered(1, "c", 5, 2)
+
+
+def test_rebuild_clears_removed_points():
+    """重建后已删除测点的地址应失效"""
+    address_map = AddressMap()
+    p1 = Yc(rtu_addr="1", address="0x0000", func_code=3, decode="0x20")
+    p2 = Yc(rtu_addr="1", address="0x0001", func_code=3, decode="0x20")
+    address_map.rebuild([p1, p2])
+    assert address_map.is_covered(1, "h", 0, 2)
+
+    address_map.rebuild([p1])
+    assert address_map.is_covered(1, "h", 0, 1)
+    assert not address_map.is_covered(1, "h", 1, 1)
+
+
+def test_out_of_map_request_returns_illegal_address():
+    """越界读取应返回 ILLEGAL DATA ADDRESS 异常"""
+    address_map = AddressMap()
+    address_map.mark_point(Yc(rtu_addr="1", address="0x0010", func_code=3, decode="0x41"))
+    context = _make_context(address_map)
+
+    response = ReadHoldingRegistersRequest(0x20, 1, slave=1).execute(context)
+    assert isinstance(response, ExceptionResponse)
+    assert response.exception_code == ModbusExceptions.IllegalAddress
+
+    response = ReadHoldingRegistersRequest(0x10, 2, slave=1).execute(context)
+    assert not isinstance(response, ExceptionResponse)
+    assert response.registers == [0, 0]
+
+    response = ReadCoilsRequest(0x10, 1, slave=1).execute(context)
+    assert isinstance(response, ExceptionResponse)
+
+
+def test_non_strict_context_accepts_any_address():
+    """未开启严格模式时保持原有行为"""
+    context = _make_context(AddressMap())
+    context.strict = False
+
+    response = ReadHoldingRegistersRequest(0x1234, 10, slave=1).execute(context)
+    assert not isinstance(response, ExceptionResponse)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
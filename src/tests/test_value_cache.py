@@ -0,0 +1,159 @@
+"""
+测试测点值缓存：新鲜度窗口内复用、过期后访问设备、并发读取合并 (singleflight)、批量轮询填充与写入失效
+"""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from src.device.core.data.data_reader import DataReader
+from src.device.core.data.value_cache import ValueCache
+from src.device.core.point.point_operator import PointOperator
+from src.device.protocol.modbus_handler import ModbusClientHandler
+from src.enums.point_data import Yc
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fresh_value_served_until_ttl_expires():
+    clock = _Clock()
+    cache = ValueCache(ttl=1.0, clock=clock)
+    calls = []
+
+    async def fetch():
+        calls.append(clock.now)
+        return len(calls)
+
+    async def run():
+        cache.store("p", 42)
+        assert await cache.read_through("p", fetch) == 42
+        clock.now += 1.5
+        assert await cache.read_through("p", fetch) == 1
+        assert await cache.read_through("p", fetch) == 1
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    assert cache.stats == {"hits": 2, "misses": 1, "shared": 0}
+
+
+def test_concurrent_reads_share_one_request():
+    cache = ValueCache(ttl=0)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 7
+
+    async def run():
+        return await asyncio.gather(*(cache.read_through("p", fetch) for _ in range(5)))
+
+    assert asyncio.run(run()) == [7] * 5
+    assert len(calls) == 1
+    assert cache.stats["shared"] == 4
+    assert cache.summary()["inflight"] == 0
+
+
+def test_failed_read_is_not_cached():
+    cache = ValueCache(ttl=10)
+
+    async def fetch():
+        return None
+
+    assert asyncio.run(cache.read_through("p", fetch)) is None
+    assert cache.get_fresh("p") == (False, None)
+
+
+def test_invalidate_during_inflight_read_drops_stale_value():
+    cache = ValueCache(ttl=10)
+    values = iter([1, 2])
+    started = []
+
+    async def fetch():
+        started.append(1)
+        await asyncio.sleep(0.01)
+        return next(values)
+
+    async def run():
+        stale = asyncio.ensure_future(cache.read_through("p", fetch))
+        await asyncio.sleep(0)
+        # 读取途中写入：旧请求的结果不再缓存，新的读取不合并到旧请求
+        cache.invalidate("p")
+        fresh = await cache.read_through("p", fetch)
+        assert await stale == 1
+        return fresh
+
+    assert asyncio.run(run()) == 2
+    assert len(started) == 2
+    assert cache.get_fresh("p") == (True, 2)
+    assert cache.stats["shared"] == 0
+
+    # 批量读取发出前取得的版本早于失效时，存入被丢弃
+    since = cache.version()
+    cache.invalidate()
+    assert not cache.store("p", 3, since=since)
+    assert cache.get_fresh("p") == (False, None)
+    assert cache.store("p", 4, since=cache.version())
+
+
+class _Handler(ModbusClientHandler):
+    """记录单点读取次数的客户端处理器"""
+
+    def __init__(self):
+        super().__init__(logging.getLogger("test_value_cache"))
+        self.reads = 0
+        self.writes = 0
+
+    async def read_value_async(self, point):
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return 123
+
+    async def write_value_async(self, point, value):
+        self.writes += 1
+        return True
+
+
+def _device(handler, point):
+    device = SimpleNamespace(
+        name="cache",
+        protocol_handler=handler,
+        log=logging.getLogger("test_value_cache"),
+        _logger=None,
+        point_manager=SimpleNamespace(get_point_by_code={point.code: point}.get),
+    )
+    device.data_reader = DataReader(device)
+    return device
+
+
+def test_single_read_uses_polled_value_and_write_invalidates():
+    point = Yc(rtu_addr="1", address="0x10", func_code=3, decode="0x20", code="yc1")
+    handler = _Handler()
+    device = _device(handler, point)
+    operator = PointOperator(device)
+
+    group = device.data_reader.planner.plan(1, 3, [point])[0]
+    device.data_reader._decode_group([55], group)
+    assert device.data_reader.value_cache.get_fresh("yc1") == (True, 55)
+
+    async def run():
+        assert await operator.read_single_point_async("yc1") == 55
+        assert handler.reads == 0
+        await operator.edit_value_async("yc1", 9)
+        results = await asyncio.gather(*(operator.read_single_point_async("yc1") for _ in range(3)))
+        assert results == [123] * 3
+
+    asyncio.run(run())
+    assert handler.reads == 1 and handler.writes == 1
+
+    # 批量读取期间写入的测点，解码结果不存入缓存
+    since = device.data_reader.value_cache.version()
+    operator.edit_value("yc1", 7)
+    device.data_reader._decode_group([66], group, since)
+    assert point.value == 66
+    assert device.data_reader.value_cache.get_fresh("yc1") == (False, None)
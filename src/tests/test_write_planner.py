@@ -0,0 +1,139 @@
+"""
+测试批量写入：连续地址合并为 FC15/FC16、协议上限拆分、编码与逐点写入一致、DataWriter 逐点结果
+"""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from src.device.core.data.data_reader import DataReader
+from src.device.core.data.data_writer import DataWriter
+from src.device.core.data.write_planner import (
+    MAX_WRITE_REGISTERS,
+    encode_point_value,
+    plan_writes,
+)
+from src.device.protocol.modbus_handler import ModbusClientHandler
+from src.enums.point_data import Yc, Yk, Yt
+from src.proto.pyModbus.client.async_client import AsyncModbusClient
+
+
+def _yt(address: int, decode: str = "0x20", slave_id: int = 1, code: str = "") -> Yt:
+    return Yt(rtu_addr=str(slave_id), address=hex(address), func_code=16, decode=decode, code=code or f"yt{address}")
+
+
+def _yk(address: int, code: str = "") -> Yk:
+    return Yk(rtu_addr="1", address=hex(address), func_code=5, code=code or f"yk{address}")
+
+
+class _RecordingClient(AsyncModbusClient):
+    """记录写请求的异步客户端 (不建立连接)"""
+
+    def __init__(self):
+        super().__init__()
+        self.connected = True
+        self.client = SimpleNamespace(connected=True)
+        self.requests = []
+
+    async def write_register(self, slave_id, address, value):
+        self.requests.append((6, slave_id, address, [value]))
+        return True
+
+    async def write_registers(self, slave_id, address, values):
+        self.requests.append((16, slave_id, address, list(values)))
+        return True
+
+    async def write_coil(self, slave_id, address, value):
+        self.requests.append((5, slave_id, address, [value]))
+        return True
+
+    async def write_coils(self, slave_id, address, values):
+        self.requests.append((15, slave_id, address, list(values)))
+        return True
+
+
+def test_contiguous_points_merge_into_one_request():
+    """地址严格连续的寄存器合并为一个 FC16，有空洞时拆分且不写空洞"""
+    points = [_yt(0), _yt(1, decode="0x41"), _yt(3), _yt(10)]
+    blocks, rejected = plan_writes([(p, 1) for p in points])
+    assert rejected == []
+    assert [(b.func_code, b.start_address, len(b.values)) for b in blocks] == [(16, 0, 4), (6, 10, 1)]
+
+
+def test_last_value_wins_and_readonly_rejected():
+    point = _yt(0)
+    readonly = Yc(rtu_addr="1", address="0x1", func_code=4, decode="0x20", code="yc1")
+    blocks, rejected = plan_writes([(point, 1), (readonly, 5), (point, 7)])
+    assert rejected == [readonly]
+    assert len(blocks) == 1 and blocks[0].values == [7]
+
+
+def test_blocks_respect_protocol_limit_and_slave():
+    points = [_yt(a) for a in range(MAX_WRITE_REGISTERS + 5)] + [_yt(0, slave_id=2)]
+    blocks, _ = plan_writes([(p, 0) for p in points])
+    assert [(b.slave_id, len(b.values)) for b in blocks] == [(1, MAX_WRITE_REGISTERS), (1, 5), (2, 1)]
+
+
+def test_coils_merge_into_fc15():
+    blocks, _ = plan_writes([(_yk(a), a % 2) for a in range(4)])
+    assert len(blocks) == 1
+    assert blocks[0].func_code == 15 and blocks[0].values == [False, True, False, True]
+
+
+def test_encoding_matches_single_point_write():
+    """编码结果与 write_value_by_address 逐点写入的寄存器一致"""
+    client = _RecordingClient()
+    cases = [("0x20", 1234), ("0x21", -2), ("0xC1", -300), ("0x41", -70000), ("0x42", 3.5), ("0xD3", -1.25), ("0x62", 2.75)]
+
+    async def run():
+        for decode, value in cases:
+            client.requests.clear()
+            await client.write_value_by_address(16, 1, 0, value, decode)
+            assert encode_point_value(_yt(0, decode=decode), value) == client.requests[0][3], decode
+
+    asyncio.run(run())
+
+
+def _device(handler, points):
+    by_code = {p.code: p for p in points}
+    device = SimpleNamespace(
+        name="writer",
+        protocol_handler=handler,
+        log=logging.getLogger("test_write_planner"),
+        point_manager=SimpleNamespace(get_point_by_code=by_code.get),
+        ip="10.0.0.36",
+        serial_port=None,
+    )
+    device.data_reader = DataReader(device)
+    return device
+
+
+def test_data_writer_batches_through_handler():
+    """Modbus 客户端处理器把连续地址合并下发，并返回每个测点的结果"""
+    client = _RecordingClient()
+    handler = ModbusClientHandler(logging.getLogger("test_write_planner"))
+    handler._client = client
+    handler._is_running = True
+
+    points = [_yt(0, code="a"), _yt(1, code="b"), _yt(2, code="c"), _yk(8, code="k")]
+    writer = DataWriter(_device(handler, points))
+    results = asyncio.run(writer.write_values_async({"a": 1, "b": 2, "c": 3, "k": 1, "missing": 1}))
+
+    assert results == {"a": True, "b": True, "c": True, "k": True, "missing": False}
+    assert client.requests == [(5, 1, 8, [True]), (16, 1, 0, [1, 2, 3])]
+
+
+def test_data_writer_reports_failed_block():
+    class _FailingHandler:
+        def __init__(self):
+            self.calls = []
+
+        async def write_block_async(self, func_code, slave_id, start_address, values):
+            self.calls.append(start_address)
+            return start_address != 5
+
+    handler = _FailingHandler()
+    points = [_yt(0, code="a"), _yt(5, code="b"), _yt(6, code="c")]
+    writer = DataWriter(_device(handler, points))
+    results = asyncio.run(writer.write_values_async({"a": 1, "b": 2, "c": 3}))
+    assert handler.calls == [0, 5]
+    assert results == {"a": True, "b": False, "c": False}
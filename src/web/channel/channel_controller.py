@@ -323,7 +323,7 @@ async def create_and_start_device(req: CreateAndStartDeviceRequest, request: Req
             is_start=True,
         )
         general_device.name = channel_name
-        general_device.data_update_thread.start()
+        general_device.start_auto_read()
         
         # 添加到设备控制器
         device_controller = request.app.state.device_controller
@@ -526,7 +526,7 @@ async def _reload_device_instance(device_controller, channel_id: int, is_start:
     new_device.name = device_name
     
     if is_start:
-        new_device.data_update_thread.start()
+        new_device.start_auto_read()
     
     device_controller.device_list.append(new_device)
     device_controller.device_map[new_device.name] = new_device
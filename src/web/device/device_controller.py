@@ -11,14 +11,17 @@ from src.web.log import log
 from src.web.schemas.schemas import (
     BaseModel, BaseResponse, DeviceNameListResponse, DeviceInfoRequest, DeviceInfoResponse,
     SlaveIdListRequest, SlaveIdListResponse, DeviceTableRequest,
-    PointEditDataRequest, PointLimitEditRequest, PointMetadataEditRequest,
+    PointEditDataRequest, PointsBatchEditRequest, PointLimitEditRequest, PointMetadataEditRequest,
     PointInfoRequest, SimulationStartRequest, SimulationStopRequest,
     SimulateMethodSetRequest, SimulateStepSetRequest, SimulateRangeSetRequest,
     DeviceStartRequest, DeviceStopRequest, DeviceResetRequest,
     MessageListRequest, PointCreateRequest, PointDeleteRequest, SlaveAddRequest, SlaveDeleteRequest,
     SlaveEditRequest,
-    ClearPointsRequest, PointsBatchCreateRequest, CurrentTableRequest, PointLimitGetRequest
+    ClearPointsRequest, PointsBatchCreateRequest, CurrentTableRequest, PointLimitGetRequest,
+    StrictAddressMapRequest, ConnectionLimitsRequest, ReadPlanOverrideRequest, PipelineDepthRequest,
+    ManualReadAllRequest, PollConcurrencyRequest, PollClassRequest, PollPeriodRequest, ValueCacheTtlRequest
 )
+from src.device.core.data.poll_limiter import poll_limiter
 from src.data.dao.channel_dao import ChannelDao
 
 # 创建路由对象
@@ -60,6 +63,10 @@ async def get_device_info(req: DeviceInfoRequest, request: Request):
             "databits": getattr(device, 'databits', 8),
             "stopbits": getattr(device, 'stopbits', 1),
             "parity": getattr(device, 'parity', 'N'),
+            "strict_address_map": getattr(device, 'strict_address_map', False),
+            "serial_bus": device.get_serial_bus_info(),
+            "slave_health": device.get_slave_health(),
+            "serial_arbiter": device.get_serial_arbiter_stats(),
         }
         
         # 获取 conn_type（服务端/客户端判断需要）
@@ -170,6 +177,22 @@ async def edit_point_data(req: PointEditDataRequest, request: Request):
         return BaseResponse(code=500, message=f"编辑测点数据失败: {e}!", data=False)
 
 
+# 批量编辑测点数据接口 (Modbus 客户端合并连续地址写入)
+@device_router.post("/edit_point_data_batch/", response_model=BaseResponse)
+async def edit_point_data_batch(req: PointsBatchEditRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        results = await device.write_points_async(req.values)
+        success = sum(1 for ok in results.values() if ok)
+        return BaseResponse(
+            message="批量编辑测点数据成功!" if success == len(results) else "部分测点编辑失败!",
+            data={"results": results, "success": success, "fail": len(results) - success},
+        )
+    except Exception as e:
+        log.error(f"批量编辑测点数据失败: {e}")
+        return BaseResponse(code=500, message=f"批量编辑测点数据失败: {e}!", data=False)
+
+
 # 修改测点限制值接口
 @device_router.post("/edit_point_limit/", response_model=BaseResponse)
 async def edit_point_limit(req: PointLimitEditRequest, request: Request):
@@ -361,6 +384,61 @@ async def start_auto_read(req: DeviceInfoRequest, request: Request):
         return BaseResponse(code=500, message=f"启动自动读取失败: {e}!", data=False)
 
 
+# 设置测点轮询类别
+@device_router.post("/set_poll_class", response_model=BaseResponse)
+async def set_poll_class(req: PollClassRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        device.set_poll_class(req.point_code, req.poll_class)
+        return BaseResponse(message="设置轮询类别成功!", data=True)
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 或测点 {req.point_code} 不存在!", data=False)
+    except Exception as e:
+        log.error(f"设置轮询类别失败: {e}")
+        return BaseResponse(code=500, message=f"设置轮询类别失败: {e}!", data=False)
+
+
+# 设置轮询类别周期
+@device_router.post("/set_poll_period", response_model=BaseResponse)
+async def set_poll_period(req: PollPeriodRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        device.set_poll_period(req.poll_class, req.period)
+        return BaseResponse(message="设置轮询周期成功!", data=True)
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=False)
+    except Exception as e:
+        log.error(f"设置轮询周期失败: {e}")
+        return BaseResponse(code=500, message=f"设置轮询周期失败: {e}!", data=False)
+
+
+# 设置测点值缓存新鲜度窗口
+@device_router.post("/set_value_cache_ttl", response_model=BaseResponse)
+async def set_value_cache_ttl(req: ValueCacheTtlRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        device.set_value_cache_ttl(req.ttl)
+        return BaseResponse(message="设置测点值缓存新鲜度成功!", data=True)
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=False)
+    except Exception as e:
+        log.error(f"设置测点值缓存新鲜度失败: {e}")
+        return BaseResponse(code=500, message=f"设置测点值缓存新鲜度失败: {e}!", data=False)
+
+
+# 获取轮询调度状态
+@device_router.post("/get_poll_schedule", response_model=BaseResponse)
+async def get_poll_schedule(req: DeviceInfoRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        return BaseResponse(message="获取轮询调度状态成功!", data=device.get_poll_schedule())
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=None)
+    except Exception as e:
+        log.error(f"获取轮询调度状态失败: {e}")
+        return BaseResponse(code=500, message=f"获取轮询调度状态失败: {e}!", data=None)
+
+
 # 停止自动读取
 @device_router.post("/stop_auto_read", response_model=BaseResponse)
 async def stop_auto_read(req: DeviceInfoRequest, request: Request):
@@ -400,6 +478,40 @@ async def manual_read(req: ManualReadRequest, request: Request):
         return BaseResponse(code=500, message=f"手动读取失败: {e}!", data=False)
 
 
+# 并发读取多个客户端设备
+@device_router.post("/manual_read_all", response_model=BaseResponse)
+async def manual_read_all(req: ManualReadAllRequest, request: Request):
+    try:
+        stats = await request.app.state.device_controller.poll_devices(req.device_names, req.interval or 0)
+        return BaseResponse(message="批量读取成功!", data=stats)
+    except KeyError as e:
+        return BaseResponse(code=404, message=f"设备 {e} 不存在!", data=None)
+    except Exception as e:
+        log.error(f"批量读取失败: {e}")
+        return BaseResponse(code=500, message=f"批量读取失败: {e}!", data=None)
+
+
+# 设置轮询并发上限
+@device_router.post("/set_poll_concurrency", response_model=BaseResponse)
+async def set_poll_concurrency(req: PollConcurrencyRequest, request: Request):
+    try:
+        poll_limiter.set_defaults(req.host_limit, req.serial_limit)
+        if req.host:
+            poll_limiter.set_limit(f"tcp:{req.host}", req.limit)
+        if req.serial_port:
+            poll_limiter.set_limit(f"serial:{req.serial_port}", req.limit)
+        return BaseResponse(message="设置轮询并发上限成功!", data=poll_limiter.summary())
+    except Exception as e:
+        log.error(f"设置轮询并发上限失败: {e}")
+        return BaseResponse(code=500, message=f"设置轮询并发上限失败: {e}!", data=None)
+
+
+# 获取轮询并发状态
+@device_router.post("/get_poll_concurrency", response_model=BaseResponse)
+async def get_poll_concurrency(request: Request):
+    return BaseResponse(message="获取轮询并发状态成功!", data=poll_limiter.summary())
+
+
 # 读取单个测点值
 @device_router.post("/read_single_point", response_model=BaseResponse)
 async def read_single_point(req: PointInfoRequest, request: Request):
@@ -466,6 +578,126 @@ async def get_avg_time(req: DeviceInfoRequest, request: Request):
         return BaseResponse(code=500, message=f"获取平均收发时间失败: {e}!", data=None)
 
 
+# 获取服务端请求处理耗时分布
+@device_router.post("/get_processing_times", response_model=BaseResponse)
+async def get_processing_times(req: DeviceInfoRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        stats = device.get_processing_times()
+        return BaseResponse(message="获取请求处理耗时成功!", data=stats)
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=None)
+    except Exception as e:
+        log.error(f"获取请求处理耗时失败: {e}")
+        return BaseResponse(code=500, message=f"获取请求处理耗时失败: {e}!", data=None)
+
+
+# ===== Modbus 服务端配置接口 =====
+
+# 设置严格地址表模式
+@device_router.post("/set_strict_address_map", response_model=BaseResponse)
+async def set_strict_address_map(req: StrictAddressMapRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        success = device.set_strict_address_map(req.enabled)
+        return BaseResponse(
+            message="设置严格地址表模式成功!" if success else "当前设备不支持严格地址表模式!",
+            data=success
+        )
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=False)
+    except Exception as e:
+        log.error(f"设置严格地址表模式失败: {e}")
+        return BaseResponse(code=500, message=f"设置严格地址表模式失败: {e}!", data=False)
+
+
+# 设置 TCP 连接限制
+@device_router.post("/set_connection_limits", response_model=BaseResponse)
+async def set_connection_limits(req: ConnectionLimitsRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        limits = device.set_connection_limits(
+            max_connections=req.max_connections,
+            idle_timeout=req.idle_timeout,
+            max_requests_per_second=req.max_requests_per_second,
+            burst=req.burst,
+        )
+        return BaseResponse(message="设置连接限制成功!", data=limits)
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=None)
+    except Exception as e:
+        log.error(f"设置连接限制失败: {e}")
+        return BaseResponse(code=500, message=f"设置连接限制失败: {e}!", data=None)
+
+
+# 获取 TCP 连接统计
+@device_router.post("/get_connection_stats", response_model=BaseResponse)
+async def get_connection_stats(req: DeviceInfoRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        return BaseResponse(message="获取连接统计成功!", data=device.get_connection_stats())
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=None)
+    except Exception as e:
+        log.error(f"获取连接统计失败: {e}")
+        return BaseResponse(code=500, message=f"获取连接统计失败: {e}!", data=None)
+
+
+# ===== Modbus 客户端批量读取规划接口 =====
+
+# 设置从站批量读取规划覆盖
+@device_router.post("/set_read_plan_override", response_model=BaseResponse)
+async def set_read_plan_override(req: ReadPlanOverrideRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        device.set_read_plan_override(req.slave_id, req.max_gap, req.max_count)
+        return BaseResponse(message="设置批量读取规划成功!", data=True)
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=False)
+    except Exception as e:
+        log.error(f"设置批量读取规划失败: {e}")
+        return BaseResponse(code=500, message=f"设置批量读取规划失败: {e}!", data=False)
+
+
+# 获取批量读取规划器状态
+@device_router.post("/get_read_plan_info", response_model=BaseResponse)
+async def get_read_plan_info(req: DeviceInfoRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        return BaseResponse(message="获取批量读取规划成功!", data=device.get_read_plan_info())
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=None)
+    except Exception as e:
+        log.error(f"获取批量读取规划失败: {e}")
+        return BaseResponse(code=500, message=f"获取批量读取规划失败: {e}!", data=None)
+
+
+# 设置 Modbus TCP 客户端流水线深度
+@device_router.post("/set_pipeline_depth", response_model=BaseResponse)
+async def set_pipeline_depth(req: PipelineDepthRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        return BaseResponse(message="设置流水线深度成功!", data=device.set_pipeline_depth(req.depth))
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=None)
+    except Exception as e:
+        log.error(f"设置流水线深度失败: {e}")
+        return BaseResponse(code=500, message=f"设置流水线深度失败: {e}!", data=None)
+
+
+# 获取 Modbus TCP 客户端流水线统计
+@device_router.post("/get_pipeline_stats", response_model=BaseResponse)
+async def get_pipeline_stats(req: DeviceInfoRequest, request: Request):
+    try:
+        device = get_device(req.device_name, request)
+        return BaseResponse(message="获取流水线统计成功!", data=device.get_pipeline_stats())
+    except KeyError:
+        return BaseResponse(code=404, message=f"设备 {req.device_name} 不存在!", data=None)
+    except Exception as e:
+        log.error(f"获取流水线统计失败: {e}")
+        return BaseResponse(code=500, message=f"获取流水线统计失败: {e}!", data=None)
+
+
 # ===== 动态测点/从机管理接口 =====
 
 # 添加测点
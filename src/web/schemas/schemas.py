@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Literal
 from src.enums.modbus_def import ProtocolType
 from src.enums.point_data import SimulateMethod, DeviceType
 from src.config.config import Config
@@ -37,6 +37,10 @@ class PointEditDataRequest(BaseModel):
     point_code: str
     point_value: float
 
+class PointsBatchEditRequest(BaseModel):
+    device_name: str
+    values: Dict[str, float] = Field(..., description="测点编码 -> 实际值")
+
 class PointLimitEditRequest(BaseModel):
     device_name: str
     point_code: str
@@ -174,6 +178,72 @@ class MessageListRequest(BaseModel):
     limit: Optional[int] = Field(100, description="最大返回数量")
 
 
+# ========== Modbus 服务端配置请求 ==========
+
+class StrictAddressMapRequest(BaseModel):
+    """设置严格地址表模式请求"""
+    device_name: str = Field(..., description="设备名称")
+    enabled: bool = Field(..., description="是否开启严格地址表模式（未配置地址返回异常码 0x02）")
+
+
+class ReadPlanOverrideRequest(BaseModel):
+    """设置从站批量读取规划覆盖请求（两项均为空时清除覆盖）"""
+    device_name: str = Field(..., description="设备名称")
+    slave_id: int = Field(..., description="从站地址")
+    max_gap: Optional[int] = Field(None, ge=0, description="允许跨越的最大地址空洞，0 表示严格连续")
+    max_count: Optional[int] = Field(None, ge=1, le=2000, description="单次最大读取数量")
+
+
+class ManualReadAllRequest(BaseModel):
+    """并发读取多个客户端设备请求"""
+    device_names: Optional[List[str]] = Field(None, description="设备名称列表，为空时读取所有已连接的客户端设备")
+    interval: Optional[int] = Field(0, ge=0, description="批量读取请求间隔（毫秒）")
+
+
+class PollConcurrencyRequest(BaseModel):
+    """设置轮询并发上限请求（按主机或串口；limit 为空时恢复默认）"""
+    host: Optional[str] = Field(None, description="目标主机 IP")
+    serial_port: Optional[str] = Field(None, description="串口号")
+    limit: Optional[int] = Field(None, ge=1, description="该目标同时在途的最大请求数")
+    host_limit: Optional[int] = Field(None, ge=1, description="主机默认并发上限")
+    serial_limit: Optional[int] = Field(None, ge=1, description="串口总线默认并发上限")
+
+
+class PollClassRequest(BaseModel):
+    """设置测点轮询类别请求（poll_class 为空时恢复默认）"""
+    device_name: str = Field(..., description="设备名称")
+    point_code: str = Field(..., description="测点编码")
+    poll_class: Optional[Literal["fast", "normal", "slow"]] = Field(None, description="轮询类别")
+
+
+class PollPeriodRequest(BaseModel):
+    """设置轮询类别周期请求"""
+    device_name: str = Field(..., description="设备名称")
+    poll_class: Literal["fast", "normal", "slow"] = Field(..., description="轮询类别")
+    period: float = Field(..., gt=0, description="轮询周期（秒）")
+
+
+class ValueCacheTtlRequest(BaseModel):
+    """设置测点值缓存新鲜度窗口请求"""
+    device_name: str = Field(..., description="设备名称")
+    ttl: float = Field(..., ge=0, description="单点读取复用缓存值的新鲜度窗口（秒），0 表示总是访问设备")
+
+
+class PipelineDepthRequest(BaseModel):
+    """设置 Modbus TCP 客户端流水线深度请求"""
+    device_name: str = Field(..., description="设备名称")
+    depth: int = Field(..., ge=1, le=64, description="最大在途请求数，1 表示逐个请求")
+
+
+class ConnectionLimitsRequest(BaseModel):
+    """设置 TCP 连接限制请求（未提供的字段保持不变，0 表示不限制）"""
+    device_name: str = Field(..., description="设备名称")
+    max_connections: Optional[int] = Field(None, ge=0, description="最大并发连接数")
+    idle_timeout: Optional[float] = Field(None, ge=0, description="空闲超时（秒）")
+    max_requests_per_second: Optional[float] = Field(None, ge=0, description="每连接每秒最大请求数")
+    burst: Optional[int] = Field(None, ge=0, description="限速令牌桶容量")
+
+
 # ========== 动态测点/从机管理请求 ==========
 
 class PointCreateRequest(BaseModel):